@@ -0,0 +1,94 @@
+import threading
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+
+def check_database():
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def check_migrations():
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f"{len(plan)} migrations are not applied.")
+
+
+def check_caches():
+    key = f"health:readiness:{uuid4().hex}"
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        cache.set(key, 1, timeout=5)
+        if cache.get(key) != 1:
+            raise RuntimeError(f"Cache {alias!r} did not return what was set.")
+        cache.delete(key)
+
+
+class ReadinessProbe:
+    """Runs the readiness checks at most once per `interval` seconds.
+
+    Load balancers probe every node many times a minute, so concurrent
+    probes share the last result and only one of them runs the checks when
+    it is stale. Checks in `latched` stop running once they pass: applied
+    migrations stay applied for the life of the process.
+    """
+
+    def __init__(self, checks: dict, latched=()):
+        self.checks = checks
+        self.latched = set(latched)
+        self._passed = {}
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._passed.clear()
+            self._result = None
+
+    def result(self) -> dict:
+        interval = settings.HEALTH_READINESS_INTERVAL
+        with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= interval:
+                self._result = self.run()
+                self._checked_at = time.monotonic()
+            return self._result
+
+    def run(self) -> dict:
+        results = {}
+        for name, check in self.checks.items():
+            if name in self._passed:
+                results[name] = self._passed[name]
+                continue
+            start = time.perf_counter()
+            try:
+                check()
+                results[name] = {"ok": True}
+            except Exception as e:
+                results[name] = {"ok": False, "error": str(e)}
+            results[name]["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            if name in self.latched and results[name]["ok"]:
+                self._passed[name] = results[name]
+        return {
+            "ok": all(result["ok"] for result in results.values()),
+            "checked_at": timezone.now().isoformat(),
+            "checks": results,
+        }
+
+
+readiness_probe = ReadinessProbe(
+    {
+        "database": check_database,
+        "migrations": check_migrations,
+        "cache": check_caches,
+    },
+    latched=["migrations"],
+)
@@ -0,0 +1,132 @@
+import bisect
+import threading
+from collections import defaultdict
+
+# Upper bounds of the histogram buckets, +Inf is implied.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """A Prometheus histogram aggregated in process, one series per label set.
+
+    Observing takes a lock and a binary search over the buckets, cheap
+    enough to record several values on every request.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * (len(buckets) + 1), 0.0])
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: tuple, value: float):
+        with self._lock:
+            series = self._series[label_values]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> dict:
+        with self._lock:
+            return {
+                labels: (list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            }
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self.samples().items()):
+            labels = format_labels(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                bucket_labels = format_labels(
+                    [*zip(self.labels, label_values), ("le", bound)]
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def format_labels(pairs) -> str:
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LABELS = ("view", "method")
+
+request_duration = Histogram(
+    "vending_request_duration_seconds",
+    "Wall time spent handling a request.",
+    REQUEST_LABELS,
+    DURATION_BUCKETS,
+)
+request_db_queries = Histogram(
+    "vending_request_db_queries",
+    "Database queries made by a request.",
+    REQUEST_LABELS,
+    QUERY_BUCKETS,
+)
+request_db_duration = Histogram(
+    "vending_request_db_duration_seconds",
+    "Time a request spent waiting on database queries.",
+    REQUEST_LABELS,
+    DURATION_BUCKETS,
+)
+request_render_duration = Histogram(
+    "vending_request_render_duration_seconds",
+    "Time spent serializing a response body.",
+    REQUEST_LABELS,
+    DURATION_BUCKETS,
+)
+response_size = Histogram(
+    "vending_response_size_bytes",
+    "Size of response bodies, streamed responses excluded.",
+    REQUEST_LABELS,
+    SIZE_BUCKETS,
+)
+
+HISTOGRAMS = [
+    request_duration,
+    request_db_queries,
+    request_db_duration,
+    request_render_duration,
+    response_size,
+]
+
+# Callables returning extra exposition lines, such as counters kept by
+# other apps.
+collectors = []
+
+
+def register_collector(collector):
+    if collector not in collectors:
+        collectors.append(collector)
+
+
+def counter_lines(name: str, help: str, values: dict) -> list[str]:
+    """Exposition lines of a counter with one series per `kind` label."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    for kind, value in sorted(values.items()):
+        lines.append(f"{name}{format_labels([('kind', kind)])} {value}")
+    return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for collector in collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
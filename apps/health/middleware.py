@@ -0,0 +1,108 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from apps.health import metrics
+
+_current_request = ContextVar("vending_request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "render_start", "render_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_start = None
+        self.render_time = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper timing the queries of the request being measured.
+
+    It is installed once on every connection, see `install_query_recorder`,
+    rather than per request, so that it also sees the queries async views
+    run on the ORM's worker thread. Queries made outside of a request only
+    pay for the context variable lookup.
+    """
+    request_metrics = _current_request.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.db_time += time.perf_counter() - start
+        request_metrics.queries += 1
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class PerformanceMiddleware:
+    """Records wall time, queries, DB time, render time and size per view.
+
+    Values are aggregated into the in-process histograms of
+    `apps.health.metrics` and served by the `/metrics` endpoint.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics = RequestMetrics()
+        token = _current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        self.record(request, response, request_metrics, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        token = _current_request.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        self.record(request, response, request_metrics, time.perf_counter() - start)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after the template response
+        # middleware have run, the post render callback marks the end.
+        request_metrics = _current_request.get()
+        if request_metrics is not None:
+            request_metrics.render_start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: self.end_render(request_metrics)
+            )
+        return response
+
+    @staticmethod
+    def end_render(request_metrics: RequestMetrics):
+        request_metrics.render_time = time.perf_counter() - request_metrics.render_start
+
+    @staticmethod
+    def record(request, response, request_metrics: RequestMetrics, duration: float):
+        match = request.resolver_match
+        labels = (match.view_name if match else "unmatched", request.method)
+        metrics.request_duration.observe(labels, duration)
+        metrics.request_db_queries.observe(labels, request_metrics.queries)
+        metrics.request_db_duration.observe(labels, request_metrics.db_time)
+        metrics.request_render_duration.observe(labels, request_metrics.render_time)
+        if not response.streaming:
+            metrics.response_size.observe(labels, len(response.content))
@@ -1,4 +1,157 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.health import metrics
+from apps.health.checks import ReadinessProbe, readiness_probe
+
+
 def test_healthcheck_ok(client):
     response = client.get("/healthcheck/")
     assert response.status_code == 200
     assert response.content == b"OK"
+
+
+@pytest.fixture
+def histograms():
+    for histogram in metrics.HISTOGRAMS:
+        histogram.clear()
+    yield metrics
+    for histogram in metrics.HISTOGRAMS:
+        histogram.clear()
+
+
+def sample(histogram, view, method="GET"):
+    return histogram.samples()[(view, method)]
+
+
+def test_middleware_records_request_timing(client, histograms):
+    client.get("/healthcheck/")
+
+    counts, total = sample(histograms.request_duration, "apps.health.views.healthcheck")
+    assert sum(counts) == 1
+    assert total > 0
+    size_counts, size = sample(
+        histograms.response_size, "apps.health.views.healthcheck"
+    )
+    assert size == len(b"OK")
+
+
+@pytest.mark.django_db
+def test_middleware_records_queries_and_render_time(client, histograms):
+    view = "apps.vending.views.VendingMachineSlotView"
+
+    client.get("/slots/")
+
+    query_counts, queries = sample(histograms.request_db_queries, view)
+    assert queries == 1
+    db_counts, db_time = sample(histograms.request_db_duration, view)
+    assert db_time > 0
+    render_counts, render_time = sample(histograms.request_render_duration, view)
+    assert render_time > 0
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client, histograms):
+    client.get("/healthcheck/")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.content.decode()
+    assert "# TYPE vending_request_duration_seconds histogram" in body
+    assert (
+        'vending_request_duration_seconds_count{view="apps.health.views.healthcheck",'
+        'method="GET"} 1'
+    ) in body
+    assert (
+        'vending_request_db_queries_bucket{view="apps.health.views.healthcheck",'
+        'method="GET",le="+Inf"} 1'
+    ) in body
+    assert 'vending_idempotency_keys_total{kind="hits"} 0' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("view",), (0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(("a",), value)
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{view="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{view="a",le="1"} 3' in lines
+    assert 'test_seconds_bucket{view="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{view="a"} 4' in lines
+
+
+@pytest.fixture
+def probe():
+    readiness_probe.clear()
+    yield readiness_probe
+    readiness_probe.clear()
+
+
+def test_liveness_does_not_touch_the_database(client):
+    # No django_db mark: any query would fail the test.
+    response = client.get("/healthcheck/live/")
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_readiness_reports_each_check(client, probe):
+    response = client.get("/healthcheck/ready/")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ok"] is True
+    assert set(body["checks"]) == {"database", "migrations", "cache"}
+    for check in body["checks"].values():
+        assert check["ok"] is True
+        assert check["latency_ms"] >= 0
+
+
+@pytest.mark.django_db
+def test_readiness_result_is_reused_within_the_interval(client, probe, settings):
+    settings.HEALTH_READINESS_INTERVAL = 60
+    first = client.get("/healthcheck/ready/").json()
+
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get("/healthcheck/ready/").json()
+
+    assert len(queries) == 0
+    assert second["checked_at"] == first["checked_at"]
+
+
+@pytest.mark.django_db
+def test_readiness_fails_when_a_check_fails(client, probe, settings, monkeypatch):
+    settings.HEALTH_READINESS_INTERVAL = 0
+
+    def unreachable():
+        raise ConnectionError("cache is unreachable")
+
+    monkeypatch.setitem(probe.checks, "cache", unreachable)
+
+    response = client.get("/healthcheck/ready/")
+
+    assert response.status_code == 503
+    body = response.json()
+    assert body["ok"] is False
+    assert body["checks"]["cache"]["error"] == "cache is unreachable"
+    assert body["checks"]["database"]["ok"] is True
+
+
+def test_latched_checks_stop_running_once_they_pass(settings):
+    settings.HEALTH_READINESS_INTERVAL = 0
+    calls = []
+    probe = ReadinessProbe(
+        {
+            "once": lambda: calls.append("once"),
+            "always": lambda: calls.append("always"),
+        },
+        latched=["once"],
+    )
+
+    probe.result()
+    probe.result()
+
+    assert calls == ["once", "always", "always"]
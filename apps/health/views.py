@@ -1,5 +1,23 @@
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+
+from apps.health.checks import readiness_probe
+from apps.health.metrics import render_metrics
 
 
 def healthcheck(request):
     return HttpResponse("OK")
+
+
+async def async_healthcheck(request):
+    return HttpResponse("OK")
+
+
+def readiness(request):
+    result = readiness_probe.result()
+    return JsonResponse(result, status=200 if result["ok"] else 503)
+
+
+def metrics(request):
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,10 +1,36 @@
 from django.contrib import admin
-from apps.vending.models import Product, VendingMachineSlot, User, Order
+from apps.vending.journal import flush_order_journal
+from apps.vending.models import (
+    CreditTransaction,
+    Product,
+    VendingMachineSlot,
+    User,
+    Order,
+    SalesRollup,
+)
 
 
-class UserAdmin(admin.ModelAdmin):
+class FlushOrderJournalMixin:
+    """Commits journaled orders before a form is saved, or they would be
+    taken off the stock or credit it sets once they are committed.
+
+    Done here rather than in `save_model`, which runs in the form's
+    transaction.
+    """
+
+    def changeform_view(self, request, *args, **kwargs):
+        if request.method == "POST":
+            flush_order_journal()
+        return super().changeform_view(request, *args, **kwargs)
+
+
+class UserAdmin(FlushOrderJournalMixin, admin.ModelAdmin):
     list_display = ["username", "id", "credit"]
 
+    def get_readonly_fields(self, request, obj=None):
+        # Credit changes through the credit endpoints, which record them.
+        return ["credit"] if obj else []
+
 
 admin.site.register(User, UserAdmin)
 
@@ -17,8 +43,13 @@ class ProductAdmin(admin.ModelAdmin):
 admin.site.register(Product, ProductAdmin)
 
 
-class SlotAdmin(admin.ModelAdmin):
-    list_display = ["product", "quantity", "row", "column"]
+class SlotAdmin(FlushOrderJournalMixin, admin.ModelAdmin):
+    list_display = ["product", "quantity", "low_stock_threshold", "row", "column"]
+
+    def get_readonly_fields(self, request, obj=None):
+        # Caches, the change log and slot events file a slot under the
+        # machine it was added to, so it never moves.
+        return ["machine"] if obj else []
 
 
 admin.site.register(VendingMachineSlot, SlotAdmin)
@@ -30,3 +61,28 @@ class OrderAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Order, OrderAdmin)
+
+
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ["hour", "product", "slot", "units", "revenue"]
+    ordering = ["-hour"]
+
+
+admin.site.register(SalesRollup, SalesRollupAdmin)
+
+
+class CreditTransactionAdmin(admin.ModelAdmin):
+    list_display = ["user", "kind", "amount", "order", "created_at"]
+    ordering = ["-created_at"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(CreditTransaction, CreditTransactionAdmin)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class VendingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.vending"
+
+    def ready(self):
+        import apps.vending.db  # noqa: F401
+        import apps.vending.signals  # noqa: F401
+        from apps.health.metrics import register_collector
+        from apps.vending.idempotency import idempotency_metrics
+
+        register_collector(idempotency_metrics)
@@ -0,0 +1,216 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from apps.vending.auth import issue_token
+from apps.vending.cache import (
+    aget_inventory_version,
+    aget_slot_listing,
+    aget_user_login,
+    aset_slot_listing,
+    slot_listing_etag,
+)
+from apps.vending.changes import slot_changes
+from apps.vending.events import encode_event, get_slot_event_hub
+from apps.vending.expections import SlotChangesPrunedException
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.pagination import KeysetPaginator
+from apps.vending.serializers import (
+    FastUserSerializer,
+    FastVendingMachineSlotSerializer,
+)
+from apps.vending.validators import (
+    AuthValidator,
+    ListSlotsValidator,
+    SlotEventsValidator,
+)
+
+# Native async counterparts of the hot read endpoints in `views.py`. DRF's
+# APIView is sync only, so these are plain Django views that answer with
+# the same payloads through the fast serializers and the async ORM.
+
+
+def request_data(request: HttpRequest):
+    if request.content_type == "application/json":
+        return json.loads(request.body or b"{}")
+    return request.POST
+
+
+class AsyncAuthView(View):
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Exempt like DRF's APIView. csrf_exempt() would hide that the view
+        # is async on Django 4.2, so set the flag directly.
+        view.csrf_exempt = True
+        return view
+
+    async def post(self, request: HttpRequest) -> HttpResponse:
+        validator = AuthValidator(data=request_data(request))
+        if not validator.is_valid():
+            return JsonResponse(validator.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        username = validator.validated_data["username"]
+        login = await aget_user_login(username)
+        if login is None:
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+        user_id, credit = login
+        user = User(id=user_id, username=username, credit=credit)
+        return JsonResponse(
+            {**FastUserSerializer(user).data, "token": issue_token(user_id, username)}
+        )
+
+
+class AsyncVendingMachineSlotView(View):
+    paginator = KeysetPaginator(ordering=("row", "column", "id"))
+    page_size = 100
+    stream_chunk_size = 2000
+
+    async def get(self, request: HttpRequest, machine_id=None) -> HttpResponse:
+        validator = ListSlotsValidator(data=request.GET)
+        if not validator.is_valid():
+            return JsonResponse(validator.errors, status=status.HTTP_400_BAD_REQUEST)
+        quantity = validator.validated_data["quantity"] or None
+
+        if validator.validated_data["stream"]:
+            return self.stream_slots(quantity, machine_id)
+        if validator.validated_data["limit"] or validator.validated_data["cursor"]:
+            try:
+                return await self.paginate_slots(
+                    quantity,
+                    validator.validated_data["cursor"],
+                    validator.validated_data["limit"] or self.page_size,
+                    machine_id,
+                )
+            except ValidationError as e:
+                return JsonResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        version = await aget_inventory_version(machine_id)
+        etag = slot_listing_etag(version, quantity)
+        if etag in request.headers.get("If-None-Match", ""):
+            return HttpResponse(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        data = await aget_slot_listing(version, quantity, machine_id)
+        if data is None:
+            data = await self.list_slots(quantity, machine_id)
+            await aset_slot_listing(version, quantity, data, machine_id)
+        return JsonResponse(data, safe=False, headers={"ETag": etag})
+
+    def get_queryset(self, quantity, machine_id=None):
+        filters = {}
+        if machine_id:
+            filters["machine_id"] = machine_id
+        if quantity:
+            filters["quantity__lte"] = quantity
+
+        return VendingMachineSlot.objects.filter(**filters)
+
+    async def list_slots(self, quantity, machine_id=None):
+        slots = self.get_queryset(quantity, machine_id).order_by("row", "column")
+        return await FastVendingMachineSlotSerializer(slots, many=True).adata()
+
+    async def paginate_slots(self, quantity, cursor, limit, machine_id=None):
+        slots, next_cursor = await self.paginator.apaginate(
+            self.get_queryset(quantity, machine_id).select_related("product"),
+            cursor,
+            limit,
+        )
+        results = FastVendingMachineSlotSerializer(slots, many=True).data
+        return JsonResponse({"results": results, "next": next_cursor})
+
+    def stream_slots(self, quantity, machine_id=None) -> StreamingHttpResponse:
+        slots = self.get_queryset(quantity, machine_id).order_by(
+            *self.paginator.ordering
+        )
+        slots_serializer = FastVendingMachineSlotSerializer(slots, many=True)
+        return StreamingHttpResponse(
+            slots_serializer.astream(chunk_size=self.stream_chunk_size),
+            content_type="application/json",
+        )
+
+
+class AsyncSlotEventsView(View):
+    """Streams slot changes as server-sent events, needs ASGI.
+
+    Every event is a slot in the listing's shape, or the id of a deleted
+    slot, with the change sequence as event id. A client reconnecting with
+    `Last-Event-ID` first gets the slots changed since, from the change
+    log, or a `reset` event when that history was pruned and it must
+    reload the listing.
+    """
+
+    replay_page_size = 500
+
+    async def get(self, request: HttpRequest, machine_id=None) -> HttpResponse:
+        data = request.GET.dict()
+        if "Last-Event-ID" in request.headers:
+            data["last_event_id"] = request.headers["Last-Event-ID"]
+        validator = SlotEventsValidator(data=data)
+        if not validator.is_valid():
+            return JsonResponse(validator.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        return StreamingHttpResponse(
+            self.stream(
+                machine_id or validator.validated_data["machine_id"],
+                validator.validated_data["last_event_id"],
+            ),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def stream(self, machine_id, last_event_id):
+        hub = get_slot_event_hub()
+        # Subscribed before replaying, so no change falls in between.
+        subscription = hub.subscribe(machine_id)
+        try:
+            yield b": connected\n\n"
+            if last_event_id is not None:
+                async for event in self.replay(subscription, last_event_id):
+                    yield event
+
+            loop = asyncio.get_running_loop()
+            closes_at = loop.time() + settings.VENDING_SLOT_EVENT_MAX_AGE
+            while not subscription.done:
+                timeout = min(
+                    settings.VENDING_SLOT_EVENT_KEEPALIVE, closes_at - loop.time()
+                )
+                if timeout <= 0:
+                    break
+                item = await subscription.get(timeout)
+                if item is None:
+                    yield b": keepalive\n\n"
+                elif item[0] > subscription.after:
+                    yield item[1]
+        finally:
+            hub.unsubscribe(subscription)
+
+    async def replay(self, subscription, since: int):
+        while True:
+            try:
+                page = await sync_to_async(slot_changes)(
+                    since, self.replay_page_size, subscription.machine_id
+                )
+            except SlotChangesPrunedException as e:
+                yield encode_event("reset", {"error": str(e)})
+                return
+            for slot in page["slots"]:
+                yield encode_event("slot", slot, page["next"])
+            for slot_id in page["deleted"]:
+                yield encode_event("deleted", {"id": slot_id}, page["next"])
+            subscription.after = since = page["next"]
+            if not page["more"]:
+                return
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core import signing
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+TOKEN_SALT = "vending.auth.token"
+
+
+def issue_token(user_id, username: str) -> str:
+    """Signs the caller's identity so later requests need no lookup."""
+    return signing.dumps({"id": str(user_id), "username": username}, salt=TOKEN_SALT)
+
+
+def read_token(token: str) -> dict | None:
+    """Returns the identity in `token`, or None if forged or expired."""
+    try:
+        return signing.loads(
+            token, salt=TOKEN_SALT, max_age=settings.VENDING_AUTH_TOKEN_MAX_AGE
+        )
+    except signing.BadSignature:
+        return None
+
+
+class TokenUser:
+    """The caller identified by a token, without loading the `User` row."""
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id: str, username: str):
+        self.id = id
+        self.username = username
+
+
+class TokenAuthentication(BaseAuthentication):
+    """Authenticates `Authorization: Bearer <token>` headers from the login."""
+
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword:
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed("Invalid token header.")
+
+        identity = read_token(header[1].decode("latin-1"))
+        if identity is None:
+            raise AuthenticationFailed("Invalid or expired token.")
+        return TokenUser(**identity), header[1]
+
+    def authenticate_header(self, request) -> str:
+        return "Bearer"
@@ -0,0 +1,354 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from apps.vending.expections import AmbiguousSlotException
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.serializers import FastVendingMachineSlotSerializer
+
+INVENTORY_VERSION_KEY = "vending:inventory:version"
+
+
+def get_cache():
+    """Returns the cache holding inventory data.
+
+    Local memory by default, a shared backend such as Redis when
+    `VENDING_CACHE_ALIAS` points at one, so that every worker process sees
+    the same version.
+    """
+    return caches[settings.VENDING_CACHE_ALIAS]
+
+
+def inventory_version_key(machine_id=None) -> str:
+    """The fleet-wide version, or the version of a single machine.
+
+    Each machine has its own version so that orders on one machine do not
+    invalidate the cached listings of all the others.
+    """
+    if machine_id is None:
+        return INVENTORY_VERSION_KEY
+    return f"{INVENTORY_VERSION_KEY}:{machine_id}"
+
+
+def get_inventory_version(machine_id=None) -> int:
+    cache = get_cache()
+    key = inventory_version_key(machine_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1 so that an evicted version never
+        # comes back with a number an old cache entry was stored under.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_inventory_version(machine_id=None) -> int:
+    cache = get_cache()
+    key = inventory_version_key(machine_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_inventory_version(machine_ids=()):
+    """Invalidates the fleet-wide catalogue and that of `machine_ids`.
+
+    The versions are bumped right away and once more when the surrounding
+    transaction commits, so a reader that caches the pre-commit state in
+    between is invalidated too.
+    """
+    keys = [INVENTORY_VERSION_KEY]
+    keys.extend(inventory_version_key(machine_id) for machine_id in machine_ids)
+    _incr_inventory_versions(keys)
+    transaction.on_commit(lambda: _incr_inventory_versions(keys))
+
+
+def _incr_inventory_versions(keys: list[str]):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def slot_machine_key(slot_id) -> str:
+    return f"vending:slot:{slot_id}:machine"
+
+
+def remember_slot_machine(slot_id, machine_id):
+    get_cache().set(slot_machine_key(slot_id), machine_id, timeout=None)
+
+
+def slot_machines(slot_ids) -> dict:
+    """Maps `slot_ids` to the machines holding them.
+
+    A slot never moves to another machine, the admin does not let it, so
+    the mapping is cached without expiry and the database is only asked
+    about slots never seen before.
+    """
+    cache = get_cache()
+    keys = {slot_machine_key(slot_id): slot_id for slot_id in slot_ids}
+    cached = cache.get_many(keys)
+    missing = [slot_id for key, slot_id in keys.items() if key not in cached]
+    if missing:
+        found = {
+            slot_machine_key(slot_id): machine_id
+            for slot_id, machine_id in VendingMachineSlot.objects.filter(
+                id__in=missing
+            ).values_list("id", "machine_id")
+        }
+        cache.set_many(found, timeout=None)
+        cached.update(found)
+    return {keys[key]: machine_id for key, machine_id in cached.items()}
+
+
+def slot_machine_ids(slot_ids) -> set:
+    """Returns the machines holding `slot_ids`."""
+    return set(slot_machines(slot_ids).values())
+
+
+def slot_detail_key(slot_id) -> str:
+    return f"vending:slot:{slot_id}:detail"
+
+
+def slot_position_key(column: int, row: int, machine_id=None) -> str:
+    return f"vending:slot-at:{machine_id or 'all'}:{column}:{row}"
+
+
+def _slot_entries(queryset, limit: int = 1) -> list[tuple]:
+    """Reads up to `limit` `(machine_id, serialized slot)` pairs."""
+    serializer = FastVendingMachineSlotSerializer(queryset)
+    rows = queryset.values_list("machine_id", *serializer.fields)[:limit]
+    return [
+        (str(machine_id), serializer.to_representation(row))
+        for machine_id, *row in rows
+    ]
+
+
+def _cache_slot_entry(entry: tuple):
+    get_cache().set(
+        slot_detail_key(entry[1]["id"]),
+        entry,
+        timeout=settings.VENDING_CATALOGUE_CACHE_TIMEOUT,
+    )
+
+
+def get_slot(slot_id):
+    """Returns the `(machine_id, serialized slot)` of `slot_id`, or None.
+
+    Every change to the slot or its product invalidates the entry, so a
+    kiosk refreshing a single button does not read the whole listing.
+    """
+    entry = get_cache().get(slot_detail_key(slot_id))
+    if entry is None:
+        entries = _slot_entries(VendingMachineSlot.objects.filter(id=slot_id))
+        if not entries:
+            return None
+        entry = entries[0]
+        _cache_slot_entry(entry)
+    return entry
+
+
+def get_slot_at(column: int, row: int, machine_id=None):
+    """Returns the `(machine_id, serialized slot)` at a position, or None.
+
+    Positions are resolved to slot ids through a cache entry that is only
+    trusted when the slot it points at is still there, so slots moved or
+    deleted need no invalidation. Without a machine, the position must be
+    held by a single slot of the fleet.
+    """
+    cache = get_cache()
+    position_key = slot_position_key(column, row, machine_id)
+    slot_id = cache.get(position_key)
+    if slot_id is not None:
+        entry = get_slot(slot_id)
+        if entry is not None and _is_at(entry, column, row, machine_id):
+            return entry
+
+    filters = {"column": column, "row": row}
+    if machine_id:
+        filters["machine_id"] = machine_id
+    entries = _slot_entries(VendingMachineSlot.objects.filter(**filters), limit=2)
+    if len(entries) > 1:
+        raise AmbiguousSlotException()
+    if not entries:
+        return None
+    entry = entries[0]
+    _cache_slot_entry(entry)
+    cache.set(position_key, entry[1]["id"], timeout=None)
+    return entry
+
+
+def _is_at(entry: tuple, column: int, row: int, machine_id=None) -> bool:
+    entry_machine_id, slot = entry
+    if machine_id and entry_machine_id != str(machine_id):
+        return False
+    return slot["coordinates"] == [column, row]
+
+
+def invalidate_slots(slot_ids):
+    """Drops the cached details of `slot_ids`, now and once more on commit."""
+    keys = [slot_detail_key(slot_id) for slot_id in slot_ids]
+    get_cache().delete_many(keys)
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def invalidate_slot_positions(positions):
+    """Forgets which slot holds each `(column, row)` fleet-wide.
+
+    Needed when a slot is created there: the position may no longer be
+    held by a single machine.
+    """
+    keys = [slot_position_key(column, row) for column, row in positions]
+    get_cache().delete_many(keys)
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def slot_listing_key(version: int, quantity, machine_id=None) -> str:
+    return f"vending:slots:{machine_id or 'all'}:{version}:{quantity}"
+
+
+def slot_listing_etag(version: int, quantity) -> str:
+    return f'"{version}-{quantity}"'
+
+
+def get_slot_listing(version: int, quantity, machine_id=None):
+    return get_cache().get(slot_listing_key(version, quantity, machine_id))
+
+
+def set_slot_listing(version: int, quantity, data, machine_id=None):
+    get_cache().set(
+        slot_listing_key(version, quantity, machine_id),
+        data,
+        timeout=settings.VENDING_CATALOGUE_CACHE_TIMEOUT,
+    )
+
+
+async def aget_slot_listing(version: int, quantity, machine_id=None):
+    return await get_cache().aget(slot_listing_key(version, quantity, machine_id))
+
+
+async def aset_slot_listing(version: int, quantity, data, machine_id=None):
+    await get_cache().aset(
+        slot_listing_key(version, quantity, machine_id),
+        data,
+        timeout=settings.VENDING_CATALOGUE_CACHE_TIMEOUT,
+    )
+
+
+def user_credit_key(user_id) -> str:
+    return f"vending:user:{user_id}:credit"
+
+
+def username_key(username: str) -> str:
+    # Usernames may hold characters that are not valid in cache keys.
+    digest = hashlib.sha1(username.encode()).hexdigest()
+    return f"vending:username:{digest}"
+
+
+def get_user_credit(user_id):
+    """Returns the credit of `user_id`, or None if the user does not exist.
+
+    Credit changes invalidate the entry, and its timeout is kept short
+    because a read racing a write can still store the old balance.
+    """
+    cache = get_cache()
+    credit = cache.get(user_credit_key(user_id))
+    if credit is None:
+        credit = (
+            User.objects.filter(id=user_id).values_list("credit", flat=True).first()
+        )
+        if credit is not None:
+            cache.set(
+                user_credit_key(user_id),
+                credit,
+                timeout=settings.VENDING_CREDIT_CACHE_TIMEOUT,
+            )
+    return credit
+
+
+async def aget_user_credit(user_id):
+    cache = get_cache()
+    credit = await cache.aget(user_credit_key(user_id))
+    if credit is None:
+        credit = (
+            await User.objects.filter(id=user_id)
+            .values_list("credit", flat=True)
+            .afirst()
+        )
+        if credit is not None:
+            await cache.aset(
+                user_credit_key(user_id),
+                credit,
+                timeout=settings.VENDING_CREDIT_CACHE_TIMEOUT,
+            )
+    return credit
+
+
+def get_user_login(username: str):
+    """Returns the `(id, credit)` of `username`, or None if it does not exist.
+
+    A warm login reads both from the cache. A cold one reads them with a
+    single query and caches them for the next login and credit read.
+    """
+    cache = get_cache()
+    user_id = cache.get(username_key(username))
+    if user_id is not None:
+        credit = get_user_credit(user_id)
+        if credit is not None:
+            return user_id, credit
+
+    row = User.objects.filter(username=username).values_list("id", "credit").first()
+    if row is None:
+        cache.delete(username_key(username))
+        return None
+    for key, value, timeout in _user_login_entries(username, *row):
+        cache.set(key, value, timeout=timeout)
+    return row
+
+
+async def aget_user_login(username: str):
+    cache = get_cache()
+    user_id = await cache.aget(username_key(username))
+    if user_id is not None:
+        credit = await aget_user_credit(user_id)
+        if credit is not None:
+            return user_id, credit
+
+    row = (
+        await User.objects.filter(username=username)
+        .values_list("id", "credit")
+        .afirst()
+    )
+    if row is None:
+        await cache.adelete(username_key(username))
+        return None
+    for key, value, timeout in _user_login_entries(username, *row):
+        await cache.aset(key, value, timeout=timeout)
+    return row
+
+
+def _user_login_entries(username: str, user_id, credit):
+    return [
+        (username_key(username), user_id, settings.VENDING_USERNAME_CACHE_TIMEOUT),
+        (user_credit_key(user_id), credit, settings.VENDING_CREDIT_CACHE_TIMEOUT),
+    ]
+
+
+def invalidate_user_credit(user_id):
+    """Drops the cached credit of `user_id`, now and once more on commit."""
+    key = user_credit_key(user_id)
+    get_cache().delete(key)
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+def invalidate_user_login(user_id, username: str):
+    """Forgets everything cached to log `username` in."""
+    get_cache().delete(username_key(username))
+    invalidate_user_credit(user_id)
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from django.db.models import Max, Min
+
+from apps.vending.events import publish_slot_changes
+from apps.vending.expections import SlotChangesPrunedException
+from apps.vending.models import SlotChange, VendingMachineSlot
+from apps.vending.serializers import FastVendingMachineSlotSerializer
+
+
+def record_slot_changes(slots: dict):
+    """Appends a change of every `{slot_id: machine_id}` to the log.
+
+    One INSERT however many slots changed, made in the transaction of the
+    change itself so that a rolled back change is not logged. The changes
+    are streamed to event subscribers once committed. Slots cannot move to
+    another machine, so all the changes of a slot are under one machine.
+    """
+    changes = SlotChange.objects.bulk_create(
+        SlotChange(slot_id=slot_id, machine_id=machine_id)
+        for slot_id, machine_id in slots.items()
+    )
+    publish_slot_changes(changes)
+
+
+def slot_changes(since: int | None, limit: int, machine_id=None) -> dict:
+    """Returns the slots changed after change `since`, and the deleted ones.
+
+    Up to `limit` changes are read from the primary key, or the machine
+    index, and the slots they name are then read by id: the cost grows
+    with the number of changes, not with the fleet. `next` is the change to
+    ask from on the next call, `more` tells whether changes were left out.
+    Without `since`, only `next` is returned, for clients about to load
+    the full listing.
+
+    Changes are numbered as they are written, which SQLite does one
+    transaction at a time, so a change never shows up behind one already
+    returned.
+    """
+    bounds = SlotChange.objects.aggregate(oldest=Min("id"), latest=Max("id"))
+    latest = bounds["latest"] or 0
+    result = {"since": since, "next": latest, "more": False, "slots": [], "deleted": []}
+    if since is None:
+        return result
+    if since > latest or (
+        bounds["oldest"] is not None and since < bounds["oldest"] - 1
+    ):
+        raise SlotChangesPrunedException()
+
+    changes = SlotChange.objects.filter(id__gt=since)
+    if machine_id:
+        changes = changes.filter(machine_id=machine_id)
+    page = list(changes.order_by("id").values_list("id", "slot_id")[:limit])
+    if not page:
+        return result
+
+    slot_ids = dict.fromkeys(slot_id for _, slot_id in page)
+    slots = FastVendingMachineSlotSerializer(
+        VendingMachineSlot.objects.filter(id__in=slot_ids).order_by(
+            "row", "column", "id"
+        ),
+        many=True,
+    ).data
+    found = {slot["id"] for slot in slots}
+    result["more"] = len(page) == limit
+    result["next"] = page[-1][0] if result["more"] else max(latest, page[-1][0])
+    result["slots"] = slots
+    result["deleted"] = [
+        str(slot_id) for slot_id in slot_ids if str(slot_id) not in found
+    ]
+    return result
+
+
+def prune_slot_changes(before: datetime) -> int:
+    """Deletes the changes logged before `before`, returns how many.
+
+    The latest change is always kept: the oldest change left tells clients
+    whether their history is complete.
+    """
+    latest = SlotChange.objects.aggregate(latest=Max("id"))["latest"]
+    if latest is None:
+        return 0
+    deleted, _ = SlotChange.objects.filter(
+        created_at__lt=before, id__lt=latest
+    ).delete()
+    return deleted
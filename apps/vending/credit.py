@@ -0,0 +1,155 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+from apps.vending.cache import invalidate_user_credit
+from apps.vending.expections import CreditLimitException, NotEnoughCreditException
+from apps.vending.journal import flush_order_journal, forget_ledger
+from apps.vending.models import CreditTransaction, User
+from apps.vending.purchases import retry_on_lock
+from apps.vending.utils import batched
+
+# The largest balance `User.credit` can hold.
+CREDIT_LIMIT = Decimal("9999.99")
+
+
+@retry_on_lock
+def top_up(user_id, amount: Decimal) -> Decimal:
+    """Adds `amount` to the credit of `user_id`, returns the new balance.
+
+    The balance is incremented in place, never overwritten, so that top-ups
+    and purchases made at the same time all count. Journaled debits land
+    first, for the credit limit to be checked against the real balance.
+    """
+    flush_order_journal()
+    with transaction.atomic():
+        updated = User.objects.filter(
+            id=user_id, credit__lte=CREDIT_LIMIT - amount
+        ).update(credit=Round(F("credit") + amount, 2))
+        if not updated:
+            User.objects.get(id=user_id)
+            raise CreditLimitException()
+        return _record(user_id, CreditTransaction.Kind.TOP_UP, amount)
+
+
+@retry_on_lock
+def debit(user_id, amount: Decimal) -> Decimal:
+    """Takes `amount` from the credit of `user_id`, returns the new balance.
+
+    Like purchases, the UPDATE checks the balance covers the debit itself,
+    once journaled debits have landed, so the two cannot overdraw it
+    together. Must be called outside of any transaction.
+    """
+    flush_order_journal()
+    with transaction.atomic():
+        updated = User.objects.filter(id=user_id, credit__gte=amount).update(
+            credit=Round(F("credit") - amount, 2)
+        )
+        if not updated:
+            User.objects.get(id=user_id)
+            raise NotEnoughCreditException()
+        return _record(user_id, CreditTransaction.Kind.DEBIT, -amount)
+
+
+@retry_on_lock
+def set_credit(user_id, credit: Decimal):
+    """Overwrites the credit of `user_id`, recording the difference.
+
+    Journaled debits must land before the balance is overwritten, so this
+    must be called outside of any transaction.
+    """
+    flush_order_journal()
+    with transaction.atomic():
+        previous = (
+            User.objects.select_for_update()
+            .values_list("credit", flat=True)
+            .get(id=user_id)
+        )
+        User.objects.filter(id=user_id).update(credit=credit)
+        if credit != previous:
+            CreditTransaction.objects.create(
+                user_id=user_id,
+                kind=CreditTransaction.Kind.ADJUSTMENT,
+                amount=credit - previous,
+            )
+        invalidate_user_credit(user_id)
+        transaction.on_commit(lambda: forget_ledger(user_ids=[user_id]))
+
+
+def _record(user_id, kind: str, amount: Decimal) -> Decimal:
+    CreditTransaction.objects.create(user_id=user_id, kind=kind, amount=amount)
+    invalidate_user_credit(user_id)
+    # The order ledger loads balances again once this one is committed.
+    transaction.on_commit(lambda: forget_ledger(user_ids=[user_id]))
+    return User.objects.values_list("credit", flat=True).get(id=user_id)
+
+
+def ledger_balance():
+    """The credit each user's transactions add up to, as an expression."""
+    return Round(
+        Coalesce(
+            Subquery(
+                CreditTransaction.objects.filter(user=OuterRef("id"))
+                .values("user")
+                .annotate(total=Sum("amount"))
+                .values("total")
+            ),
+            Value(Decimal("0.00")),
+            output_field=User._meta.get_field("credit"),
+        ),
+        2,
+    )
+
+
+def credit_mismatches(batch_size: int = 10_000):
+    """Yields `(user_id, credit, ledger balance)` where they disagree.
+
+    Users are read in primary key order, `batch_size` at a time, together
+    with the transaction totals of the same key range, summed from the
+    index on `user`. Each batch is read in one transaction, for a snapshot
+    no concurrent purchase can fall in the middle of. Memory stays flat
+    however many users there are.
+    """
+    after = None
+    while True:
+        with transaction.atomic():
+            users = User.objects.order_by("id")
+            if after is not None:
+                users = users.filter(id__gt=after)
+            batch = list(users.values_list("id", "credit")[:batch_size])
+            if not batch:
+                return
+            totals = dict(
+                CreditTransaction.objects.filter(
+                    user_id__gte=batch[0][0], user_id__lte=batch[-1][0]
+                )
+                .values("user_id")
+                # SQLite sums decimals as floating point.
+                .annotate(total=Round(Sum("amount"), 2))
+                .order_by()
+                .values_list("user_id", "total")
+            )
+        for user_id, credit in batch:
+            balance = totals.get(user_id, Decimal("0.00"))
+            if credit != balance:
+                yield user_id, credit, balance
+        after = batch[-1][0]
+
+
+@retry_on_lock
+def reconcile_credit(user_ids: list) -> int:
+    """Sets the credit of `user_ids` to what their transactions add up to.
+
+    Each UPDATE sums the transactions of the users it writes, so a purchase
+    committed since the mismatch was found is not lost.
+    """
+    updated = 0
+    with transaction.atomic():
+        for batch in batched(user_ids, 500):
+            updated += User.objects.filter(id__in=batch).update(credit=ledger_balance())
+        for user_id in user_ids:
+            invalidate_user_credit(user_id)
+        transaction.on_commit(lambda: forget_ledger(user_ids=user_ids))
+    return updated
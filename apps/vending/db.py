@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Applies `VENDING_SQLITE_PRAGMAS` to every new SQLite connection.
+
+    Pragmas such as `synchronous` and `cache_size` only last as long as the
+    connection, which is why they are set here rather than once on the
+    database file.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.VENDING_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.vending.models import VendingMachineSlot
+from apps.vending.serializers import FastVendingMachineSlotSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(event: str, data, id=None) -> bytes:
+    """Formats one server-sent event."""
+    lines = [] if id is None else [f"id: {id}"]
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def publish_slot_changes(changes):
+    """Announces `SlotChange` rows to every subscriber, once committed."""
+    messages = [
+        (change.id, str(change.slot_id), str(change.machine_id)) for change in changes
+    ]
+    if messages:
+        transaction.on_commit(lambda: get_slot_event_hub().publish(messages))
+
+
+class Subscription:
+    """The bounded buffer of events waiting to be streamed to one client.
+
+    Events are queued on the event loop of the client. When the client
+    reads slower than slots change and the buffer fills up, the
+    subscription is cancelled: the client gets the events buffered so
+    far, then reconnects with the last id it saw and catches up from the
+    change log instead of holding memory here.
+    """
+
+    def __init__(self, machine_id, maxsize: int):
+        self.machine_id = machine_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+        # Events up to this change were already sent, by a replay.
+        self.after = 0
+
+    def offer(self, item: tuple) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    async def get(self, timeout: float):
+        """The next `(change_id, event)`, or None after `timeout` seconds."""
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        try:
+            # Unlike wait_for(), does not wrap every wait in a new task.
+            async with asyncio.timeout(timeout):
+                return await self.queue.get()
+        except TimeoutError:
+            return None
+
+    @property
+    def done(self) -> bool:
+        return self.overflowed and self.queue.empty()
+
+
+class SlotEventHub:
+    """Fans slot changes out to the subscribers of this process.
+
+    Changes come from `broker`, which tells every process of the
+    deployment. The changed slots are read and encoded once, whatever the
+    number of subscribers, and only when this process has some. Each
+    event loop is then handed its subscribers' events in one callback.
+    """
+
+    def __init__(self, broker, buffer_size: int = 100):
+        self.broker = broker
+        self.buffer_size = buffer_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        broker.start(self.dispatch)
+
+    def subscribe(self, machine_id=None) -> Subscription:
+        """Subscribes to one machine, or to the fleet. Call from the loop."""
+        subscription = Subscription(machine_id and str(machine_id), self.buffer_size)
+        with self._lock:
+            self._subscribers[subscription.machine_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.machine_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.machine_id]
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(map(len, self._subscribers.values()))
+
+    def publish(self, changes: list[tuple]):
+        """Sends `(change_id, slot_id, machine_id)` changes to every process."""
+        try:
+            self.broker.publish(changes)
+        except Exception:
+            # Streams miss the changes, reconnecting clients replay them.
+            logger.exception("Could not publish slot changes.")
+
+    def dispatch(self, changes: list[tuple]):
+        """Delivers changes from the broker to this process' subscribers."""
+        machine_ids = {machine_id for _, _, machine_id in changes}
+        with self._lock:
+            groups = [
+                (machine_id, list(subscriptions))
+                for machine_id, subscriptions in self._subscribers.items()
+                if machine_id is None or machine_id in machine_ids
+            ]
+        if not groups:
+            return
+
+        slots = {
+            slot["id"]: slot
+            for slot in FastVendingMachineSlotSerializer(
+                VendingMachineSlot.objects.filter(
+                    id__in={slot_id for _, slot_id, _ in changes}
+                ),
+                many=True,
+            ).data
+        }
+        events = []
+        for change_id, slot_id, machine_id in sorted(changes):
+            if slot_id in slots:
+                event = encode_event("slot", slots[slot_id], change_id)
+            else:
+                event = encode_event("deleted", {"id": slot_id}, change_id)
+            events.append((machine_id, (change_id, event)))
+
+        # Subscribers of a group share one list of events, per event loop.
+        deliveries = defaultdict(list)
+        for group, subscriptions in groups:
+            items = [item for machine_id, item in events if group in (None, machine_id)]
+            by_loop = defaultdict(list)
+            for subscription in subscriptions:
+                by_loop[subscription.loop].append(subscription)
+            for loop, loop_subscriptions in by_loop.items():
+                deliveries[loop].append((loop_subscriptions, items))
+
+        for loop, batches in deliveries.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, batches)
+            except RuntimeError:
+                # The loop is closed, its subscribers are gone.
+                for subscriptions, _ in batches:
+                    for subscription in subscriptions:
+                        self.unsubscribe(subscription)
+
+    def _deliver(self, batches: list[tuple]):
+        for subscriptions, items in batches:
+            for subscription in subscriptions:
+                for item in items:
+                    if not subscription.offer(item):
+                        self.unsubscribe(subscription)
+                        break
+
+
+class SlotEventBroker:
+    """Carries slot changes from the process that made them to every
+    process serving event streams.
+    """
+
+    def start(self, deliver):
+        """Calls `deliver(changes)` with the changes of every process."""
+        raise NotImplementedError
+
+    def publish(self, changes: list[tuple]):
+        raise NotImplementedError
+
+
+class LocalSlotEventBroker(SlotEventBroker):
+    """For a single process: changes are delivered in the publishing thread."""
+
+    def start(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, changes: list[tuple]):
+        self.deliver(changes)
+
+
+class RedisSlotEventBroker(SlotEventBroker):
+    """Shares changes between processes through a Redis pub/sub channel.
+
+    Each process listens from a daemon thread. Messages published while a
+    process is not listening are lost, its clients catch up from the change
+    log when they reconnect.
+    """
+
+    def __init__(self, url: str, channel: str = "vending:slot-changes"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.channel = channel
+
+    def start(self, deliver):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        def listen():
+            for message in pubsub.listen():
+                try:
+                    deliver([tuple(change) for change in json.loads(message["data"])])
+                except Exception:
+                    logger.exception("Could not deliver slot changes.")
+
+        threading.Thread(target=listen, name="slot-events", daemon=True).start()
+
+    def publish(self, changes: list[tuple]):
+        self.client.publish(self.channel, json.dumps(changes))
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_slot_event_hub() -> SlotEventHub:
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            broker = import_string(settings.VENDING_SLOT_EVENT_BROKER)
+            _hub = SlotEventHub(
+                broker(**settings.VENDING_SLOT_EVENT_BROKER_OPTIONS),
+                buffer_size=settings.VENDING_SLOT_EVENT_BUFFER_SIZE,
+            )
+        return _hub
+
+
+def reset_slot_event_hub():
+    """Drops every subscriber, and picks up changed settings on next use."""
+    global _hub
+    with _hub_lock:
+        _hub = None
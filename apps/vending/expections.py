@@ -6,3 +6,58 @@ class ProductOutOfStockException(Exception):
 class NotEnoughCreditException(Exception):
     def __init__(self, message=""):
         super().__init__("You do not have enough credit. " + message)
+
+
+class ProductNotInSlotException(Exception):
+    def __init__(self, message=""):
+        super().__init__("Product is not in this slot. " + message)
+
+
+class BatchOrderException(Exception):
+    def __init__(self, errors: list[dict]):
+        super().__init__("Some order lines cannot be fulfilled.")
+        self.errors = errors
+
+
+class StockChangedException(Exception):
+    def __init__(self, message=""):
+        super().__init__("Stock changed while ordering, please retry. " + message)
+
+
+class InvalidManifestException(Exception):
+    def __init__(self, errors: list[dict]):
+        super().__init__("Some manifest lines are invalid.")
+        self.errors = errors
+
+
+class AmbiguousSlotException(Exception):
+    def __init__(self, message=""):
+        super().__init__(
+            "Several machines have a slot at these coordinates, "
+            "pick a machine. " + message
+        )
+
+
+class SlotChangesPrunedException(Exception):
+    def __init__(self, message=""):
+        super().__init__(
+            "Changes since then are no longer kept, reload the slots. " + message
+        )
+
+
+class CreditLimitException(Exception):
+    def __init__(self, message=""):
+        super().__init__("This would take your credit over its limit. " + message)
+
+
+class OrderJournalLockedException(Exception):
+    def __init__(self, message=""):
+        super().__init__("The order journal is in use by another process. " + message)
+
+
+class SlotMovedException(Exception):
+    def __init__(self, message=""):
+        super().__init__(
+            "A slot cannot move to another machine, delete it and add a new "
+            "one. " + message
+        )
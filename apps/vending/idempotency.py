@@ -0,0 +1,241 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from apps.health.metrics import counter_lines
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# Stored while the first request with a key is still being handled.
+IN_PROGRESS = "in-progress"
+
+
+class IdempotencyStore:
+    """Remembers the response given to each idempotency key for a while.
+
+    `reserve` claims a key for the request about to be handled and fails if
+    any request already holds it. The handled request then either `save`s
+    its response for the retries to replay, or `release`s the key so they
+    run again.
+
+    Saved responses are kept for `timeout`, reservations only for
+    `reservation_timeout`: a worker killed mid-request must not lock its
+    key out for as long as a response is remembered.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 24 * 60 * 60,
+        reservation_timeout: float = 30,
+        max_size: int = 100_000,
+    ):
+        self.timeout = timeout
+        self.reservation_timeout = reservation_timeout
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        raise NotImplementedError
+
+    def reserve(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def save(self, key: str, value):
+        raise NotImplementedError
+
+    def release(self, key: str):
+        raise NotImplementedError
+
+    def count(self, value):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class LocalIdempotencyStore(IdempotencyStore):
+    """An LRU of at most `max_size` keys, each expiring after its timeout."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return self.count(entry and entry[1])
+
+    def reserve(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._set(key, IN_PROGRESS, self.reservation_timeout)
+            return True
+
+    def save(self, key: str, value):
+        with self._lock:
+            self._set(key, value, self.timeout)
+
+    def release(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _set(self, key: str, value, timeout: float):
+        self._entries[key] = (time.monotonic() + timeout, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {**super().stats(), "size": len(self._entries)}
+
+
+class CacheIdempotencyStore(IdempotencyStore):
+    """Keys kept in a Django cache shared by every worker, such as Redis.
+
+    The backend bounds and evicts the entries itself, so evictions are not
+    counted here.
+    """
+
+    def __init__(self, alias: str | None = None, **options):
+        super().__init__(**options)
+        self.alias = alias or settings.VENDING_CACHE_ALIAS
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def cache_key(self, key: str) -> str:
+        return f"vending:idempotency:{hashlib.sha1(key.encode()).hexdigest()}"
+
+    def get(self, key: str):
+        return self.count(self.cache.get(self.cache_key(key)))
+
+    def reserve(self, key: str) -> bool:
+        return self.cache.add(
+            self.cache_key(key), IN_PROGRESS, timeout=self.reservation_timeout
+        )
+
+    def save(self, key: str, value):
+        self.cache.set(self.cache_key(key), value, timeout=self.timeout)
+
+    def release(self, key: str):
+        self.cache.delete(self.cache_key(key))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            store_class = import_string(settings.VENDING_IDEMPOTENCY_STORE)
+            _store = store_class(**settings.VENDING_IDEMPOTENCY_OPTIONS)
+        return _store
+
+
+def reset_idempotency_store():
+    """Forgets every key, and picks up changed settings on next use."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def idempotency_metrics() -> list[str]:
+    stats = get_idempotency_store().stats()
+    return counter_lines(
+        "vending_idempotency_keys_total",
+        "Idempotency-Key lookups that hit or missed and keys evicted.",
+        {kind: stats[kind] for kind in ("hits", "misses", "evictions")},
+    )
+
+
+def idempotent(request: Request, user_id, payload: dict, handle) -> Response:
+    """Answers with `handle()`, only once per user and `Idempotency-Key`.
+
+    Retries with the same key get the first response back without running
+    `handle` again, which is what keeps a retried order from charging
+    twice. Server errors are not remembered, so their retries run again. A
+    key reused for a different payload, or still being handled, is
+    rejected.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return handle()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return Response(
+            status=status.HTTP_400_BAD_REQUEST,
+            data={"error": f"{IDEMPOTENCY_HEADER} must be 1 to 255 characters."},
+        )
+
+    store = get_idempotency_store()
+    scoped_key = f"{request.path}:{user_id}:{key}"
+    fingerprint = hashlib.sha1(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+    stored = store.get(scoped_key)
+    if stored is None and store.reserve(scoped_key):
+        return _handle_once(store, scoped_key, fingerprint, handle)
+    if stored is None or stored == IN_PROGRESS:
+        return Response(
+            status=status.HTTP_409_CONFLICT,
+            data={"error": "A request with this Idempotency-Key is in progress."},
+        )
+    if stored["fingerprint"] != fingerprint:
+        return Response(
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            data={"error": "Idempotency-Key was used for a different request."},
+        )
+    return Response(
+        status=stored["status"],
+        data=stored["data"],
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def _handle_once(store, scoped_key: str, fingerprint: str, handle) -> Response:
+    try:
+        response = handle()
+    except Exception:
+        store.release(scoped_key)
+        raise
+    if response.status_code >= 500:
+        store.release(scoped_key)
+    else:
+        store.save(
+            scoped_key,
+            {
+                "fingerprint": fingerprint,
+                "status": response.status_code,
+                "data": response.data,
+            },
+        )
+    return response
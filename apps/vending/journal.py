@@ -0,0 +1,611 @@
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+from uuid import UUID
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Case, ExpressionWrapper, F, When
+from django.db.models.functions import Round
+
+from apps.vending.cache import (
+    bump_inventory_version,
+    invalidate_slots,
+    invalidate_user_credit,
+    slot_machines,
+)
+from apps.vending.changes import record_slot_changes
+from apps.vending.expections import (
+    BatchOrderException,
+    NotEnoughCreditException,
+    OrderJournalLockedException,
+    ProductNotInSlotException,
+    ProductOutOfStockException,
+)
+from apps.vending.ids import new_id
+from apps.vending.models import (
+    CreditTransaction,
+    Order,
+    Product,
+    User,
+    VendingMachineSlot,
+)
+from apps.vending.purchases import retry_on_lock
+from apps.vending.reports import record_sales
+from apps.vending.stock_alerts import report_stock_levels, slot_levels_and_products
+
+logger = logging.getLogger(__name__)
+
+
+class Ledger:
+    """Stock and credit as they stand once every journaled order is applied.
+
+    Rows are loaded from the database on first use and then only changed by
+    the orders this process accepts, which makes the ledger authoritative
+    as long as a single process takes orders. Deltas journaled but not yet
+    committed are kept apart so that a row loaded in the meantime can be
+    brought up to date: ledger value = database value - pending delta.
+
+    Writes made behind the ledger's back (restocks, credit updates, admin
+    edits) must `forget` the rows they touch so they are loaded again. Those
+    made by another process cannot, so rows are also loaded again once they
+    are `max_age` seconds old.
+    """
+
+    def __init__(self, max_age: float = 1.0):
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        # Serialises loads with batch commits, so that a load never sees a
+        # committed batch whose deltas are still counted as pending.
+        self.load_lock = threading.Lock()
+        self.credit = {}
+        self.stock = {}
+        # Where each slot is and its threshold, to report its stock level.
+        self.levels = {}
+        # The product each slot holds.
+        self.slot_products = {}
+        self.products = {}
+        self.pending_credit = defaultdict(Decimal)
+        self.pending_stock = Counter()
+        # When each row was loaded, ids are UUIDs so tables do not collide.
+        self.loaded_at = {}
+
+    def load(self, user_ids=(), slot_ids=(), product_ids=()):
+        """Loads the rows that are missing or older than `max_age`.
+
+        Rows loaded again are replaced rather than dropped first, so that
+        an order checking them in the meantime still finds them.
+        """
+        loaded_after = time.monotonic() - self.max_age
+        with self.lock:
+
+            def stale(rows, id):
+                return id not in rows or self.loaded_at[id] <= loaded_after
+
+            user_ids = [id for id in user_ids if stale(self.credit, id)]
+            slot_ids = [id for id in slot_ids if stale(self.stock, id)]
+            product_ids = [id for id in product_ids if stale(self.products, id)]
+        if not (user_ids or slot_ids or product_ids):
+            return
+
+        with self.load_lock:
+            credit = User.objects.filter(id__in=user_ids).values_list("id", "credit")
+            slots, slot_products = slot_levels_and_products(
+                VendingMachineSlot.objects.filter(id__in=slot_ids)
+            )
+            products = Product.objects.in_bulk(product_ids)
+            now = time.monotonic()
+            with self.lock:
+                # Orders taken while these were read are counted as pending,
+                # and the database does not change without the load lock.
+                for user_id, value in credit:
+                    self.credit[user_id] = value - self.pending_credit[user_id]
+                    self.loaded_at[user_id] = now
+                for level in slots:
+                    slot_id = level["slot_id"]
+                    self.stock[slot_id] = (
+                        level["quantity"] - self.pending_stock[slot_id]
+                    )
+                    self.levels[slot_id] = level
+                    self.slot_products[slot_id] = slot_products[slot_id]
+                    self.loaded_at[slot_id] = now
+                for product_id, product in products.items():
+                    self.products[product_id] = product
+                    self.loaded_at[product_id] = now
+
+    def settle(self, credit: dict, stock: dict):
+        """Stops counting deltas that are now committed as pending."""
+        with self.lock:
+            self._settle(credit, stock)
+
+    def _settle(self, credit: dict, stock: dict):
+        for user_id, amount in credit.items():
+            self.pending_credit[user_id] -= amount
+            if not self.pending_credit[user_id]:
+                del self.pending_credit[user_id]
+        self.pending_stock.subtract(stock)
+        self.pending_stock = +self.pending_stock
+
+    def stock_levels(self, previous: dict) -> list[dict]:
+        """Levels of the slots reserved from `previous` quantities.
+
+        Must hold the lock.
+        """
+        return [
+            {
+                **self.levels[slot_id],
+                "quantity": self.stock[slot_id],
+                "previous": quantity,
+            }
+            for slot_id, quantity in previous.items()
+        ]
+
+    def release(self, credit: dict, stock: dict):
+        """Gives back what was reserved for orders that were not journaled."""
+        with self.lock:
+            for user_id, amount in credit.items():
+                if user_id in self.credit:
+                    self.credit[user_id] += amount
+            for slot_id, units in stock.items():
+                if slot_id in self.stock:
+                    self.stock[slot_id] += units
+            # Under the same lock, or a row loaded in between would count
+            # the released units twice.
+            self._settle(credit, stock)
+
+    def forget(self, user_ids=(), slot_ids=(), machine_ids=(), product_ids=()):
+        machine_ids = set(machine_ids)
+        with self.load_lock, self.lock:
+            for user_id in user_ids:
+                self.credit.pop(user_id, None)
+                self.loaded_at.pop(user_id, None)
+            if machine_ids:
+                slot_ids = [*slot_ids] + [
+                    slot_id
+                    for slot_id, level in self.levels.items()
+                    if level["machine_id"] in machine_ids
+                ]
+            for slot_id in slot_ids:
+                self.stock.pop(slot_id, None)
+                self.levels.pop(slot_id, None)
+                self.slot_products.pop(slot_id, None)
+                self.loaded_at.pop(slot_id, None)
+            for product_id in product_ids:
+                self.products.pop(product_id, None)
+                self.loaded_at.pop(product_id, None)
+
+
+class OrderJournal:
+    """Write-behind ingestion of orders for peak hours.
+
+    Orders are checked and reserved against the in-memory `Ledger`, then
+    appended to a local journal file and fsynced before they are
+    acknowledged. A background thread group-commits what the journal holds
+    to the `order`, `credit_transaction`, `vending_machine_slot`, `user` and
+    `sales_rollup` tables, one transaction per batch instead of one per
+    order, which is what SQLite's single writer lock can sustain.
+
+    Concurrent appends share a single fsync. The journal is truncated
+    whenever every entry in it has been committed, and entries left over
+    by a crash are committed when it is opened again. Replay skips the
+    entries whose orders already exist, so it is safe to repeat. Orders are
+    timestamped when they are committed, but the stock levels they leave
+    are reported to the low stock monitor as soon as they are journaled.
+    """
+
+    def __init__(
+        self,
+        path,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        ledger_max_age: float = 1.0,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ledger = Ledger(max_age=ledger_max_age)
+        self._queue = []
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._write_lock)
+        self._sync_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._file = None
+        self._flusher = None
+        self._stopped = threading.Event()
+
+    def open(self, background: bool = True):
+        """Replays what a previous process left behind and starts flushing.
+
+        The ledger is only right if this process is the only one taking
+        orders, so the journal file is locked for as long as it is open and
+        a second process fails to open it.
+        """
+        self._file = open(self.path, "ab")
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            raise OrderJournalLockedException(str(self.path))
+        self.replay()
+        if background:
+            self._flusher = threading.Thread(
+                target=self._run, name="order-journal", daemon=True
+            )
+            self._flusher.start()
+
+    def close(self):
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def purchase(self, user_id, slot_id, product_id) -> Order:
+        """Journals the sale of one unit, with the checks of `purchase`."""
+        ledger = self.ledger
+        ledger.load([user_id], [slot_id], [product_id])
+        with ledger.lock:
+            if user_id not in ledger.credit:
+                raise User.DoesNotExist()
+            product = ledger.products.get(product_id)
+            if product is None:
+                raise Product.DoesNotExist()
+            if ledger.credit[user_id] < product.price:
+                raise NotEnoughCreditException()
+            if slot_id not in ledger.stock:
+                raise VendingMachineSlot.DoesNotExist()
+            if ledger.slot_products[slot_id] != product.id:
+                raise ProductNotInSlotException()
+            if ledger.stock[slot_id] <= 0:
+                raise ProductOutOfStockException(product)
+            line = {"slot_id": slot_id, "product_id": product_id}
+            previous = {slot_id: ledger.stock[slot_id]}
+            orders, entry = self._reserve(user_id, [line], product.price)
+            levels = ledger.stock_levels(previous)
+
+        self._append(entry)
+        report_stock_levels(levels)
+        return orders[0]
+
+    def purchase_many(self, user_id, lines: list[dict]) -> list[Order]:
+        """Journals every line or none, with the checks of `purchase_many`."""
+        ledger = self.ledger
+        ledger.load(
+            [user_id],
+            {line["slot_id"] for line in lines},
+            {line["product_id"] for line in lines},
+        )
+        with ledger.lock:
+            stock = {}
+            errors = []
+            total = Decimal("0.00")
+            for index, line in enumerate(lines):
+                slot_id = line["slot_id"]
+                product = ledger.products.get(line["product_id"])
+                if product is None:
+                    errors.append({"line": index, "error": "Product does not exist."})
+                elif slot_id not in ledger.stock:
+                    errors.append({"line": index, "error": "Slot does not exist."})
+                elif ledger.slot_products[slot_id] != product.id:
+                    error = str(ProductNotInSlotException())
+                    errors.append({"line": index, "error": error})
+                elif stock.setdefault(slot_id, ledger.stock[slot_id]) <= 0:
+                    error = str(ProductOutOfStockException(product))
+                    errors.append({"line": index, "error": error})
+                else:
+                    stock[slot_id] -= 1
+                    total += product.price
+            if errors:
+                raise BatchOrderException(errors)
+            if user_id not in ledger.credit:
+                raise User.DoesNotExist()
+            if ledger.credit[user_id] < total:
+                raise NotEnoughCreditException()
+            previous = {slot_id: ledger.stock[slot_id] for slot_id in stock}
+            orders, entry = self._reserve(user_id, lines, total)
+            levels = ledger.stock_levels(previous)
+
+        self._append(entry)
+        report_stock_levels(levels)
+        return orders
+
+    def _reserve(self, user_id, lines: list[dict], total: Decimal):
+        """Takes the stock and credit of `lines`, must hold the ledger lock.
+
+        Returns the orders and the journal entry to append for them.
+        """
+        ledger = self.ledger
+        ledger.credit[user_id] -= total
+        ledger.pending_credit[user_id] += total
+        orders = []
+        entry = {"user_id": str(user_id), "orders": []}
+        for line in lines:
+            ledger.stock[line["slot_id"]] -= 1
+            ledger.pending_stock[line["slot_id"]] += 1
+            order = Order(id=new_id(), user_id=user_id, **line)
+            orders.append(order)
+            entry["orders"].append(
+                {
+                    "id": str(order.id),
+                    "slot_id": str(order.slot_id),
+                    "product_id": str(order.product_id),
+                    "price": str(ledger.products[order.product_id].price),
+                }
+            )
+        return orders, entry
+
+    def _append(self, entry: dict):
+        with self._write_lock:
+            try:
+                self._file.write(json.dumps(entry).encode() + b"\n")
+            except OSError:
+                self.ledger.release(*journal_deltas([entry]))
+                raise
+            self._queue.append(entry)
+            self._written += 1
+            position = self._written
+            if len(self._queue) >= self.batch_size:
+                self._wakeup.notify()
+        self._sync(position)
+
+    def _sync(self, position: int):
+        """Makes the journal durable up to `position`, one fsync per group.
+
+        Whoever takes the lock syncs everything written so far, so the
+        appends that queued up behind it return without an fsync of their
+        own.
+        """
+        with self._sync_lock:
+            if self._synced >= position:
+                return
+            with self._write_lock:
+                self._file.flush()
+                written = self._written
+            os.fsync(self._file.fileno())
+            self._synced = written
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                with self._wakeup:
+                    self._wakeup.wait_for(
+                        lambda: len(self._queue) >= self.batch_size
+                        or self._stopped.is_set(),
+                        timeout=self.flush_interval,
+                    )
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("Could not flush the order journal.")
+                close_old_connections()
+        finally:
+            connection.close()
+
+    def flush(self) -> int:
+        """Commits every journaled order, returns how many entries it took."""
+        flushed = 0
+        with self._flush_lock:
+            while True:
+                with self._write_lock:
+                    batch = self._queue[: self.batch_size]
+                if not batch:
+                    return flushed
+                self._commit(batch)
+                with self._write_lock:
+                    del self._queue[: len(batch)]
+                    if not self._queue:
+                        # Everything journaled is in the database now.
+                        self._file.flush()
+                        self._file.truncate(0)
+                flushed += len(batch)
+
+    def _commit(self, batch: list[dict]):
+        with self.ledger.load_lock:
+            try:
+                apply_journal_entries(batch)
+                failed = []
+            except DatabaseError:
+                logger.exception("Could not commit a journal batch, retrying alone.")
+                failed = [entry for entry in batch if not _commit_alone(entry)]
+            credit, stock = journal_deltas(batch)
+            self.ledger.settle(credit, stock)
+
+        if failed:
+            # Reload what the failed entries reserved but never wrote.
+            failed_credit, failed_stock = journal_deltas(failed)
+            self.ledger.forget(user_ids=failed_credit, slot_ids=failed_stock)
+
+    def replay(self) -> int:
+        """Commits the entries a previous process journaled but did not."""
+        if not os.path.exists(self.path):
+            return 0
+        entries = []
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A torn write from a crash, never acknowledged.
+                    logger.warning("Skipping a truncated order journal entry.")
+
+        committed = set(
+            Order.objects.filter(
+                id__in=[entry["orders"][0]["id"] for entry in entries]
+            ).values_list("id", flat=True)
+        )
+        pending = [
+            entry
+            for entry in entries
+            if UUID(entry["orders"][0]["id"]) not in committed
+        ]
+        for start in range(0, len(pending), self.batch_size):
+            apply_journal_entries(pending[start : start + self.batch_size])
+        with open(self.path, "r+b") as journal:
+            journal.truncate(0)
+            os.fsync(journal.fileno())
+        if pending:
+            logger.info("Replayed %d order journal entries.", len(pending))
+        return len(pending)
+
+
+def journal_deltas(entries: list[dict]) -> tuple[dict, Counter]:
+    """Returns the credit debited per user and units sold per slot."""
+    credit = defaultdict(Decimal)
+    stock = Counter()
+    for entry in entries:
+        user_id = UUID(entry["user_id"])
+        for order in entry["orders"]:
+            credit[user_id] += Decimal(order["price"])
+            stock[UUID(order["slot_id"])] += 1
+    return credit, stock
+
+
+@retry_on_lock
+@transaction.atomic
+def apply_journal_entries(entries: list[dict]):
+    """Writes journaled orders with one statement per table.
+
+    Each entry is all-or-nothing, like the request that journaled it, and
+    all of `entries` are committed together.
+    """
+    credit, stock = journal_deltas(entries)
+    sales = defaultdict(lambda: [0, Decimal("0.00")])
+    orders = []
+    payments = []
+    for entry in entries:
+        user_id = UUID(entry["user_id"])
+        for order in entry["orders"]:
+            product_id, slot_id = UUID(order["product_id"]), UUID(order["slot_id"])
+            orders.append(
+                Order(
+                    id=UUID(order["id"]),
+                    user_id=user_id,
+                    product_id=product_id,
+                    slot_id=slot_id,
+                )
+            )
+            payments.append(
+                CreditTransaction(
+                    user_id=user_id,
+                    kind=CreditTransaction.Kind.PURCHASE,
+                    amount=-Decimal(order["price"]),
+                    order_id=orders[-1].id,
+                )
+            )
+            bucket = sales[(product_id, slot_id)]
+            bucket[0] += 1
+            bucket[1] += Decimal(order["price"])
+
+    Order.objects.bulk_create(orders, batch_size=500)
+    CreditTransaction.objects.bulk_create(payments, batch_size=500)
+    VendingMachineSlot.objects.filter(id__in=stock).update(
+        quantity=Case(
+            *(
+                When(id=slot_id, then=F("quantity") - units)
+                for slot_id, units in stock.items()
+            ),
+            default=F("quantity"),
+        )
+    )
+    credit_field = User._meta.get_field("credit")
+    User.objects.filter(id__in=credit).update(
+        # SQLite evaluates decimal arithmetic as floating point.
+        credit=Round(
+            Case(
+                *(
+                    When(
+                        id=user_id,
+                        then=ExpressionWrapper(
+                            F("credit") - amount, output_field=credit_field
+                        ),
+                    )
+                    for user_id, amount in credit.items()
+                ),
+                default=F("credit"),
+                output_field=credit_field,
+            ),
+            2,
+        )
+    )
+    record_sales({key: tuple(amounts) for key, amounts in sales.items()})
+    machines = slot_machines(stock)
+    record_slot_changes(machines)
+    bump_inventory_version(set(machines.values()))
+    invalidate_slots(stock)
+    for user_id in credit:
+        invalidate_user_credit(user_id)
+
+
+def _commit_alone(entry: dict) -> bool:
+    try:
+        apply_journal_entries([entry])
+        return True
+    except DatabaseError:
+        logger.exception("Dropping order journal entry %s.", entry)
+        return False
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_order_journal() -> OrderJournal | None:
+    """Returns this process' order journal, or None when it is disabled.
+
+    The journal is opened, and what a crash left in it replayed, on first
+    use. It is flushed when the process exits cleanly.
+    """
+    global _journal
+    if not settings.VENDING_ORDER_JOURNAL:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            journal = OrderJournal(
+                settings.VENDING_ORDER_JOURNAL,
+                batch_size=settings.VENDING_ORDER_JOURNAL_BATCH_SIZE,
+                flush_interval=settings.VENDING_ORDER_JOURNAL_FLUSH_INTERVAL,
+                ledger_max_age=settings.VENDING_ORDER_JOURNAL_LEDGER_MAX_AGE,
+            )
+            journal.open()
+            atexit.register(journal.close)
+            _journal = journal
+    return _journal
+
+
+def close_order_journal():
+    global _journal
+    with _journal_lock:
+        if _journal is not None:
+            atexit.unregister(_journal.close)
+            _journal.close()
+            _journal = None
+
+
+def flush_order_journal():
+    """Commits pending orders before a write that sets stock or credit.
+
+    Must be called outside of any transaction, or a rollback would lose
+    the orders it committed.
+    """
+    if _journal is not None:
+        _journal.flush()
+
+
+def forget_ledger(**rows):
+    """Has the order ledger reload rows changed outside of it."""
+    if _journal is not None:
+        _journal.ledger.forget(**rows)
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.vending.changes import prune_slot_changes
+
+
+class Command(BaseCommand):
+    help = "Deletes the slot changes older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention",
+            type=int,
+            default=settings.VENDING_SLOT_CHANGES_RETENTION,
+            help="Seconds of changes to keep.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(seconds=options["retention"])
+        deleted = prune_slot_changes(before)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} slot changes."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from apps.vending.credit import credit_mismatches, reconcile_credit
+from apps.vending.journal import flush_order_journal
+from apps.vending.utils import batched
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that every user's credit is what their credit transactions "
+        "add up to, and with --fix sets it to that."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--fix", action="store_true", help="Re-derive the mismatched balances."
+        )
+
+    def handle(self, *args, **options):
+        flush_order_journal()
+        batch_size = options["batch_size"]
+        mismatched = fixed = 0
+        for batch in batched(credit_mismatches(batch_size), batch_size):
+            mismatched += len(batch)
+            for user_id, credit, balance in batch:
+                self.stdout.write(
+                    f"{user_id}: credit {credit}, transactions add up to {balance}"
+                )
+            if options["fix"]:
+                fixed += reconcile_credit([user_id for user_id, _, _ in batch])
+
+        if options["fix"]:
+            message = f"Re-derived the credit of {fixed} users."
+        else:
+            message = f"Found {mismatched} users whose credit does not add up."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,40 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.vending.expections import InvalidManifestException
+from apps.vending.inventory import apply_restock
+from apps.vending.validators import RestockValidator
+
+
+class Command(BaseCommand):
+    help = (
+        "Restocks slots from a JSON manifest: a list of "
+        '{"machine_id", "row", "column", "product_id", "quantity"} objects.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("manifest", help="Path to the manifest, - for stdin.")
+
+    def handle(self, *args, **options):
+        if options["manifest"] == "-":
+            manifest = json.load(sys.stdin)
+        else:
+            with open(options["manifest"]) as manifest_file:
+                manifest = json.load(manifest_file)
+
+        validator = RestockValidator(data={"slots": manifest})
+        if not validator.is_valid():
+            raise CommandError(json.dumps(validator.errors))
+
+        try:
+            result = apply_restock(validator.validated_data["slots"])
+        except InvalidManifestException as e:
+            raise CommandError(json.dumps(e.errors))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Restocked {result['updated']} slots, created {result['created']}."
+            )
+        )
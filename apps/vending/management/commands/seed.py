@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.vending.seeding import SEEDED_MODELS, SLOTS_PER_MACHINE, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills an empty database with generated products, machines of "
+        f"{SLOTS_PER_MACHINE} slots, users and orders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1_000)
+        parser.add_argument("--machines", type=int, default=100)
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--orders", type=int, default=100_000)
+        parser.add_argument("--seed", type=int, default=0, help="Same seed, same rows.")
+        parser.add_argument(
+            "--days", type=int, default=90, help="Days of order history."
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        sizes = {
+            name: options[name] for name in ("products", "machines", "users", "orders")
+        }
+        if any(size < 0 for size in sizes.values()):
+            raise CommandError("Sizes cannot be negative.")
+        if sizes["machines"] and not sizes["products"]:
+            raise CommandError("Slots need products to hold.")
+        for model in SEEDED_MODELS:
+            if model.objects.exists():
+                raise CommandError(
+                    f"The {model._meta.db_table} table is not empty, "
+                    "seed an empty database."
+                )
+
+        seeder = Seeder(
+            seed=options["seed"], days=options["days"], batch_size=options["batch_size"]
+        )
+        start = time.perf_counter()
+        counts = seeder.seed(**sizes)
+        elapsed = time.perf_counter() - start
+
+        rows = sum(counts.values())
+        for model, count in counts.items():
+            seconds = seeder.timings[model]
+            self.stdout.write(
+                f"{model}: {count} rows in {seconds:.2f}s, "
+                f"{count / seconds if seconds else 0:,.0f} rows/sec"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {rows} rows in {elapsed:.1f}s, "
+                f"{rows / elapsed:,.0f} rows/sec."
+            )
+        )
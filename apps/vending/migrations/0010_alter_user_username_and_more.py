@@ -0,0 +1,71 @@
+# Generated by Django 4.2.2 on 2026-10-18 20:27
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_slot_coordinates(apps, schema_editor):
+    """Fails clearly, rather than on the constraint, when slots share a
+    position: which one to move is for the operator to decide."""
+    VendingMachineSlot = apps.get_model("vending", "VendingMachineSlot")
+    duplicates = (
+        VendingMachineSlot.objects.values_list("row", "column")
+        .annotate(slots=Count("id"))
+        .filter(slots__gt=1)
+        .order_by("row", "column")
+    )
+    if duplicates:
+        positions = ", ".join(
+            f"row {row} column {column} ({slots} slots)"
+            for row, column, slots in duplicates
+        )
+        raise RuntimeError(
+            f"Several slots share a position: {positions}. Move or delete "
+            "all but one slot at each of them, then migrate again."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0009_alter_user_credit"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="username",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="vendingmachineslot",
+            name="quantity",
+            field=models.IntegerField(
+                db_index=True,
+                validators=[
+                    django.core.validators.MaxValueValidator(100),
+                    django.core.validators.MinValueValidator(0),
+                ],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at"], name="order_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["slot", "created_at"], name="order_slot_created_idx"
+            ),
+        ),
+        migrations.RunPython(check_slot_coordinates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="vendingmachineslot",
+            constraint=models.UniqueConstraint(
+                fields=("row", "column"), name="unique_slot_coordinates"
+            ),
+        ),
+    ]
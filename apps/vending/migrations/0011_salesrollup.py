@@ -0,0 +1,73 @@
+# Generated by Django 4.2.2 on 2026-10-18 20:33
+
+from django.db import migrations, models
+from django.db.models.functions import TruncHour
+import django.db.models.deletion
+import uuid
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    Order = apps.get_model("vending", "Order")
+    SalesRollup = apps.get_model("vending", "SalesRollup")
+    buckets = (
+        Order.objects.annotate(hour=TruncHour("created_at"))
+        .values("hour", "product_id", "slot_id")
+        .annotate(units=models.Count("id"), revenue=models.Sum("product__price"))
+    )
+    SalesRollup.objects.bulk_create(
+        (SalesRollup(**bucket) for bucket in buckets.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0010_alter_user_username_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="vending.product",
+                    ),
+                ),
+                (
+                    "slot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="vending.vendingmachineslot",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "sales_rollup",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="salesrollup",
+            constraint=models.UniqueConstraint(
+                fields=("hour", "product", "slot"), name="unique_sales_rollup_bucket"
+            ),
+        ),
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
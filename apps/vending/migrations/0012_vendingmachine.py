@@ -0,0 +1,80 @@
+# Generated by Django 4.2.2 on 2026-10-18 20:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def assign_default_machine(apps, schema_editor):
+    """Existing slots all belonged to the single, implicit machine."""
+    VendingMachine = apps.get_model("vending", "VendingMachine")
+    VendingMachineSlot = apps.get_model("vending", "VendingMachineSlot")
+    if VendingMachineSlot.objects.exists():
+        machine = VendingMachine.objects.create(name="Default")
+        VendingMachineSlot.objects.update(machine=machine)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0011_salesrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendingMachine",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "vending_machine",
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name="vendingmachineslot",
+            name="unique_slot_coordinates",
+        ),
+        migrations.AddField(
+            model_name="vendingmachineslot",
+            name="machine",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="slots",
+                to="vending.vendingmachine",
+            ),
+        ),
+        migrations.RunPython(assign_default_machine, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="vendingmachineslot",
+            name="machine",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="slots",
+                to="vending.vendingmachine",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="vendingmachineslot",
+            index=models.Index(
+                fields=["machine", "row", "column", "quantity", "product", "id"],
+                name="slot_machine_listing_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="vendingmachineslot",
+            constraint=models.UniqueConstraint(
+                fields=("machine", "row", "column"), name="unique_slot_coordinates"
+            ),
+        ),
+    ]
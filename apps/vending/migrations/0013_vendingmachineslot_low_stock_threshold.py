@@ -0,0 +1,25 @@
+# Generated by Django 4.2.2 on 2026-10-18 20:59
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0012_vendingmachine"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vendingmachineslot",
+            name="low_stock_threshold",
+            field=models.IntegerField(
+                default=2,
+                validators=[
+                    django.core.validators.MaxValueValidator(100),
+                    django.core.validators.MinValueValidator(0),
+                ],
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0013_vendingmachineslot_low_stock_threshold"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotChange",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("slot_id", models.UUIDField()),
+                ("machine_id", models.UUIDField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "slot_change",
+                "indexes": [
+                    models.Index(
+                        fields=["machine_id", "id"], name="slot_change_machine_idx"
+                    )
+                ],
+            },
+        ),
+    ]
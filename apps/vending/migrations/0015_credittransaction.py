@@ -0,0 +1,82 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def open_balances(apps, schema_editor):
+    """Existing credit becomes an opening transaction, so that balances add
+    up from the start."""
+    CreditTransaction = apps.get_model("vending", "CreditTransaction")
+    User = apps.get_model("vending", "User")
+    users = User.objects.exclude(credit=0).order_by("id").values_list("id", "credit")
+    batch = []
+    for user_id, credit in users.iterator(chunk_size=10_000):
+        batch.append(CreditTransaction(user_id=user_id, kind="opening", amount=credit))
+        if len(batch) == 10_000:
+            CreditTransaction.objects.bulk_create(batch)
+            batch = []
+    CreditTransaction.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0014_slotchange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CreditTransaction",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("opening", "Opening"),
+                            ("top-up", "Top Up"),
+                            ("debit", "Debit"),
+                            ("purchase", "Purchase"),
+                            ("adjustment", "Adjustment"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="vending.order",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="vending.user"
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "credit_transaction",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"], name="credit_user_created_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
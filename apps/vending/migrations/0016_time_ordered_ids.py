@@ -0,0 +1,90 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:36
+
+import apps.vending.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vending", "0015_credittransaction"),
+    ]
+
+    # Defaults are applied by Django, not by the database: only the model
+    # state changes, tables are left as they are instead of being rebuilt.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="credittransaction",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="order",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="product",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="salesrollup",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="user",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="vendingmachine",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="vendingmachineslot",
+                    name="id",
+                    field=models.UUIDField(
+                        default=apps.vending.ids.new_id,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+            ],
+        ),
+    ]
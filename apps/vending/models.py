@@ -1,15 +1,16 @@
 from django.db import models
 
 from decimal import Decimal
-from uuid import uuid4
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from apps.vending.ids import new_id
+
 
 class Product(models.Model):
     class Meta:
         db_table = "product"
 
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     name = models.CharField(max_length=100)
     price = models.DecimalField(
         max_digits=4, decimal_places=2, validators=[MinValueValidator(Decimal("0.00"))]
@@ -18,27 +19,56 @@ class Product(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+class VendingMachine(models.Model):
+    class Meta:
+        db_table = "vending_machine"
+
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class VendingMachineSlot(models.Model):
     class Meta:
         db_table = "vending_machine_slot"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["machine", "row", "column"], name="unique_slot_coordinates"
+            )
+        ]
+        indexes = [
+            # Holds every slot column a machine listing reads, so the listing
+            # is answered from the index without visiting the table.
+            models.Index(
+                fields=["machine", "row", "column", "quantity", "product", "id"],
+                name="slot_machine_listing_idx",
+            )
+        ]
 
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    machine = models.ForeignKey(
+        "VendingMachine", on_delete=models.CASCADE, related_name="slots"
+    )
     product = models.ForeignKey("Product", on_delete=models.CASCADE)
     quantity = models.IntegerField(
-        validators=[MaxValueValidator(100), MinValueValidator(0)]
+        validators=[MaxValueValidator(100), MinValueValidator(0)], db_index=True
     )
     row = models.IntegerField(validators=[MaxValueValidator(10), MinValueValidator(1)])
     column = models.IntegerField(
         validators=[MaxValueValidator(10), MinValueValidator(1)]
     )
+    # The slot is reported as running low once its quantity drops to this.
+    low_stock_threshold = models.IntegerField(
+        default=2, validators=[MaxValueValidator(100), MinValueValidator(0)]
+    )
 
 
 class User(models.Model):
     class Meta:
         db_table = "user"
 
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
-    username = models.CharField(max_length=100)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    username = models.CharField(max_length=100, unique=True)
     credit = models.DecimalField(
         max_digits=6, decimal_places=2, validators=[MinValueValidator(Decimal("0.00"))]
     )
@@ -47,9 +77,85 @@ class User(models.Model):
 class Order(models.Model):
     class Meta:
         db_table = "order"
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="order_user_created_idx"),
+            models.Index(fields=["slot", "created_at"], name="order_slot_created_idx"),
+        ]
 
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
     user = models.ForeignKey("User", on_delete=models.CASCADE)
     product = models.ForeignKey("Product", on_delete=models.CASCADE)
     slot = models.ForeignKey("VendingMachineSlot", on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class SalesRollup(models.Model):
+    """Units sold and revenue per hour, product and slot.
+
+    Maintained incrementally on every sale so that sales reports read a
+    table that grows with time and catalogue size, not with order volume.
+    """
+
+    class Meta:
+        db_table = "sales_rollup"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["hour", "product", "slot"], name="unique_sales_rollup_bucket"
+            )
+        ]
+
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    hour = models.DateTimeField()
+    product = models.ForeignKey("Product", on_delete=models.CASCADE)
+    slot = models.ForeignKey("VendingMachineSlot", on_delete=models.CASCADE)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+
+class SlotChange(models.Model):
+    """A slot, or the product it holds, changed or was deleted.
+
+    Ids are the change sequence: kiosks pass back the last one they saw to
+    fetch only the slots changed since. Slots are not foreign keys, so the
+    changes of deleted slots are kept.
+    """
+
+    class Meta:
+        db_table = "slot_change"
+        indexes = [
+            models.Index(fields=["machine_id", "id"], name="slot_change_machine_idx")
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    slot_id = models.UUIDField()
+    machine_id = models.UUIDField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class CreditTransaction(models.Model):
+    """A change of a user's credit, positive for money in.
+
+    Written in the transaction that changes `User.credit`, so that a
+    user's credit is always the sum of their transactions.
+    """
+
+    class Meta:
+        db_table = "credit_transaction"
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="credit_user_created_idx")
+        ]
+
+    class Kind(models.TextChoices):
+        OPENING = "opening"
+        TOP_UP = "top-up"
+        DEBIT = "debit"
+        PURCHASE = "purchase"
+        ADJUSTMENT = "adjustment"
+
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)
+    user = models.ForeignKey("User", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    amount = models.DecimalField(max_digits=6, decimal_places=2)
+    # The order paid for, by purchase transactions.
+    order = models.ForeignKey("Order", null=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,79 @@
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPaginator:
+    """Pages through a queryset by the values of its ordering fields.
+
+    Unlike offsets, the next page is found by filtering past the last row
+    seen, so every page costs the same index range scan however deep the
+    client is. `ordering` must end with a unique field to make the order
+    total, e.g. `("row", "column", "id")`. Prefix a field with "-" to walk
+    it in descending order.
+
+    Cursors are signed, so clients can hold on to them but not forge them.
+    """
+
+    salt = "vending.pagination.cursor"
+
+    def __init__(self, ordering: tuple[str, ...]):
+        self.ordering = ordering
+        self.fields = tuple(field.lstrip("-") for field in ordering)
+
+    def encode_cursor(self, values: tuple) -> str:
+        return signing.dumps([str(value) for value in values], salt=self.salt)
+
+    def decode_cursor(self, cursor: str) -> list:
+        try:
+            values = signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            raise ValidationError({"cursor": ["Invalid cursor."]})
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise ValidationError({"cursor": ["Invalid cursor."]})
+        return values
+
+    def after(self, values: list) -> Q:
+        """Filter for the rows strictly after `values` in `ordering`."""
+        conditions = []
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = dict(zip(self.fields[:position], values[:position]))
+            conditions.append(Q(**equal, **{f"{name}__{lookup}": values[position]}))
+        return reduce(or_, conditions)
+
+    def paginate(self, queryset, cursor: str | None, limit: int):
+        """Returns the page after `cursor` and the cursor of the next page."""
+        # One extra row tells whether there is a next page.
+        page = list(self.after_cursor(queryset, cursor)[: limit + 1])
+        return self.split_page(page, limit)
+
+    async def apaginate(self, queryset, cursor: str | None, limit: int):
+        """`paginate` through the async ORM."""
+        rows = self.after_cursor(queryset, cursor)[: limit + 1]
+        return self.split_page([row async for row in rows], limit)
+
+    def after_cursor(self, queryset, cursor: str | None):
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor)))
+        return queryset
+
+    def split_page(self, page: list, limit: int):
+        if len(page) <= limit:
+            return page, None
+        page = page[:limit]
+        last = page[-1]
+        return page, self.encode_cursor(tuple(self.value(last, f) for f in self.fields))
+
+    @staticmethod
+    def value(row, field: str):
+        if isinstance(row, dict):
+            return row[field]
+        for attr in field.split("__"):
+            row = getattr(row, attr)
+        return row
@@ -0,0 +1,231 @@
+import time
+from collections import Counter
+from decimal import Decimal
+from functools import reduce, wraps
+from operator import or_
+
+from django.db import OperationalError, transaction
+from django.db.models import Case, F, Q, Subquery, When
+from django.db.models.functions import Round
+
+from apps.vending.cache import (
+    bump_inventory_version,
+    invalidate_slots,
+    invalidate_user_credit,
+    slot_machine_ids,
+)
+from apps.vending.changes import record_slot_changes
+from apps.vending.expections import (
+    BatchOrderException,
+    NotEnoughCreditException,
+    ProductNotInSlotException,
+    ProductOutOfStockException,
+    StockChangedException,
+)
+from apps.vending.models import (
+    CreditTransaction,
+    Order,
+    Product,
+    User,
+    VendingMachineSlot,
+)
+from apps.vending.reports import record_sales, sales_by_bucket
+from apps.vending.stock_alerts import (
+    report_stock_levels,
+    slot_levels,
+    slot_levels_and_products,
+)
+
+LOCK_RETRIES = 20
+LOCK_RETRY_DELAY = 0.005
+
+
+def retry_on_lock(func):
+    """Retries `func` when SQLite reports the database as locked.
+
+    SQLite hands out a single writer lock and, with a shared cache, does not
+    honour the busy timeout. Every purchase runs inside one transaction, so
+    retrying the whole call is always safe.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(LOCK_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as e:
+                if "locked" not in str(e) or attempt == LOCK_RETRIES - 1:
+                    raise
+                time.sleep(LOCK_RETRY_DELAY * (attempt + 1))
+
+    return wrapper
+
+
+@retry_on_lock
+def purchase(user_id, slot_id, product_id) -> Order:
+    """Sells one unit of `product_id` from `slot_id` to `user_id`.
+
+    Stock and credit are checked by the conditional UPDATEs themselves
+    (`product = product_id AND quantity > 0`, `credit >= price`), so
+    concurrent buyers can neither oversell a slot nor overspend a balance.
+    The happy path makes a fixed eight statements: decrement the slot,
+    debit the user, insert the order and the credit transaction paying for
+    it, upsert the sales rollup in two, read the slot's new stock level for
+    the low stock monitor and record the slot change.
+
+    The slot is written first so that SQLite takes its writer lock before
+    any read happens in the transaction. The debit is rounded to cents
+    because SQLite evaluates decimal arithmetic as floating point.
+    """
+    with transaction.atomic():
+        decremented = VendingMachineSlot.objects.filter(
+            id=slot_id, product_id=product_id, quantity__gt=0
+        ).update(quantity=F("quantity") - 1)
+
+        price = Subquery(Product.objects.filter(id=product_id).values("price")[:1])
+        debited = decremented and User.objects.filter(
+            id=user_id, credit__gte=price
+        ).update(credit=Round(F("credit") - price, 2))
+
+        if not debited:
+            _raise_purchase_error(user_id, slot_id, product_id)
+
+        order = Order.objects.create(
+            user_id=user_id, product_id=product_id, slot_id=slot_id
+        )
+        CreditTransaction.objects.create(
+            user_id=user_id,
+            kind=CreditTransaction.Kind.PURCHASE,
+            amount=-price,
+            order=order,
+        )
+        record_sales({(product_id, slot_id): (1, price)})
+        levels = slot_levels(VendingMachineSlot.objects.filter(id=slot_id))
+        report_stock_levels(
+            [{**level, "previous": level["quantity"] + 1} for level in levels]
+        )
+        record_slot_changes({level["slot_id"]: level["machine_id"] for level in levels})
+        bump_inventory_version(slot_machine_ids([slot_id]))
+        invalidate_slots([slot_id])
+        invalidate_user_credit(user_id)
+        return order
+
+
+def _raise_purchase_error(user_id, slot_id, product_id):
+    """Explains why a purchase could not be applied.
+
+    Only runs on the failure path, and reports errors in the same order the
+    checks were historically made: unknown user or product, not enough
+    credit, unknown slot, then a slot holding another product and out of
+    stock.
+    """
+    user = User.objects.get(id=user_id)
+    product = Product.objects.get(id=product_id)
+    if user.credit < product.price:
+        raise NotEnoughCreditException()
+
+    slot = VendingMachineSlot.objects.get(id=slot_id)
+    if slot.product_id != product.id:
+        raise ProductNotInSlotException()
+    raise ProductOutOfStockException(product)
+
+
+@retry_on_lock
+def purchase_many(user_id, lines: list[dict]) -> list[Order]:
+    """Sells every `{"slot_id", "product_id"}` line to `user_id`, or none.
+
+    Slots and products are loaded in one query each to validate every line
+    and price the whole basket. The credit is then debited once and all
+    slots are decremented by a single conditional UPDATE before the orders
+    are bulk inserted, with a credit transaction each, so the query count
+    does not depend on the number of lines. Lines that cannot be served are
+    reported together.
+    """
+    demand = Counter(line["slot_id"] for line in lines)
+    with transaction.atomic():
+        slots, slot_products = slot_levels_and_products(
+            VendingMachineSlot.objects.select_for_update().filter(id__in=demand)
+        )
+        levels = {level["slot_id"]: level for level in slots}
+        stock = {slot_id: level["quantity"] for slot_id, level in levels.items()}
+        machine_ids = {level["machine_id"] for level in levels.values()}
+        products = Product.objects.in_bulk({line["product_id"] for line in lines})
+
+        errors = []
+        total = Decimal("0.00")
+        for index, line in enumerate(lines):
+            product = products.get(line["product_id"])
+            if product is None:
+                errors.append({"line": index, "error": "Product does not exist."})
+            elif line["slot_id"] not in stock:
+                errors.append({"line": index, "error": "Slot does not exist."})
+            elif slot_products[line["slot_id"]] != product.id:
+                error = str(ProductNotInSlotException())
+                errors.append({"line": index, "error": error})
+            elif stock[line["slot_id"]] <= 0:
+                error = str(ProductOutOfStockException(product))
+                errors.append({"line": index, "error": error})
+            else:
+                stock[line["slot_id"]] -= 1
+                total += product.price
+        if errors:
+            raise BatchOrderException(errors)
+
+        debited = User.objects.filter(id=user_id, credit__gte=total).update(
+            credit=Round(F("credit") - total, 2)
+        )
+        if not debited:
+            User.objects.get(id=user_id)
+            raise NotEnoughCreditException()
+
+        decremented = VendingMachineSlot.objects.filter(
+            reduce(
+                or_,
+                (
+                    Q(id=slot_id, quantity__gte=count)
+                    for slot_id, count in demand.items()
+                ),
+            )
+        ).update(
+            quantity=Case(
+                *(
+                    When(id=slot_id, then=F("quantity") - count)
+                    for slot_id, count in demand.items()
+                ),
+                default=F("quantity"),
+            )
+        )
+        # Only reachable on backends without row locks.
+        if decremented != len(demand):
+            raise StockChangedException()
+
+        orders = Order.objects.bulk_create(
+            Order(
+                user_id=user_id, product_id=line["product_id"], slot_id=line["slot_id"]
+            )
+            for line in lines
+        )
+        CreditTransaction.objects.bulk_create(
+            CreditTransaction(
+                user_id=user_id,
+                kind=CreditTransaction.Kind.PURCHASE,
+                amount=-products[order.product_id].price,
+                order=order,
+            )
+            for order in orders
+        )
+        prices = {product_id: product.price for product_id, product in products.items()}
+        record_sales(sales_by_bucket(lines, prices))
+        report_stock_levels(
+            [
+                {**level, "quantity": stock[slot_id], "previous": level["quantity"]}
+                for slot_id, level in levels.items()
+            ]
+        )
+        record_slot_changes(
+            {slot_id: level["machine_id"] for slot_id, level in levels.items()}
+        )
+        bump_inventory_version(machine_ids)
+        invalidate_slots(demand)
+        invalidate_user_credit(user_id)
+        return orders
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, ExpressionWrapper, F, Q, Sum, When
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from apps.vending.models import SalesRollup
+from apps.vending.serializers import decimal_to_string
+
+
+def current_hour() -> datetime:
+    return timezone.now().replace(minute=0, second=0, microsecond=0)
+
+
+def record_sales(sales: dict):
+    """Adds `{(product_id, slot_id): (units, revenue)}` to this hour's rollups.
+
+    `revenue` may be a Decimal or a query expression such as a price
+    subquery. Missing buckets are inserted empty, ignoring the ones that
+    already exist, then every bucket is incremented by a single UPDATE.
+    That is two statements however many buckets are touched.
+    """
+    hour = current_hour()
+    SalesRollup.objects.bulk_create(
+        (
+            SalesRollup(hour=hour, product_id=product_id, slot_id=slot_id)
+            for product_id, slot_id in sales
+        ),
+        ignore_conflicts=True,
+    )
+
+    def increment(field: str, position: int):
+        output_field = SalesRollup._meta.get_field(field)
+        return Case(
+            *(
+                When(
+                    product_id=product_id,
+                    slot_id=slot_id,
+                    then=ExpressionWrapper(
+                        F(field) + amounts[position], output_field=output_field
+                    ),
+                )
+                for (product_id, slot_id), amounts in sales.items()
+            ),
+            default=F(field),
+            output_field=output_field,
+        )
+
+    SalesRollup.objects.filter(
+        reduce(
+            or_,
+            (
+                Q(hour=hour, product_id=product_id, slot_id=slot_id)
+                for product_id, slot_id in sales
+            ),
+        )
+    ).update(
+        units=increment("units", 0),
+        # SQLite evaluates decimal arithmetic as floating point.
+        revenue=Round(increment("revenue", 1), 2),
+    )
+
+
+def sales_report(since: datetime | None = None, until: datetime | None = None):
+    """Units and revenue per product, per slot and per hour."""
+    rollups = SalesRollup.objects.all()
+    if since:
+        rollups = rollups.filter(hour__gte=since)
+    if until:
+        rollups = rollups.filter(hour__lt=until)
+
+    def totals(*fields):
+        return (
+            rollups.values(*fields)
+            .annotate(total_units=Sum("units"), total_revenue=Sum("revenue"))
+            .order_by(*fields)
+        )
+
+    return {
+        "products": [
+            {
+                "product_id": str(row["product_id"]),
+                "name": row["product__name"],
+                **_totals(row),
+            }
+            for row in totals("product_id", "product__name")
+        ],
+        "slots": [
+            {
+                "slot_id": str(row["slot_id"]),
+                "coordinates": [row["slot__column"], row["slot__row"]],
+                **_totals(row),
+            }
+            for row in totals("slot_id", "slot__column", "slot__row")
+        ],
+        "hours": [
+            {"hour": row["hour"].isoformat(), **_totals(row)} for row in totals("hour")
+        ],
+    }
+
+
+def _totals(row: dict) -> dict:
+    return {
+        "units": row["total_units"],
+        "revenue": decimal_to_string(row["total_revenue"], 2),
+    }
+
+
+def sales_by_bucket(lines, prices: dict) -> dict:
+    """Groups `{"slot_id", "product_id"}` lines into `record_sales` input."""
+    sales = defaultdict(lambda: [0, 0])
+    for line in lines:
+        bucket = sales[(line["product_id"], line["slot_id"])]
+        bucket[0] += 1
+        bucket[1] += prices[line["product_id"]]
+    return {key: tuple(amounts) for key, amounts in sales.items()}
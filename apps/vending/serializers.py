@@ -1,3 +1,8 @@
+import json
+from decimal import ROUND_HALF_UP, Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
 from rest_framework import serializers
 
 
@@ -28,3 +33,151 @@ class OrderSerializer(serializers.Serializer):
     user = UserSerializer()
     product = ProductSerializer()
     slot = VendingMachineSlotSerializer()
+
+
+class UserOrderSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    created_at = serializers.DateTimeField()
+    product = ProductSerializer()
+    slot_id = serializers.UUIDField()
+
+
+class CreditSerializer(serializers.Serializer):
+    credit = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+
+class CreditTransactionSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    kind = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=6, decimal_places=2)
+    order_id = serializers.UUIDField()
+    created_at = serializers.DateTimeField()
+
+
+class FastSerializer:
+    """Read-only serializer that skips DRF's per-field machinery.
+
+    Querysets are read with `.values_list(*fields)` and every row tuple is
+    turned into the same dict its DRF counterpart would build. Model
+    instances are supported too, by resolving the same field paths on them.
+    """
+
+    fields: tuple[str, ...] = ()
+
+    def __init__(self, instance, many=False):
+        self.instance = instance
+        self.many = many
+
+    @property
+    def data(self):
+        if not self.many:
+            return self.to_representation(self.row_from_instance(self.instance))
+        if isinstance(self.instance, QuerySet):
+            rows = self.instance.values_list(*self.fields)
+        else:
+            rows = map(self.row_from_instance, self.instance)
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+    async def adata(self) -> list[dict]:
+        """Serializes a queryset through the async ORM."""
+        rows = self.instance.values_list(*self.fields)
+        to_representation = self.to_representation
+        return [to_representation(row) async for row in rows]
+
+    def stream(self, chunk_size: int = 2000):
+        """Yields a queryset as a JSON array, `chunk_size` rows at a time.
+
+        Rows are fetched with `.iterator()`, so memory use stays flat
+        whatever the size of the result.
+        """
+        rows = self.instance.values_list(*self.fields).iterator(chunk_size=chunk_size)
+        to_representation = self.to_representation
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+        yield b"["
+        separator = b""
+        batch = []
+        for row in rows:
+            batch.append(dumps(to_representation(row)))
+            if len(batch) == chunk_size:
+                yield separator + ",".join(batch).encode()
+                separator = b","
+                batch = []
+        if batch:
+            yield separator + ",".join(batch).encode()
+        yield b"]"
+
+    async def astream(self, chunk_size: int = 2000):
+        """`stream` for async views: each chunk is read and encoded in the
+        ORM's thread, so rows are never fetched on the event loop."""
+        chunks = self.stream(chunk_size)
+        next_chunk = sync_to_async(next)
+        try:
+            while (chunk := await next_chunk(chunks, None)) is not None:
+                yield chunk
+        finally:
+            await sync_to_async(chunks.close)()
+
+    def row_from_instance(self, instance) -> tuple:
+        row = []
+        for field in self.fields:
+            value = instance
+            for attr in field.split("__"):
+                value = getattr(value, attr)
+            row.append(value)
+        return tuple(row)
+
+    def to_representation(self, row: tuple) -> dict:
+        raise NotImplementedError
+
+
+def decimal_to_string(value: Decimal, decimal_places: int) -> str:
+    """Formats decimals the way `serializers.DecimalField` does."""
+    exponent = Decimal(1).scaleb(-decimal_places)
+    return "{:f}".format(value.quantize(exponent, rounding=ROUND_HALF_UP))
+
+
+class FastProductSerializer(FastSerializer):
+    fields = ("id", "name", "price")
+
+    def to_representation(self, row: tuple) -> dict:
+        id, name, price = row
+        return {"id": str(id), "name": name, "price": decimal_to_string(price, 2)}
+
+
+class FastVendingMachineSlotSerializer(FastSerializer):
+    fields = (
+        "id",
+        "quantity",
+        "column",
+        "row",
+        "product__id",
+        "product__name",
+        "product__price",
+    )
+
+    def to_representation(self, row: tuple) -> dict:
+        id, quantity, column, row, product_id, product_name, product_price = row
+        return {
+            "id": str(id),
+            "quantity": quantity,
+            "coordinates": [column, row],
+            "product": {
+                "id": str(product_id),
+                "name": product_name,
+                "price": decimal_to_string(product_price, 2),
+            },
+        }
+
+
+class FastUserSerializer(FastSerializer):
+    fields = ("id", "username", "credit")
+
+    def to_representation(self, row: tuple) -> dict:
+        id, username, credit = row
+        return {
+            "id": str(id),
+            "username": username,
+            "credit": decimal_to_string(credit, 2),
+        }
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.vending.cache import (
+    bump_inventory_version,
+    invalidate_slot_positions,
+    invalidate_slots,
+    invalidate_user_login,
+    remember_slot_machine,
+)
+from apps.vending.changes import record_slot_changes
+from apps.vending.expections import SlotMovedException
+from apps.vending.journal import forget_ledger
+from apps.vending.models import CreditTransaction, Product, User, VendingMachineSlot
+from apps.vending.stock_alerts import (
+    get_low_stock_monitor,
+    report_stock_levels,
+    stock_level,
+)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_machines(sender, instance, created=False, **kwargs):
+    if created:
+        # A new product is not in any slot yet.
+        return
+    forget_ledger(product_ids=[instance.id])
+    slots = dict(
+        VendingMachineSlot.objects.filter(product=instance).values_list(
+            "id", "machine_id"
+        )
+    )
+    record_slot_changes(slots)
+    bump_inventory_version(set(slots.values()))
+    invalidate_slots(slots)
+
+
+@receiver(pre_save, sender=VendingMachineSlot)
+def keep_slot_machine(sender, instance, raw=False, **kwargs):
+    """Refuses to move a slot to another machine.
+
+    The change log and the slot events of a machine would never report
+    that the slot left it, and its cached machine would go stale.
+    """
+    if not raw and not instance._state.adding:
+        moved = (
+            VendingMachineSlot.objects.filter(id=instance.id)
+            .exclude(machine_id=instance.machine_id)
+            .exists()
+        )
+        if moved:
+            raise SlotMovedException()
+
+
+@receiver(post_save, sender=VendingMachineSlot)
+def invalidate_saved_slot_machine(sender, instance, created=False, **kwargs):
+    if created:
+        remember_slot_machine(instance.id, instance.machine_id)
+        invalidate_slot_positions([(instance.column, instance.row)])
+    else:
+        forget_ledger(slot_ids=[instance.id])
+    record_slot_changes({instance.id: instance.machine_id})
+    bump_inventory_version([instance.machine_id])
+    invalidate_slots([instance.id])
+    report_stock_levels(
+        [
+            stock_level(
+                instance.id,
+                instance.machine_id,
+                instance.row,
+                instance.column,
+                instance.quantity,
+                instance.low_stock_threshold,
+            )
+        ]
+    )
+
+
+@receiver(post_delete, sender=VendingMachineSlot)
+def invalidate_deleted_slot_machine(sender, instance, **kwargs):
+    forget_ledger(slot_ids=[instance.id])
+    record_slot_changes({instance.id: instance.machine_id})
+    bump_inventory_version([instance.machine_id])
+    invalidate_slots([instance.id])
+    transaction.on_commit(lambda: get_low_stock_monitor().discard([instance.id]))
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_username(sender, instance, raw=False, **kwargs):
+    """Keeps the username being replaced, so its login is forgotten too."""
+    if not raw and not instance._state.adding:
+        instance._previous_username = (
+            User.objects.filter(id=instance.id)
+            .values_list("username", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_saved_user(sender, instance, created=False, **kwargs):
+    if not created:
+        forget_ledger(user_ids=[instance.id])
+        invalidate_user_login(instance.id, instance.username)
+        previous = getattr(instance, "_previous_username", None)
+        if previous not in (None, instance.username):
+            invalidate_user_login(instance.id, previous)
+
+
+@receiver(post_save, sender=User)
+def open_user_credit(sender, instance, created=False, raw=False, **kwargs):
+    """The credit a user starts with is their first transaction."""
+    if created and not raw and instance.credit:
+        CreditTransaction.objects.create(
+            user=instance, kind=CreditTransaction.Kind.OPENING, amount=instance.credit
+        )
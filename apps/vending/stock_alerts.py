@@ -0,0 +1,282 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.vending.models import VendingMachineSlot
+
+logger = logging.getLogger(__name__)
+
+LEVEL_FIELDS = (
+    "id",
+    "machine_id",
+    "row",
+    "column",
+    "quantity",
+    "low_stock_threshold",
+)
+
+LOW = "low"
+EMPTY = "empty"
+RESTOCKED = "restocked"
+
+
+def slot_levels(slots) -> list[dict]:
+    """Reads the stock level of every slot in the `slots` queryset."""
+    return [stock_level(*row) for row in slots.order_by().values_list(*LEVEL_FIELDS)]
+
+
+def slot_levels_and_products(slots) -> tuple[list[dict], dict]:
+    """Like `slot_levels`, with the product each slot holds by slot id, from
+    the same query."""
+    levels = []
+    products = {}
+    for *fields, product_id in slots.order_by().values_list(
+        *LEVEL_FIELDS, "product_id"
+    ):
+        levels.append(stock_level(*fields))
+        products[fields[0]] = product_id
+    return levels, products
+
+
+def stock_level(
+    slot_id, machine_id, row, column, quantity, threshold, previous=None
+) -> dict:
+    return {
+        "slot_id": slot_id,
+        "machine_id": machine_id,
+        "row": row,
+        "column": column,
+        "quantity": quantity,
+        "threshold": threshold,
+        "previous": previous,
+    }
+
+
+def stock_status(quantity: int, threshold: int):
+    if quantity <= 0:
+        return EMPTY
+    if quantity <= threshold:
+        return LOW
+    return None
+
+
+def report_stock_levels(levels: list[dict]):
+    """Hands the new `levels` of some slots to the monitor on commit.
+
+    Levels should carry the `previous` quantity of the slot when the
+    writer knows it, which is how the monitor tells whether the change
+    crossed the threshold. Levels written by a transaction that rolls back
+    are never reported. Outside of a transaction they are reported right
+    away.
+    """
+    if levels:
+        transaction.on_commit(lambda: get_low_stock_monitor().observe(levels))
+
+
+class LowStockMonitor:
+    """The live set of slots whose quantity is at or below their threshold.
+
+    Purchases and restocks report the levels they leave slots at, so the
+    set is kept up to date without polling the table, and reading it costs
+    the size of the result. An alert goes to every sink whenever a slot
+    runs low, runs empty or is restocked above its threshold.
+
+    Each process keeps its own set, seeded from the database when it is
+    first read. Levels reported by other processes are picked up by
+    reloading it when it is older than `resync_interval` seconds, silently:
+    the process that made a change is the one that alerts about it.
+    """
+
+    def __init__(self, sinks=(), resync_interval: float = 60):
+        self.sinks = list(sinks)
+        self.resync_interval = resync_interval
+        self._slots = {}
+        self._machines = defaultdict(dict)
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Replaces the set with what the database holds, takes the lock."""
+        self._slots = {}
+        self._machines = defaultdict(dict)
+        for level in slot_levels(
+            VendingMachineSlot.objects.filter(quantity__lte=F("low_stock_threshold"))
+        ):
+            self._put(level, stock_status(level["quantity"], level["threshold"]))
+        self._loaded_at = time.monotonic()
+
+    def _put(self, level: dict, status: str):
+        slot = {**level, "status": status}
+        slot.pop("previous", None)
+        self._slots[level["slot_id"]] = slot
+        self._machines[level["machine_id"]][level["slot_id"]] = slot
+
+    def _pop(self, slot_id):
+        slot = self._slots.pop(slot_id, None)
+        if slot is not None:
+            machine_slots = self._machines[slot["machine_id"]]
+            machine_slots.pop(slot_id, None)
+            if not machine_slots:
+                del self._machines[slot["machine_id"]]
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.resync_interval
+        )
+
+    def observe(self, levels: list[dict]):
+        alerts = []
+        with self._lock:
+            for level in levels:
+                status = stock_status(level["quantity"], level["threshold"])
+                if level.get("previous") is not None:
+                    previous = stock_status(level["previous"], level["threshold"])
+                else:
+                    if self._loaded_at is None:
+                        self._load()
+                    slot = self._slots.get(level["slot_id"])
+                    previous = slot and slot["status"]
+                # Until the set is loaded, the load will read this level.
+                if self._loaded_at is not None:
+                    self._pop(level["slot_id"])
+                    if status is not None:
+                        self._put(level, status)
+                if status != previous:
+                    alerts.append(self.alert(level, status or RESTOCKED))
+        if alerts:
+            self.send(alerts)
+
+    def discard(self, slot_ids):
+        with self._lock:
+            for slot_id in slot_ids:
+                self._pop(slot_id)
+
+    def low_stock(self, machine_id=None, status=None) -> list[dict]:
+        with self._lock:
+            if self._is_stale():
+                self._load()
+            if machine_id is None:
+                slots = self._slots.values()
+            else:
+                slots = self._machines.get(machine_id, {}).values()
+            slots = [slot for slot in slots if status in (None, slot["status"])]
+        return sorted(
+            slots,
+            key=lambda slot: (str(slot["machine_id"]), slot["row"], slot["column"]),
+        )
+
+    @staticmethod
+    def alert(level: dict, event: str) -> dict:
+        return {
+            "event": event,
+            **level,
+            "slot_id": str(level["slot_id"]),
+            "machine_id": str(level["machine_id"]),
+            "at": timezone.now().isoformat(),
+        }
+
+    def send(self, alerts: list[dict]):
+        # A sink that is down must not fail the purchase that raised the alert.
+        for sink in self.sinks:
+            try:
+                sink.send(alerts)
+            except Exception:
+                logger.exception("Could not send stock alerts to %r.", sink)
+
+
+class AlertSink:
+    """Where stock alerts go: a pager, a message broker, a ticket queue..."""
+
+    def send(self, alerts: list[dict]):
+        raise NotImplementedError
+
+
+class LoggingAlertSink(AlertSink):
+    def __init__(self, level: int = logging.WARNING):
+        self.level = level
+
+    def send(self, alerts: list[dict]):
+        for alert in alerts:
+            logger.log(
+                self.level,
+                "Slot %s of machine %s is %s (%d left, threshold %d).",
+                alert["slot_id"],
+                alert["machine_id"],
+                alert["event"],
+                alert["quantity"],
+                alert["threshold"],
+            )
+
+
+class FileAlertSink(AlertSink):
+    """Appends every alert to `path` as a line of JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alerts: list[dict]):
+        lines = "".join(json.dumps(alert) + "\n" for alert in alerts)
+        with self._lock, open(self.path, "a") as file:
+            file.write(lines)
+
+
+class QueueAlertSink(AlertSink):
+    """Keeps alerts in memory for a consumer thread, or a test, to `drain`.
+
+    Alerts that do not fit in `maxsize` are dropped and counted.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def send(self, alerts: list[dict]):
+        for alert in alerts:
+            try:
+                self.queue.put_nowait(alert)
+            except queue.Full:
+                self.dropped += 1
+
+    def drain(self) -> list[dict]:
+        alerts = []
+        while True:
+            try:
+                alerts.append(self.queue.get_nowait())
+            except queue.Empty:
+                return alerts
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_low_stock_monitor() -> LowStockMonitor:
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = LowStockMonitor(
+                sinks=[
+                    import_string(path)(**options)
+                    for path, options in settings.VENDING_STOCK_ALERT_SINKS.items()
+                ],
+                resync_interval=settings.VENDING_LOW_STOCK_RESYNC_INTERVAL,
+            )
+        return _monitor
+
+
+def reset_low_stock_monitor():
+    """Forgets the live set, and picks up changed settings on next use."""
+    global _monitor
+    with _monitor_lock:
+        _monitor = None
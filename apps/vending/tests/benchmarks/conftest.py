@@ -0,0 +1,25 @@
+import pytest
+from django.db import connection, connections
+
+
+@pytest.fixture
+def file_database(tmp_path):
+    """Points the default database at a file, WAL does not apply in memory.
+
+    New connections, including those of worker threads, are created from
+    `connections.settings`. The in-memory test database is kept open aside
+    and restored afterwards.
+    """
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite specific")
+    test_database = connections["default"]
+    settings_dict = {
+        **test_database.settings_dict,
+        "NAME": str(tmp_path / "db.sqlite3"),
+    }
+    connections.settings["default"] = settings_dict
+    connections["default"] = connections.create_connection("default")
+    yield settings_dict
+    connections["default"].close()
+    connections.settings["default"] = test_database.settings_dict
+    connections["default"] = test_database
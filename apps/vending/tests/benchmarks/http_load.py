@@ -0,0 +1,129 @@
+"""HTTP load generator comparing deployments of the same endpoint.
+
+Start both deployments against the same database, for example:
+
+    gunicorn vending_machine.wsgi -w 4 --threads 8 -b 127.0.0.1:8000
+    VENDING_ASYNC_VIEWS=1 uvicorn vending_machine.asgi:application \\
+        --workers 4 --port 8001
+
+then drive each of them in turn with the same number of keep-alive
+connections:
+
+    python -m apps.vending.tests.benchmarks.http_load --connections 1000 \\
+        --duration 30 wsgi=http://127.0.0.1:8000/slots/ \\
+        asgi=http://127.0.0.1:8001/slots/
+
+Each target prints one JSON line with requests/sec and latency
+percentiles. Raise `ulimit -n` above the connection count first.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from apps.vending.tests.benchmarks.utils import percentile
+
+
+async def read_response(reader: asyncio.StreamReader) -> tuple[int, bool]:
+    """Reads one response and returns its status and whether to keep alive."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed by server")
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    keep_alive = status_line.startswith(b"HTTP/1.1") and (
+        headers.get("connection", "").lower() != "close"
+    )
+    return int(status_line.split()[1]), keep_alive
+
+
+async def connection_worker(url, deadline, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname, parts.port or 80
+                )
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url: str, connections: int, duration: float) -> dict:
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            connection_worker(url, deadline, latencies, errors)
+            for _ in range(connections)
+        )
+    )
+    elapsed = time.perf_counter() - started
+    result = {
+        "url": url,
+        "connections": connections,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+    }
+    if latencies:
+        for pct in (50, 95, 99):
+            result[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="+", help="label=url pairs to compare")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    for target in args.targets:
+        # Urls may have "=" in their query string, labels may not, and an
+        # unlabelled url has its scheme before the first "=".
+        label, separator, url = target.partition("=")
+        if not separator or "://" in label:
+            label, url = "", target
+        result = asyncio.run(run_load(url, args.connections, args.duration))
+        print(json.dumps({"target": label or url, **result}))
+
+
+if __name__ == "__main__":
+    main()
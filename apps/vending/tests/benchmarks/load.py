@@ -0,0 +1,220 @@
+"""In-process load generator driving the API with a mix of clients.
+
+Every client is a thread with its own test `Client` and database
+connection, picking endpoints at random according to the mix weights. See
+`test_api_load.py` for the settings it is run with.
+"""
+
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from apps.vending.models import Order, VendingMachineSlot
+from apps.vending.tests.benchmarks.utils import percentile
+from apps.vending.tests.factories import (
+    OrderFactory,
+    ProductFactory,
+    UserFactory,
+    VendingMachineFactory,
+    VendingMachineSlotFactory,
+    create_batch_in_bulk,
+)
+
+DEFAULT_MIX = {"slots": 50, "login": 20, "credit": 10, "order": 20}
+
+
+def parse_mix(value: str) -> dict:
+    """Parses `slots=50,order=20` into endpoint weights."""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in REQUESTS:
+            raise ValueError(f"Unknown endpoint {name!r} in the client mix.")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def seed(users: int, machines: int, orders_per_user: int = 5) -> dict:
+    """Builds a fleet with the model factories and bulk inserts it.
+
+    Every machine has a full 10x10 grid of slots, each holding a product of
+    its own, and every user has some order history.
+    """
+    fleet = create_batch_in_bulk(VendingMachineFactory, machines)
+    products = create_batch_in_bulk(
+        ProductFactory, machines * 100, price=Decimal("1.50")
+    )
+    slots = VendingMachineSlot.objects.bulk_create(
+        (
+            VendingMachineSlotFactory.build(
+                machine=fleet[i // 100],
+                product=product,
+                row=i % 100 // 10 + 1,
+                column=i % 10 + 1,
+                quantity=100,
+            )
+            for i, product in enumerate(products)
+        ),
+        batch_size=500,
+    )
+    buyers = create_batch_in_bulk(UserFactory, users, credit=Decimal("9999.99"))
+    rng = random.Random(0)
+    Order.objects.bulk_create(
+        (
+            OrderFactory.build(user=user, product=slot.product, slot=slot)
+            for user in buyers
+            for slot in rng.sample(slots, min(orders_per_user, len(slots)))
+        ),
+        batch_size=500,
+    )
+    return {
+        "users": [(user.id, user.username) for user in buyers],
+        "slots": [(slot.id, slot.product_id) for slot in slots],
+    }
+
+
+def get_slots(client: Client, dataset: dict, rng: random.Random):
+    return client.get("/slots/")
+
+
+def login(client: Client, dataset: dict, rng: random.Random):
+    _, username = rng.choice(dataset["users"])
+    return client.post("/login/", data={"username": username})
+
+
+def update_credit(client: Client, dataset: dict, rng: random.Random):
+    user_id, _ = rng.choice(dataset["users"])
+    return client.patch(
+        f"/users/{user_id}/credit",
+        data={"credit": "9999.99"},
+        content_type="application/json",
+    )
+
+
+def place_order(client: Client, dataset: dict, rng: random.Random):
+    user_id, _ = rng.choice(dataset["users"])
+    slot_id, product_id = rng.choice(dataset["slots"])
+    return client.post(
+        "/order/",
+        data={"user_id": user_id, "slot_id": slot_id, "product_id": product_id},
+    )
+
+
+REQUESTS = {
+    "slots": get_slots,
+    "login": login,
+    "credit": update_credit,
+    "order": place_order,
+}
+
+
+def run_load(dataset: dict, mix: dict, clients: int, requests: int) -> dict:
+    """Sends `requests` requests from `clients` threads, returns the report.
+
+    The report holds the throughput, latency percentiles, mean query count
+    and status codes of each endpoint, and of the whole mix under "total".
+    """
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    def client_worker(index: int) -> list[tuple]:
+        rng = random.Random(index)
+        # Server errors are counted rather than raised.
+        client = Client(raise_request_exception=False)
+        samples = []
+        try:
+            for _ in range(requests // clients):
+                name = rng.choices(names, weights)[0]
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = REQUESTS[name](client, dataset, rng)
+                    elapsed = time.perf_counter() - start
+                samples.append((name, elapsed, response.status_code, len(queries)))
+        finally:
+            connection.close()
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        samples = [
+            sample
+            for worker in pool.map(client_worker, range(clients))
+            for sample in worker
+        ]
+    wall_time = time.perf_counter() - start
+
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample[0]].append(sample)
+        by_endpoint["total"].append(sample)
+    return {
+        name: summarize(endpoint_samples, wall_time)
+        for name, endpoint_samples in sorted(by_endpoint.items())
+    }
+
+
+def summarize(samples: list[tuple], wall_time: float) -> dict:
+    latencies = [elapsed for _, elapsed, _, _ in samples]
+    statuses = Counter(status for _, _, status, _ in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "throughput_rps": round(len(samples) / wall_time, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_queries": round(sum(q for *_, q in samples) / len(samples), 2),
+        "statuses": {str(status): count for status, count in statuses.items()},
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lists the endpoints slower than `baseline` by more than `tolerance`.
+
+    Throughput may drop, and p95 latency and query counts may grow, by at
+    most that fraction of their baseline value.
+    """
+    regressions = []
+    for name, before in baseline.items():
+        after = report.get(name)
+        if after is None:
+            continue
+        checks = [
+            (
+                "throughput_rps",
+                after["throughput_rps"] < before["throughput_rps"] * (1 - tolerance),
+            ),
+            ("p95_ms", after["p95_ms"] > before["p95_ms"] * (1 + tolerance)),
+            (
+                "mean_queries",
+                after["mean_queries"] > before["mean_queries"] * (1 + tolerance),
+            ),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions.append(
+                    f"{name} {metric}: {before[metric]} -> {after[metric]}"
+                )
+    return regressions
+
+
+def load_baseline(path) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, scale: str, report: dict):
+    baseline = load_baseline(path)
+    baseline[scale] = report
+    with open(path, "w") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
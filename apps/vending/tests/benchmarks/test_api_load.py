@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+
+from apps.vending.tests.benchmarks.load import (
+    DEFAULT_MIX,
+    compare,
+    load_baseline,
+    parse_mix,
+    run_load,
+    save_baseline,
+    seed,
+)
+from apps.vending.tests.benchmarks.utils import report, scaled
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+# Users and machines of 100 slots seeded at each scale, before BENCH_SCALE.
+SCALES = {
+    "small": (1_000, 10),
+    "medium": (10_000, 100),
+    "large": (100_000, 1_000),
+}
+
+# The run is configured through the environment:
+#   BENCH_CLIENTS   concurrent clients, 8 by default
+#   BENCH_REQUESTS  requests sent at each scale, 2000 by default
+#   BENCH_MIX       endpoint weights, such as "slots=50,login=20,order=30"
+#   BENCH_BASELINE  JSON file of a previous run to compare with
+#   BENCH_SAVE_BASELINE=1 stores this run in BENCH_BASELINE instead
+#   BENCH_TOLERANCE fraction a metric may regress by, 0.2 by default
+CLIENTS = int(os.environ.get("BENCH_CLIENTS", "8"))
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "2000"))
+MIX = parse_mix(os.environ["BENCH_MIX"]) if "BENCH_MIX" in os.environ else DEFAULT_MIX
+BASELINE = os.environ.get("BENCH_BASELINE")
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "0.2"))
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_api_under_load(file_database, settings, scale):
+    # As deployed: concurrent writers need a file and the production profile.
+    settings.VENDING_SQLITE_PRAGMAS = settings.VENDING_SQLITE_PRODUCTION_PRAGMAS
+    file_database["CONN_MAX_AGE"] = 600
+    call_command("migrate", verbosity=0)
+    users, machines = SCALES[scale]
+    dataset = seed(scaled(users), scaled(machines))
+
+    result = run_load(dataset, MIX, CLIENTS, REQUESTS)
+
+    for endpoint, metrics in result.items():
+        report(
+            "api_load",
+            scale=scale,
+            endpoint=endpoint,
+            clients=CLIENTS,
+            users=len(dataset["users"]),
+            slots=len(dataset["slots"]),
+            **metrics,
+        )
+    if BASELINE and os.environ.get("BENCH_SAVE_BASELINE"):
+        save_baseline(BASELINE, scale, result)
+        return
+    baseline = load_baseline(BASELINE).get(scale)
+    if baseline:
+        regressions = compare(result, baseline, TOLERANCE)
+        report("api_load_regressions", scale=scale, regressions=regressions)
+        assert not regressions, json.dumps(regressions)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+from itertools import cycle
+
+import pytest
+
+from apps.vending.cache import get_cache
+from apps.vending.models import User
+from apps.vending.tests.benchmarks.utils import (
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def throughput(samples: list[float]) -> dict:
+    return {
+        "requests_per_sec": round(len(samples) / sum(samples), 1),
+        **latency_summary(samples),
+    }
+
+
+@pytest.fixture
+def usernames() -> list[str]:
+    size = scaled(100_000)
+    User.objects.bulk_create(
+        (User(username=f"User{i}", credit=Decimal("5.00")) for i in range(size)),
+        batch_size=10_000,
+    )
+    # Logins come from a working set of regulars, as they would on a fleet.
+    return [f"User{i}" for i in range(0, size, max(1, size // 100))]
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "warm"])
+def test_logins_per_second(client, usernames, cached):
+    names = cycle(usernames)
+
+    def log_in():
+        if not cached:
+            get_cache().clear()
+        client.post("/login/", data={"username": next(names)})
+
+    for _ in usernames:
+        log_in()
+    samples = measure(log_in, repeat=1000)
+    report("login", users=User.objects.count(), cached=cached, **throughput(samples))
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "warm"])
+def test_authenticated_reads_per_second(client, usernames, cached):
+    tokens = cycle(
+        [
+            client.post("/login/", data={"username": name}).json()["token"]
+            for name in usernames
+        ]
+    )
+
+    def read_me():
+        if not cached:
+            get_cache().clear()
+        client.get("/me/", HTTP_AUTHORIZATION=f"Bearer {next(tokens)}")
+
+    for _ in usernames:
+        read_me()
+    samples = measure(read_me, repeat=1000)
+    report("me", users=User.objects.count(), cached=cached, **throughput(samples))
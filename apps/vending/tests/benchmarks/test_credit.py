@@ -0,0 +1,45 @@
+import time
+
+import pytest
+from django.core.management import call_command
+
+from apps.vending.credit import credit_mismatches, reconcile_credit
+from apps.vending.models import User
+from apps.vending.seeding import Seeder
+from apps.vending.tests.benchmarks.utils import report, scaled
+from apps.vending.utils import batched
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def seeded_users(file_database):
+    call_command("migrate", verbosity=0)
+    users = scaled(1_000_000)
+    Seeder().seed(products=0, machines=0, users=users, orders=0)
+    return users
+
+
+@pytest.mark.parametrize("batch_size", [1_000, 10_000])
+def test_reconciliation_rate(seeded_users, batch_size):
+    """A full pass over every user, with 1% of the balances drifted."""
+    users = User.objects.order_by("?").values_list("id", flat=True)
+    for batch in batched(users[: max(1, seeded_users // 100)], 500):
+        User.objects.filter(id__in=batch).update(credit=1)
+
+    start = time.perf_counter()
+    mismatches = [user_id for user_id, _, _ in credit_mismatches(batch_size)]
+    checked = time.perf_counter() - start
+    fixed = reconcile_credit(mismatches)
+    fixing = time.perf_counter() - start - checked
+
+    assert fixed == len(mismatches)
+    report(
+        "credit_reconciliation",
+        users=seeded_users,
+        batch_size=batch_size,
+        mismatches=len(mismatches),
+        check_seconds=round(checked, 2),
+        users_per_sec=round(seeded_users / checked),
+        fix_seconds=round(fixing, 3),
+    )
@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+THREADS = 16
+WRITE_EVERY = 5
+
+
+@pytest.mark.parametrize("profile", ["default", "production"])
+def test_mixed_reads_and_writes(file_database, settings, profile):
+    if profile == "production":
+        settings.VENDING_SQLITE_PRAGMAS = settings.VENDING_SQLITE_PRODUCTION_PRAGMAS
+        file_database["CONN_MAX_AGE"] = 600
+    call_command("migrate", verbosity=0)
+
+    slots = create_slots(100)
+    VendingMachineSlot.objects.update(quantity=100)
+    users = User.objects.bulk_create(
+        User(username=f"User{i}", credit=Decimal("9999.99")) for i in range(THREADS)
+    )
+    requests = scaled(2_000)
+
+    def worker(index: int) -> dict:
+        client = Client()
+        user = users[index]
+        samples = {"read": [], "write": [], "errors": 0}
+        try:
+            for i in range(requests):
+                start = time.perf_counter()
+                if i % WRITE_EVERY == 0:
+                    slot = slots[(index * requests + i) % len(slots)]
+                    response = client.post(
+                        "/order/",
+                        data={
+                            "user_id": user.id,
+                            "product_id": slot.product_id,
+                            "slot_id": slot.id,
+                        },
+                    )
+                    kind = "write"
+                else:
+                    response = client.get("/slots/?quantity=50")
+                    kind = "read"
+                samples[kind].append(time.perf_counter() - start)
+                samples["errors"] += response.status_code >= 500
+        finally:
+            connection.close()
+        return samples
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = list(pool.map(worker, range(THREADS)))
+    elapsed = time.perf_counter() - start
+
+    reads = [sample for result in results for sample in result["read"]]
+    writes = [sample for result in results for sample in result["write"]]
+    report(
+        "mixed_reads_and_writes",
+        profile=profile,
+        threads=THREADS,
+        requests_per_sec=round((len(reads) + len(writes)) / elapsed, 1),
+        errors=sum(result["errors"] for result in results),
+        reads=latency_summary(reads),
+        writes=latency_summary(writes),
+    )
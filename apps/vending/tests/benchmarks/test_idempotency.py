@@ -0,0 +1,36 @@
+from decimal import Decimal
+from itertools import count
+
+import pytest
+
+from apps.vending.idempotency import get_idempotency_store
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("retried", [False, True], ids=["new_keys", "retries"])
+def test_retry_storm(client, retried):
+    (slot,) = create_slots(1)
+    VendingMachineSlot.objects.update(quantity=1_000_000)
+    user = User.objects.create(username="kiosk", credit=Decimal("9999.99"))
+    keys = count()
+    data = {"user_id": user.id, "product_id": slot.product_id, "slot_id": slot.id}
+
+    def post():
+        key = "kiosk-retry" if retried else f"kiosk-{next(keys)}"
+        client.post("/order/", data=data, HTTP_IDEMPOTENCY_KEY=key)
+
+    samples = measure(post, repeat=500)
+    report(
+        "order_retry_storm",
+        retried=retried,
+        store=get_idempotency_store().stats(),
+        **latency_summary(samples),
+    )
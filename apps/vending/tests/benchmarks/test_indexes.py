@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def run_query(queryset, table: str, use_indexes: bool):
+    """Runs `queryset` as raw SQL, optionally hiding the table's indexes.
+
+    SQLite's `NOT INDEXED` clause reproduces the pre-migration plans on the
+    same data, so both sides of the comparison share one seeded database.
+    """
+    sql, params = queryset.query.sql_with_params()
+    if not use_indexes:
+        sql = sql.replace(f'FROM "{table}"', f'FROM "{table}" NOT INDEXED', 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+@pytest.fixture
+def skip_unless_sqlite():
+    if connection.vendor != "sqlite":
+        pytest.skip("NOT INDEXED is SQLite specific")
+
+
+@pytest.mark.parametrize("use_indexes", [False, True], ids=["before", "after"])
+def test_login_lookup(skip_unless_sqlite, use_indexes):
+    size = scaled(1_000_000)
+    User.objects.bulk_create(
+        (User(username=f"User{i}", credit=Decimal("5.00")) for i in range(size)),
+        batch_size=10_000,
+    )
+    queryset = User.objects.filter(username=f"User{size // 2}")
+
+    assert len(run_query(queryset, "user", use_indexes)) == 1
+    samples = measure(lambda: run_query(queryset, "user", use_indexes), repeat=50)
+    report(
+        "login_lookup",
+        users=size,
+        indexes=use_indexes,
+        **latency_summary(samples),
+    )
+
+
+@pytest.mark.parametrize("use_indexes", [False, True], ids=["before", "after"])
+def test_filtered_slot_listing(skip_unless_sqlite, use_indexes):
+    size = scaled(100_000)
+    create_slots(size)
+    queryset = VendingMachineSlot.objects.select_related("product").filter(
+        quantity__lte=0
+    )
+
+    rows = run_query(queryset, "vending_machine_slot", use_indexes)
+    samples = measure(
+        lambda: run_query(queryset, "vending_machine_slot", use_indexes), repeat=50
+    )
+    report(
+        "filtered_slot_listing",
+        slots=size,
+        rows=len(rows),
+        indexes=use_indexes,
+        **latency_summary(samples),
+    )
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import pytest
+from django.http import HttpResponse
+from django.test import Client
+
+from apps.health.middleware import PerformanceMiddleware
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+MIDDLEWARE = "apps.health.middleware.PerformanceMiddleware"
+
+
+@pytest.mark.parametrize("instrumented", [False, True], ids=["off", "on"])
+def test_instrumentation_overhead(settings, instrumented):
+    if not instrumented:
+        settings.MIDDLEWARE = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE]
+    client = Client()
+    (slot,) = create_slots(1)
+    VendingMachineSlot.objects.update(quantity=1_000_000)
+    user = User.objects.create(username="kiosk", credit=Decimal("9999.99"))
+    order = {"user_id": user.id, "product_id": slot.product_id, "slot_id": slot.id}
+
+    requests = {
+        "healthcheck": lambda: client.get("/healthcheck/"),
+        "slots_cached": lambda: client.get("/slots/"),
+        "order": lambda: client.post("/order/", data=order),
+    }
+    for name, request in requests.items():
+        measure(request, repeat=50)
+        samples = measure(request, repeat=1000)
+        report(
+            "instrumentation_overhead",
+            request=name,
+            instrumented=instrumented,
+            mean_us=round(sum(samples) / len(samples) * 1e6, 1),
+            **latency_summary(samples),
+        )
+
+
+def test_middleware_cost_per_request(rf):
+    request = rf.get("/healthcheck/")
+    request.resolver_match = None
+    response = HttpResponse("OK")
+    middleware = PerformanceMiddleware(lambda request: response)
+    repeat = 100_000
+
+    bare = sum(measure(lambda: response, repeat=repeat))
+    wrapped = sum(measure(lambda: middleware(request), repeat=repeat))
+    report(
+        "instrumentation_cost_per_request",
+        overhead_us=round((wrapped - bare) / repeat * 1e6, 2),
+    )
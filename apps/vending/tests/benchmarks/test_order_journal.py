@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from itertools import cycle
+
+import pytest
+from django.db import OperationalError, connection
+
+from apps.vending.journal import OrderJournal
+from apps.vending.models import Order, User, VendingMachineSlot
+from apps.vending.purchases import purchase
+from apps.vending.tests.benchmarks.utils import create_slots, report, scaled
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+THREADS = 8
+
+
+@pytest.mark.parametrize("group_commit", [False, True], ids=["off", "on"])
+def test_orders_per_second(tmp_path, group_commit):
+    orders = scaled(20_000)
+    slots = create_slots(100)
+    VendingMachineSlot.objects.update(quantity=orders)
+    users = User.objects.bulk_create(
+        User(username=f"User{i}", credit=Decimal("9999.99")) for i in range(100)
+    )
+    baskets = cycle(
+        (user.id, slot.id, slot.product_id) for user, slot in zip(users, slots)
+    )
+    work = [next(baskets) for _ in range(orders)]
+
+    journal = None
+    place_order = purchase
+    if group_commit:
+        journal = OrderJournal(tmp_path / "orders.journal")
+        journal.open()
+        place_order = journal.purchase
+
+    def place(chunk) -> int:
+        failed = 0
+        try:
+            for basket in chunk:
+                try:
+                    place_order(*basket)
+                except OperationalError:
+                    # Gave up waiting for SQLite's writer lock.
+                    failed += 1
+        finally:
+            connection.close()
+        return failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        failed = sum(pool.map(place, [work[i::THREADS] for i in range(THREADS)]))
+    acknowledged = time.perf_counter() - start
+    if journal is not None:
+        journal.close()
+    committed = time.perf_counter() - start
+
+    assert Order.objects.count() == orders - failed
+    report(
+        "orders_per_second",
+        group_commit=group_commit,
+        orders=orders,
+        threads=THREADS,
+        failed=failed,
+        acknowledged_per_sec=round(orders / acknowledged, 1),
+        committed_per_sec=round(orders / committed, 1),
+    )
@@ -0,0 +1,112 @@
+import time
+from uuid import uuid4
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.vending.ids import uuid7
+from apps.vending.models import Order, User, VendingMachineSlot
+from apps.vending.seeding import Seeder, insert_rows
+from apps.vending.tests.benchmarks.utils import (
+    BENCH_SCALE,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+GENERATORS = {"uuid4": uuid4, "uuid7": uuid7}
+
+
+def index_bytes(name: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [name])
+        return cursor.fetchone()[0]
+
+
+def primary_key_index() -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = 'order' AND sql IS NULL"
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.parametrize("key", GENERATORS)
+def test_order_inserts(file_database, settings, key):
+    """Orders inserted one batch per transaction, as the order journal does,
+    into a table that grows to `orders` rows. Ids are made as the orders
+    come, so random keys land anywhere in the index while time-ordered ones
+    land at its end.
+
+    Runs with the production pragmas, the page cache scaled like the data
+    so that the index outgrows it as a full-size one would.
+    """
+    pragmas = settings.VENDING_SQLITE_PRODUCTION_PRAGMAS
+    settings.VENDING_SQLITE_PRAGMAS = {
+        **pragmas,
+        "cache_size": -max(1024, int(-pragmas["cache_size"] * BENCH_SCALE)),
+        "mmap_size": 0,
+    }
+    call_command("migrate", verbosity=0)
+    orders = scaled(10_000_000)
+    batch_size = 1_000
+    Seeder().seed(products=100, machines=10, users=10_000, orders=0)
+    users = [id.hex for id in User.objects.values_list("id", flat=True)]
+    slots = [
+        (slot_id.hex, product_id.hex)
+        for slot_id, product_id in VendingMachineSlot.objects.values_list(
+            "id", "product_id"
+        )
+    ]
+    new_id = GENERATORS[key]
+    fields = ["id", "user", "product", "slot", "created_at"]
+
+    inserting = 0
+    rates = []
+    for batch_start in range(0, orders, batch_size):
+        created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+        rows = [
+            (
+                new_id().hex,
+                users[index % len(users)],
+                *slots[index % len(slots)][::-1],
+                created_at,
+            )
+            for index in range(batch_start, min(orders, batch_start + batch_size))
+        ]
+        batch_started = time.perf_counter()
+        with transaction.atomic():
+            insert_rows(Order, fields, rows)
+        newest = {row[0] for row in rows}
+        seconds = time.perf_counter() - batch_started
+        inserting += seconds
+        rates.append(len(rows) / seconds)
+
+    # With time-ordered keys the latest orders are the end of the primary
+    # key index, otherwise they take a full scan and sort of the table.
+    latest_by_date = Order.objects.order_by("-created_at").values_list("id")
+    latest_by_id = Order.objects.order_by("-id").values_list("id")
+    newest_first = {id.hex for (id,) in latest_by_id[:50]} <= newest
+    tail = rates[-max(1, len(rates) // 10) :]
+    report(
+        "order_primary_keys",
+        key=key,
+        orders=orders,
+        rows_per_sec=round(orders / inserting),
+        last_10pct_rows_per_sec=round(sum(tail) / len(tail)),
+        primary_key_index_mb=round(index_bytes(primary_key_index()) / 2**20, 1),
+        table_mb=round(index_bytes("order") / 2**20, 1),
+        latest_by_created_at=latency_summary(
+            measure(lambda: list(latest_by_date[:50]), repeat=10)
+        ),
+        latest_by_id_is_newest=newest_first,
+        latest_by_id=latency_summary(
+            measure(lambda: list(latest_by_id[:50]), repeat=10)
+        ),
+    )
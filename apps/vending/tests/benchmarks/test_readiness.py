@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from apps.health.checks import readiness_probe
+from apps.vending.tests.benchmarks.utils import latency_summary, measure, report
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("interval", [0, 5], ids=["uncached", "cached"])
+def test_readiness_probe_cost(settings, interval):
+    settings.HEALTH_READINESS_INTERVAL = interval
+    readiness_probe.clear()
+    client = Client()
+    repeat = 2000
+
+    with CaptureQueriesContext(connection) as queries:
+        samples = measure(lambda: client.get("/healthcheck/ready/"), repeat=repeat)
+    report(
+        "readiness_probe",
+        interval=interval,
+        probes=repeat,
+        queries=len(queries),
+        mean_us=round(sum(samples) / len(samples) * 1e6, 1),
+        **latency_summary(samples),
+    )
+    readiness_probe.clear()
+
+
+def test_concurrent_probes_share_one_run(settings):
+    settings.HEALTH_READINESS_INTERVAL = 5
+    readiness_probe.clear()
+    runs = []
+    run = readiness_probe.run
+
+    def counted_run():
+        runs.append(1)
+        return run()
+
+    readiness_probe.run = counted_run
+    try:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda _: readiness_probe.result(), range(5000)))
+    finally:
+        del readiness_probe.run
+        readiness_probe.clear()
+
+    assert all(result["ok"] for result in results)
+    report("readiness_concurrent_probes", probes=len(results), check_runs=len(runs))
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.vending.inventory import apply_restock
+from apps.vending.models import VendingMachineSlot
+from apps.vending.tests.benchmarks.utils import create_slots, report, scaled
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def test_restock_fleet():
+    size = scaled(10_000)
+    slots = create_slots(size)
+    lines = [
+        {
+            "machine_id": slot.machine_id,
+            "row": slot.row,
+            "column": slot.column,
+            "product_id": slot.product_id,
+            "quantity": 100,
+        }
+        for slot in slots
+    ]
+
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        apply_restock(lines)
+    report(
+        "restock_bulk",
+        slots=size,
+        queries=len(queries),
+        seconds=round(time.perf_counter() - start, 3),
+    )
+
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        for slot in VendingMachineSlot.objects.all():
+            slot.quantity = 50
+            slot.save()
+    report(
+        "restock_per_row_save",
+        slots=size,
+        queries=len(queries),
+        seconds=round(time.perf_counter() - start, 3),
+    )
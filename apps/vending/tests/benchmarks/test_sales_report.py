@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from django.db.models import Count, Sum
+
+from apps.vending.models import Order, SalesRollup, User
+from apps.vending.reports import current_hour, sales_report
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+HOURS = 24
+
+
+@pytest.mark.parametrize("order_count", [10_000, 100_000, 1_000_000, 10_000_000])
+def test_sales_report_latency(order_count):
+    size = scaled(order_count)
+    slots = create_slots(100)
+    user = User.objects.create(username="buyer", credit=0)
+    start = current_hour() - timedelta(hours=HOURS)
+
+    Order.objects.bulk_create(
+        (
+            Order(
+                user=user,
+                product_id=slots[i % len(slots)].product_id,
+                slot=slots[i % len(slots)],
+            )
+            for i in range(size)
+        ),
+        batch_size=10_000,
+    )
+    SalesRollup.objects.bulk_create(
+        SalesRollup(
+            hour=start + timedelta(hours=hour),
+            product_id=slot.product_id,
+            slot=slot,
+            units=size // (HOURS * len(slots)),
+            revenue=slot.product.price * (size // (HOURS * len(slots))),
+        )
+        for hour in range(HOURS)
+        for slot in slots
+    )
+
+    samples = measure(sales_report, repeat=20)
+    report("sales_report_rollups", orders=size, **latency_summary(samples))
+
+    def scan_orders():
+        list(
+            Order.objects.values("product_id").annotate(
+                units=Count("id"), revenue=Sum("product__price")
+            )
+        )
+
+    samples = measure(scan_orders, repeat=5)
+    report("sales_report_order_scan", orders=size, **latency_summary(samples))
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+from django.core.management import call_command
+
+from apps.vending.seeding import Seeder
+from apps.vending.tests.benchmarks.utils import report, scaled
+from apps.vending.tests.factories import (
+    UserFactory,
+    create_batch_in_bulk,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def empty_file_database(file_database):
+    call_command("migrate", verbosity=0)
+    return file_database
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "create_batch",
+        "create_batch_in_bulk",
+        "seeder",
+    ],
+)
+def test_user_seeding_rate(empty_file_database, method):
+    size = scaled(100_000)
+    start = time.perf_counter()
+    if method == "create_batch":
+        UserFactory.create_batch(size)
+    elif method == "create_batch_in_bulk":
+        create_batch_in_bulk(UserFactory, size)
+    else:
+        Seeder().seed(products=0, machines=0, users=size, orders=0)
+    elapsed = time.perf_counter() - start
+    report("seed_users", method=method, rows=size, rows_per_sec=round(size / elapsed))
+
+
+def test_seed_command_rate(empty_file_database):
+    """The whole dataset, orders and rollups included, secondary indexes
+    rebuilt at the end.
+    """
+    orders = scaled(1_000_000)
+    seeder = Seeder()
+    start = time.perf_counter()
+    counts = seeder.seed(
+        products=scaled(10_000),
+        machines=scaled(1_000),
+        users=scaled(100_000),
+        orders=orders,
+    )
+    elapsed = time.perf_counter() - start
+
+    rows = sum(counts.values())
+    inserting = sum(seeder.timings.values())
+    report(
+        "seed_command",
+        orders=orders,
+        rows=rows,
+        seconds=round(elapsed, 2),
+        rows_per_sec=round(rows / elapsed),
+        insert_rows_per_sec=round(rows / inserting),
+    )
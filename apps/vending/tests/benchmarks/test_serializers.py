@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+from apps.vending.models import VendingMachineSlot
+from apps.vending.serializers import (
+    FastVendingMachineSlotSerializer,
+    VendingMachineSlotSerializer,
+)
+from apps.vending.tests.benchmarks.utils import create_slots, report, scaled
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize(
+    "serializer_class",
+    [VendingMachineSlotSerializer, FastVendingMachineSlotSerializer],
+)
+def test_slot_serialization_throughput(serializer_class):
+    size = scaled(10_000)
+    create_slots(size)
+    queryset = VendingMachineSlot.objects.select_related("product")
+
+    start = time.perf_counter()
+    data = serializer_class(queryset, many=True).data
+    elapsed = time.perf_counter() - start
+
+    assert len(data) == size
+    report(
+        "slot_serialization",
+        serializer=serializer_class.__name__,
+        rows=size,
+        rows_per_sec=round(size / elapsed),
+    )
@@ -0,0 +1,49 @@
+import pytest
+
+from apps.vending.cache import bump_inventory_version
+from apps.vending.changes import record_slot_changes
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("grid_size", [1_000, 10_000, 100_000])
+@pytest.mark.parametrize("changed", [1, 10, 100])
+def test_change_polling_vs_full_listing(client, grid_size, changed):
+    """A kiosk catching up with `changed` slot changes."""
+    size = scaled(grid_size)
+    slots = create_slots(size)
+    since = client.get("/slots/changes").json()["next"]
+    record_slot_changes({slot.id: slot.machine_id for slot in slots[:changed]})
+
+    response = client.get("/slots/changes", data={"since": since})
+    assert len(response.json()["slots"]) == min(changed, size)
+    samples = measure(
+        lambda: client.get("/slots/changes", data={"since": since}), repeat=50
+    )
+    report(
+        "slot_changes_poll",
+        slots=size,
+        changed=changed,
+        response_bytes=len(response.content),
+        **latency_summary(samples),
+    )
+
+    def uncached_listing():
+        bump_inventory_version()
+        return client.get("/slots/")
+
+    samples = measure(uncached_listing, repeat=10)
+    report(
+        "slot_full_listing",
+        slots=size,
+        changed=changed,
+        response_bytes=len(uncached_listing().content),
+        **latency_summary(samples),
+    )
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from apps.vending.cache import bump_inventory_version, invalidate_slots
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("fleet_size", [1_000, 10_000, 100_000])
+def test_single_slot_refresh_vs_list_polling(client, fleet_size):
+    """A kiosk refreshing one button after each sale on its machine.
+
+    The sale is simulated by the cache invalidations an order makes, so
+    only the cost of the refresh itself is measured.
+    """
+    size = scaled(fleet_size)
+    slots = create_slots(size)
+    machine_id = slots[0].machine_id
+    machine_slots = [slot.id for slot in slots if slot.machine_id == machine_id]
+    rng = random.Random(0)
+
+    def refresh(url_of):
+        def sell_and_refresh():
+            sold = rng.choice(machine_slots)
+            bump_inventory_version([machine_id])
+            invalidate_slots([sold])
+            return client.get(url_of(sold))
+
+        size_bytes = len(sell_and_refresh().content)
+        return size_bytes, measure(sell_and_refresh, repeat=100)
+
+    urls = {
+        "full_list": lambda sold: "/slots/",
+        "machine_list": lambda sold: f"/machines/{machine_id}/slots/",
+        "sold_slot": lambda sold: f"/slots/{sold}",
+        "other_slot": lambda sold: f"/slots/{machine_slots[0]}",
+    }
+    for name, url_of in urls.items():
+        size_bytes, samples = refresh(url_of)
+        report(
+            "slot_refresh",
+            fleet=size,
+            method=name,
+            response_bytes=size_bytes,
+            **latency_summary(samples),
+        )
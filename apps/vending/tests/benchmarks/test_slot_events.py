@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+
+from apps.vending.async_views import AsyncSlotEventsView
+from apps.vending.changes import record_slot_changes
+from apps.vending.events import get_slot_event_hub
+from apps.vending.tests.benchmarks.utils import create_slots, percentile, report
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("subscribers", [1_000, 5_000])
+def test_fan_out_latency(subscribers, django_capture_on_commit_callbacks):
+    """Time from a committed change to its event in every open stream.
+
+    All streams are held by one event loop, as in one ASGI worker, and read
+    through the view's stream generator without the HTTP layers around it.
+    The change is made on another thread, like a request would.
+    """
+    (slot,) = create_slots(1)
+    view = AsyncSlotEventsView()
+    hub = get_slot_event_hub()
+    rounds = 20
+    sent = []
+    received = [[] for _ in range(subscribers)]
+
+    @sync_to_async
+    def change_slot():
+        with django_capture_on_commit_callbacks(execute=True):
+            record_slot_changes({slot.id: slot.machine_id})
+            sent.append(time.perf_counter())
+
+    async def scenario():
+        rounds_delivered = [[0, asyncio.Event()] for _ in range(rounds)]
+
+        async def track(index: int):
+            times = received[index]
+            stream = view.stream(None, None)
+            await anext(stream)
+            for delivered in rounds_delivered:
+                await anext(stream)
+                times.append(time.perf_counter())
+                delivered[0] += 1
+                if delivered[0] == subscribers:
+                    delivered[1].set()
+            await stream.aclose()
+
+        tasks = [asyncio.create_task(track(index)) for index in range(subscribers)]
+        while hub.subscriber_count < subscribers:
+            await asyncio.sleep(0.01)
+        for delivered in rounds_delivered:
+            await change_slot()
+            await delivered[1].wait()
+        await asyncio.gather(*tasks)
+
+    async_to_sync(scenario)()
+
+    latencies = [
+        times[index] - sent[index] for times in received for index in range(rounds)
+    ]
+    fan_out = [
+        max(times[index] for times in received) - sent[index] for index in range(rounds)
+    ]
+    report(
+        "slot_events_fan_out",
+        subscribers=subscribers,
+        events=rounds,
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        all_delivered_p50_ms=round(percentile(fan_out, 50) * 1000, 3),
+        all_delivered_max_ms=round(max(fan_out) * 1000, 3),
+    )
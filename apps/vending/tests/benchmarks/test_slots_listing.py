@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.vending.cache import bump_inventory_version
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("grid_size", [100, 1_000, 10_000])
+def test_list_slots_latency(client, grid_size):
+    size = scaled(grid_size)
+    create_slots(size)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/slots/")
+    query_count = len(queries)
+    assert len(response.json()) == size
+    assert query_count == 1
+
+    def uncached_get():
+        bump_inventory_version()
+        client.get("/slots/")
+
+    samples = measure(uncached_get, repeat=50)
+    report("list_slots", rows=size, queries=query_count, **latency_summary(samples))
+
+    samples = measure(lambda: client.get("/slots/"), repeat=50)
+    report("list_slots_cached", rows=size, **latency_summary(samples))
+
+    etag = client.get("/slots/").headers["ETag"]
+    samples = measure(lambda: client.get("/slots/", HTTP_IF_NONE_MATCH=etag), 50)
+    report("list_slots_not_modified", rows=size, **latency_summary(samples))
+
+
+@pytest.mark.parametrize("fleet_size", [10, 100, 1_000])
+def test_machine_listing_under_fleet_orders(client, fleet_size):
+    """One machine's listing while every other machine keeps selling."""
+    slots = create_slots(scaled(fleet_size * 100))
+    machine_id = slots[0].machine_id
+    others = sorted({slot.machine_id for slot in slots} - {machine_id})
+    url = f"/machines/{machine_id}/slots/"
+
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {queries[0]['sql']}")
+        plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+
+    etag = client.get(url).headers["ETag"]
+
+    def poll_while_others_sell():
+        bump_inventory_version(others[:1])
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert poll_while_others_sell().status_code == 304
+    samples = measure(poll_while_others_sell, repeat=50)
+    report(
+        "machine_listing_not_modified",
+        machines=len(others) + 1,
+        plan=plan,
+        **latency_summary(samples),
+    )
+
+    def uncached_get():
+        bump_inventory_version([machine_id])
+        client.get(url)
+
+    samples = measure(uncached_get, repeat=50)
+    report("machine_listing", machines=len(others) + 1, **latency_summary(samples))
@@ -0,0 +1,39 @@
+import tracemalloc
+
+import pytest
+
+from apps.vending.tests.benchmarks.utils import create_slots, report, scaled
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def consume(response):
+    for _ in response.streaming_content:
+        pass
+
+
+@pytest.mark.parametrize("grid_size", [10_000, 100_000])
+def test_listing_peak_memory(client, grid_size):
+    size = scaled(grid_size)
+    create_slots(size)
+    # Warm up so that lazy imports do not count against either side.
+    client.get("/slots/?limit=1")
+
+    full = peak_memory(lambda: client.get("/slots/").content)
+    streamed = peak_memory(lambda: consume(client.get("/slots/?stream=true")))
+
+    report(
+        "slots_peak_memory",
+        rows=size,
+        full_listing_kib=full // 1024,
+        streamed_kib=streamed // 1024,
+    )
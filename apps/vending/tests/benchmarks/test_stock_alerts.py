@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+import pytest
+
+from apps.vending.cache import bump_inventory_version
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.purchases import purchase
+from apps.vending.stock_alerts import get_low_stock_monitor
+from apps.vending.tests.benchmarks.utils import (
+    create_slots,
+    latency_summary,
+    measure,
+    report,
+    scaled,
+)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.mark.parametrize("fleet_size", [1_000, 10_000, 100_000])
+def test_low_stock_polling_vs_live_set(client, fleet_size):
+    """What ops pay to find low slots while orders keep the catalogue fresh."""
+    size = scaled(fleet_size)
+    create_slots(size)
+    low = VendingMachineSlot.objects.filter(quantity__lte=2).count()
+
+    def poll_after_an_order():
+        bump_inventory_version()
+        client.get("/slots/", data={"quantity": 2})
+
+    samples = measure(poll_after_an_order, repeat=50)
+    report("low_stock_polling", slots=size, low=low, **latency_summary(samples))
+
+    assert len(client.get("/slots/low-stock").json()) == low
+    samples = measure(lambda: client.get("/slots/low-stock"), repeat=50)
+    report("low_stock_live_set", slots=size, low=low, **latency_summary(samples))
+
+
+def test_purchase_cost_of_stock_events(django_capture_on_commit_callbacks):
+    (slot,) = create_slots(1)
+    VendingMachineSlot.objects.update(quantity=100)
+    user = User.objects.create(username="kiosk", credit=Decimal("9999.99"))
+    get_low_stock_monitor().low_stock()
+
+    def buy():
+        with django_capture_on_commit_callbacks(execute=True):
+            purchase(user.id, slot.id, slot.product_id)
+
+    samples = measure(buy, repeat=90)
+    report("purchase_with_stock_events", **latency_summary(samples))
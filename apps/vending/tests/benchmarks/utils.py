@@ -0,0 +1,63 @@
+import json
+import os
+import time
+from decimal import Decimal
+
+# Benchmarks are sized for production-like data, which takes a while to
+# seed. BENCH_SCALE shrinks every size, set it to 1 for full-size runs.
+BENCH_SCALE = float(os.environ.get("BENCH_SCALE", "0.1"))
+
+
+def scaled(size: int) -> int:
+    return max(1, int(size * BENCH_SCALE))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, repeat: int) -> list[float]:
+    """Returns the wall time in seconds of `repeat` calls to `func`."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def latency_summary(samples: list[float]) -> dict:
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def report(name: str, **metrics):
+    """Prints one JSON line per result, run pytest with `-s` to see them."""
+    print(json.dumps({"benchmark": name, **metrics}))
+
+
+def create_slots(size: int, machine_size: int = 100) -> list:
+    """Seeds `size` slots spread over machines of `machine_size` slots."""
+    from apps.vending.models import Product, VendingMachine, VendingMachineSlot
+
+    machines = VendingMachine.objects.bulk_create(
+        VendingMachine(name=f"Machine {i}")
+        for i in range((size + machine_size - 1) // machine_size)
+    )
+    products = Product.objects.bulk_create(
+        Product(name=f"Product {i}", price=Decimal("1.50")) for i in range(size)
+    )
+    return VendingMachineSlot.objects.bulk_create(
+        VendingMachineSlot(
+            machine=machines[i // machine_size],
+            product=product,
+            quantity=i % 10,
+            row=i % machine_size // 10 + 1,
+            column=i % 10 + 1,
+        )
+        for i, product in enumerate(products)
+    )
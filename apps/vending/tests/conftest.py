@@ -0,0 +1,16 @@
+import pytest
+from django.core.cache import caches
+
+from apps.vending.events import reset_slot_event_hub
+from apps.vending.idempotency import reset_idempotency_store
+from apps.vending.stock_alerts import reset_low_stock_monitor
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Cached inventory outlives the per-test database rollback."""
+    for cache in caches.all():
+        cache.clear()
+    reset_idempotency_store()
+    reset_low_stock_monitor()
+    reset_slot_event_hub()
@@ -4,7 +4,13 @@ from datetime import datetime
 import factory
 from factory.django import DjangoModelFactory
 
-from apps.vending.models import Order, Product, User, VendingMachineSlot
+from apps.vending.models import (
+    Order,
+    Product,
+    User,
+    VendingMachine,
+    VendingMachineSlot,
+)
 
 
 class ProductFactory(DjangoModelFactory):
@@ -17,10 +23,18 @@ class ProductFactory(DjangoModelFactory):
     updated_at = datetime(2023, 5, 30, 23)
 
 
+class VendingMachineFactory(DjangoModelFactory):
+    class Meta:
+        model = VendingMachine
+
+    name = factory.Sequence(lambda n: "Machine %d" % n)
+
+
 class VendingMachineSlotFactory(DjangoModelFactory):
     class Meta:
         model = VendingMachineSlot
 
+    machine = factory.SubFactory(VendingMachineFactory)
     product = factory.SubFactory(ProductFactory)
     quantity = 10
     row = 0
@@ -42,3 +56,13 @@ class OrderFactory(DjangoModelFactory):
     user = factory.SubFactory(UserFactory)
     product = factory.SubFactory(ProductFactory)
     slot = factory.SubFactory(VendingMachineSlotFactory)
+
+
+def create_batch_in_bulk(factory_class, size: int, batch_size: int = 500, **kwargs):
+    """Like `create_batch`, but saved with `bulk_create` instead of one INSERT
+    per object. Related objects are not created: pass saved instances for
+    the foreign keys in `kwargs`.
+    """
+    return factory_class._meta.model.objects.bulk_create(
+        factory_class.build_batch(size, **kwargs), batch_size=batch_size
+    )
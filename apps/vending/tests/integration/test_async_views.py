@@ -0,0 +1,153 @@
+import json
+from unittest.mock import ANY
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import path
+from rest_framework import status
+
+from apps.health.views import async_healthcheck
+from apps.vending.async_views import AsyncAuthView, AsyncVendingMachineSlotView
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+urlpatterns = [
+    path("healthcheck/", async_healthcheck),
+    path("slots/", AsyncVendingMachineSlotView.as_view()),
+    path("machines/<uuid:machine_id>/slots/", AsyncVendingMachineSlotView.as_view()),
+    path("login/", AsyncAuthView.as_view()),
+]
+
+pytestmark = [pytest.mark.urls(__name__), pytest.mark.django_db]
+
+
+def test_async_healthcheck(client):
+    response = client.get("/healthcheck/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b"OK"
+
+
+class TestAsyncListSlots:
+    def test_matches_sync_view_payload(self, client):
+        for column in range(1, 4):
+            VendingMachineSlotFactory(row=1, column=column, quantity=column)
+
+        response = client.get("/slots/?quantity=2")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {
+                "id": ANY,
+                "quantity": quantity,
+                "coordinates": [quantity, 1],
+                "product": {"id": ANY, "name": ANY, "price": "10.40"},
+            }
+            for quantity in (1, 2)
+        ]
+
+    def test_unchanged_poll_returns_not_modified(self, client):
+        VendingMachineSlotFactory()
+        etag = client.get("/slots/").headers["ETag"]
+
+        response = client.get("/slots/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_invalid_quantity_filter_returns_bad_request(self, client):
+        response = client.get("/slots/?quantity=-1")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {
+            "quantity": ["Ensure this value is greater than or equal to 0."]
+        }
+
+
+class TestAsyncSlotPagination:
+    @pytest.fixture
+    def slots(self):
+        return [
+            VendingMachineSlotFactory(row=row, column=column, quantity=column)
+            for row in range(1, 3)
+            for column in range(1, 4)
+        ]
+
+    def test_pages_cover_the_full_listing_in_order(self, client, slots):
+        full_listing = client.get("/slots/").json()
+
+        pages, cursor = [], ""
+        while True:
+            response = client.get(f"/slots/?limit=4&cursor={cursor}")
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            pages.append(page["results"])
+            if not (cursor := page["next"]):
+                break
+
+        assert [len(page) for page in pages] == [4, 2]
+        assert [slot for page in pages for slot in page] == full_listing
+
+    def test_pages_of_a_machine(self, client, slots):
+        other = VendingMachineSlotFactory(row=1, column=1)
+
+        response = client.get(f"/machines/{other.machine_id}/slots/?limit=2")
+
+        assert response.json() == {
+            "results": [
+                {
+                    "id": str(other.id),
+                    "quantity": ANY,
+                    "coordinates": [1, 1],
+                    "product": ANY,
+                }
+            ],
+            "next": None,
+        }
+
+    def test_invalid_cursor_returns_bad_request(self, client):
+        response = client.get("/slots/?cursor=forged")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"cursor": ["Invalid cursor."]}
+
+    def test_stream_matches_full_listing(
+        self, async_client, client, slots, monkeypatch
+    ):
+        monkeypatch.setattr(AsyncVendingMachineSlotView, "stream_chunk_size", 4)
+
+        async def read_stream():
+            response = await async_client.get("/slots/?stream=true")
+            assert response.streaming
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        body = async_to_sync(read_stream)()
+
+        assert json.loads(body) == client.get("/slots/").json()
+
+
+class TestAsyncLogin:
+    def test_login_with_form_data(self, client):
+        UserFactory(username="user1")
+
+        response = client.post("/login/", data={"username": "user1"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "id": ANY,
+            "username": "user1",
+            "credit": "100.00",
+            "token": ANY,
+        }
+
+    def test_login_with_json(self, client):
+        UserFactory(username="user1")
+
+        response = client.post(
+            "/login/", data={"username": "user1"}, content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_login_unknown_user(self, client):
+        response = client.post("/login/", data={"username": "nobody"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,142 @@
+from decimal import Decimal
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from apps.vending.auth import issue_token
+from apps.vending.models import User
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+
+@pytest.fixture
+def user() -> User:
+    return UserFactory(username="user1", credit=Decimal("20.00"))
+
+
+def login(client, username="user1") -> str:
+    return client.post("/login/", data={"username": username}).json()["token"]
+
+
+def me(client, token):
+    return client.get("/me/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+
+@pytest.mark.django_db
+class TestTokenLogin:
+    def test_cold_login_reads_the_user_once(
+        self, client, user, django_assert_num_queries
+    ):
+        with django_assert_num_queries(1):
+            response = client.post("/login/", data={"username": "user1"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["credit"] == "20.00"
+
+    def test_warm_login_skips_the_database(
+        self, client, user, django_assert_num_queries
+    ):
+        login(client)
+
+        with django_assert_num_queries(0):
+            response = client.post("/login/", data={"username": "user1"})
+
+        assert response.json()["id"] == str(user.id)
+
+    def test_deleted_user_cannot_log_in(self, client, user):
+        login(client)
+        user.delete()
+
+        response = client.post("/login/", data={"username": "user1"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_renamed_user_cannot_log_in_with_the_old_name(self, client, user):
+        login(client)
+        user.username = "user2"
+        user.save()
+
+        response = client.post("/login/", data={"username": "user1"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert login(client, "user2")
+
+
+@pytest.mark.django_db
+class TestMe:
+    def test_returns_the_caller_without_queries(
+        self, client, user, django_assert_num_queries
+    ):
+        token = login(client)
+
+        with django_assert_num_queries(0):
+            response = me(client, token)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "id": str(user.id),
+            "username": "user1",
+            "credit": "20.00",
+        }
+
+    def test_requires_a_token(self, client):
+        response = client.get("/me/")
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_rejects_forged_tokens(self, client, user):
+        token = login(client)
+
+        response = me(client, token[:-1] + ("A" if token[-1] != "A" else "B"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    @override_settings(VENDING_AUTH_TOKEN_MAX_AGE=-1)
+    def test_rejects_expired_tokens(self, client, user):
+        response = me(client, issue_token(user.id, user.username))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_credit_update_invalidates_cached_credit(self, client, user):
+        token = login(client)
+
+        client.patch(
+            reverse("credit_view", kwargs={"user_id": user.id}),
+            data={"credit": "55.00"},
+            content_type="application/json",
+        )
+
+        assert me(client, token).json()["credit"] == "55.00"
+
+    def test_order_invalidates_cached_credit(self, client, user):
+        token = login(client)
+        slot = VendingMachineSlotFactory(quantity=1)
+
+        client.post(
+            "/order/",
+            data={
+                "user_id": user.id,
+                "product_id": slot.product.id,
+                "slot_id": slot.id,
+            },
+        )
+
+        assert me(client, token).json()["credit"] == "9.60"
+
+    def test_batch_order_invalidates_cached_credit(self, client, user):
+        token = login(client)
+        slot = VendingMachineSlotFactory(quantity=1)
+
+        client.post(
+            "/order/batch/",
+            data={
+                "user_id": str(user.id),
+                "lines": [
+                    {"product_id": str(slot.product.id), "slot_id": str(slot.id)}
+                ],
+            },
+            content_type="application/json",
+        )
+
+        assert me(client, token).json()["credit"] == "9.60"
@@ -0,0 +1,128 @@
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from rest_framework import status
+
+from apps.vending.models import Order
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+
+@pytest.fixture
+def slots():
+    return [
+        VendingMachineSlotFactory(row=1, column=column, quantity=2)
+        for column in range(1, 4)
+    ]
+
+
+def batch_payload(user, lines):
+    return {
+        "user_id": str(user.id),
+        "lines": [
+            {"slot_id": str(slot.id), "product_id": str(slot.product.id)}
+            for slot in lines
+        ],
+    }
+
+
+@pytest.mark.django_db
+class TestBatchOrder:
+    def test_batch_order_buys_every_line(self, client, slots):
+        user = UserFactory()
+        lines = [slots[0], slots[0], slots[1], slots[2]]
+
+        response = client.post(
+            "/order/batch/",
+            data=batch_payload(user, lines),
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.json()["orders"]) == 4
+        assert Order.objects.filter(user=user).count() == 4
+        user.refresh_from_db()
+        assert user.credit == Decimal("58.40")
+        for slot, expected in zip(slots, [0, 1, 1]):
+            slot.refresh_from_db()
+            assert slot.quantity == expected
+
+    @pytest.mark.parametrize("line_count", [1, 10, 100])
+    def test_batch_order_query_count_is_fixed(
+        self, client, django_assert_num_queries, line_count
+    ):
+        user = UserFactory(credit=Decimal("9999.99"))
+        slots = [
+            VendingMachineSlotFactory(row=i // 10 + 1, column=i % 10 + 1, quantity=1)
+            for i in range(line_count)
+        ]
+
+        # savepoint, slots, products, user, slot update, orders, credit
+        # transactions, rollup insert and update, slot changes, release
+        with django_assert_num_queries(11):
+            response = client.post(
+                "/order/batch/",
+                data=batch_payload(user, slots),
+                content_type="application/json",
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+
+    def test_batch_order_reports_every_failing_line(self, client, slots):
+        user = UserFactory()
+        payload = batch_payload(user, [slots[0], slots[0], slots[0], slots[1]])
+        payload["lines"].append({"slot_id": str(uuid4()), "product_id": str(uuid4())})
+        payload["lines"].append(
+            {"slot_id": str(uuid4()), "product_id": str(slots[1].product.id)}
+        )
+        payload["lines"].append(
+            {"slot_id": str(slots[2].id), "product_id": str(slots[1].product.id)}
+        )
+
+        response = client.post(
+            "/order/batch/", data=payload, content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["lines"] == [
+            {"line": 2, "error": f"{slots[0].product.name} is out of stock. "},
+            {"line": 4, "error": "Product does not exist."},
+            {"line": 5, "error": "Slot does not exist."},
+            {"line": 6, "error": "Product is not in this slot. "},
+        ]
+        assert not Order.objects.exists()
+        slots[0].refresh_from_db()
+        assert slots[0].quantity == 2
+
+    def test_batch_order_without_enough_credit_changes_nothing(self, client, slots):
+        user = UserFactory(credit=Decimal("20.00"))
+
+        response = client.post(
+            "/order/batch/",
+            data=batch_payload(user, slots),
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"error": "You do not have enough credit. "}
+        assert not Order.objects.exists()
+        user.refresh_from_db()
+        assert user.credit == Decimal("20.00")
+
+    def test_batch_order_unknown_user(self, client, slots):
+        payload = batch_payload(UserFactory.build(), slots)
+
+        response = client.post(
+            "/order/batch/", data=payload, content_type="application/json"
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_batch_order_rejects_empty_batches(self, client):
+        response = client.post(
+            "/order/batch/",
+            data={"user_id": str(uuid4()), "lines": []},
+            content_type="application/json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
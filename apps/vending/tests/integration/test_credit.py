@@ -0,0 +1,252 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from io import StringIO
+from uuid import uuid4
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Round
+from django.urls import reverse
+from rest_framework import status
+
+import apps.vending.journal as journal_module
+from apps.vending.credit import debit, top_up
+from apps.vending.expections import NotEnoughCreditException, ProductOutOfStockException
+from apps.vending.journal import OrderJournal
+from apps.vending.models import CreditTransaction, User
+from apps.vending.purchases import purchase, purchase_many
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+
+def ledger_balance(user) -> Decimal:
+    return CreditTransaction.objects.filter(user=user).aggregate(
+        balance=Round(Sum("amount"), 2)
+    )["balance"]
+
+
+def credit(user) -> Decimal:
+    user.refresh_from_db()
+    return user.credit
+
+
+def top_up_request(client, user_id, amount, **headers):
+    return client.post(
+        f"/users/{user_id}/credit/topup", data={"amount": amount}, headers=headers
+    )
+
+
+def debit_request(client, user_id, amount):
+    return client.post(f"/users/{user_id}/credit/debit", data={"amount": amount})
+
+
+@pytest.fixture
+def user() -> User:
+    return UserFactory(credit=Decimal("20.00"))
+
+
+@pytest.mark.django_db
+class TestCreditEndpoints:
+    def test_top_up_adds_to_the_balance(self, client, user):
+        response = top_up_request(client, user.id, "5.50")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"credit": "25.50"}
+        assert credit(user) == Decimal("25.50")
+        assert CreditTransaction.objects.filter(
+            user=user, kind=CreditTransaction.Kind.TOP_UP, amount=Decimal("5.50")
+        ).exists()
+
+    def test_debit_takes_from_the_balance(self, client, user):
+        response = debit_request(client, user.id, "7.25")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"credit": "12.75"}
+        assert ledger_balance(user) == credit(user)
+
+    def test_debit_cannot_overdraw(self, client, user):
+        response = debit_request(client, user.id, "20.01")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert credit(user) == Decimal("20.00")
+        assert CreditTransaction.objects.filter(user=user).count() == 1
+
+    def test_top_up_cannot_overflow_the_balance(self, client, user):
+        response = top_up_request(client, user.id, "9990.00")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert credit(user) == Decimal("20.00")
+
+    @pytest.mark.parametrize("amount", ["0", "-1.00", "1.001"])
+    def test_amount_must_be_positive_cents(self, client, user, amount):
+        assert top_up_request(client, user.id, amount).status_code == 400
+
+    def test_unknown_user_is_not_found(self, client):
+        assert top_up_request(client, uuid4(), "1.00").status_code == 404
+        assert debit_request(client, uuid4(), "1.00").status_code == 404
+
+    def test_retried_top_up_is_applied_once(self, client, user):
+        for _ in range(2):
+            response = top_up_request(
+                client, user.id, "5.00", **{"Idempotency-Key": "top-up-1"}
+            )
+            assert response.json() == {"credit": "25.00"}
+
+        assert credit(user) == Decimal("25.00")
+
+    def test_setting_the_credit_records_the_difference(self, client, user):
+        url = reverse("credit_view", kwargs={"user_id": user.id})
+
+        client.patch(url, data={"credit": "12.00"}, content_type="application/json")
+
+        adjustment = CreditTransaction.objects.get(
+            user=user, kind=CreditTransaction.Kind.ADJUSTMENT
+        )
+        assert adjustment.amount == Decimal("-8.00")
+        assert ledger_balance(user) == credit(user) == Decimal("12.00")
+
+    def test_lists_transactions_latest_first(self, client, user):
+        top_up_request(client, user.id, "1.00")
+        debit_request(client, user.id, "2.00")
+
+        response = client.get(
+            f"/users/{user.id}/credit/transactions", data={"limit": 2}
+        )
+
+        data = response.json()
+        assert [(t["kind"], t["amount"]) for t in data["results"]] == [
+            ("debit", "-2.00"),
+            ("top-up", "1.00"),
+        ]
+        assert data["next"] is not None
+
+
+@pytest.mark.django_db
+class TestLedgerConsistency:
+    def test_new_users_open_with_their_credit(self, user):
+        (opening,) = CreditTransaction.objects.filter(user=user)
+
+        assert opening.kind == CreditTransaction.Kind.OPENING
+        assert opening.amount == Decimal("20.00")
+
+    def test_purchases_are_recorded_with_their_order(self):
+        user = UserFactory(credit=Decimal("50.00"))
+        slot = VendingMachineSlotFactory(quantity=5)
+
+        order = purchase(user.id, slot.id, slot.product.id)
+        orders = purchase_many(
+            user.id, [{"slot_id": slot.id, "product_id": slot.product_id}]
+        )
+
+        payments = CreditTransaction.objects.filter(
+            kind=CreditTransaction.Kind.PURCHASE
+        )
+        assert {payment.order_id for payment in payments} == {order.id, orders[0].id}
+        assert {payment.amount for payment in payments} == {Decimal("-10.40")}
+        assert ledger_balance(user) == credit(user) == Decimal("29.20")
+
+    def test_journaled_purchases_are_recorded(self, user, tmp_path):
+        slot = VendingMachineSlotFactory(quantity=5)
+        journal = OrderJournal(tmp_path / "orders.journal")
+        journal.open(background=False)
+        try:
+            journal.purchase(user.id, slot.id, slot.product.id)
+        finally:
+            journal.close()
+
+        assert ledger_balance(user) == credit(user) == Decimal("9.60")
+
+    def test_debits_count_journaled_purchases(self, tmp_path, monkeypatch):
+        user = UserFactory(credit=Decimal("5.00"))
+        slot = VendingMachineSlotFactory(quantity=5, product__price=Decimal("4.00"))
+        journal = OrderJournal(tmp_path / "orders.journal")
+        journal.open(background=False)
+        monkeypatch.setattr(journal_module, "_journal", journal)
+        try:
+            journal.purchase(user.id, slot.id, slot.product.id)
+            with pytest.raises(NotEnoughCreditException):
+                debit(user.id, Decimal("5.00"))
+            assert debit(user.id, Decimal("1.00")) == Decimal("0.00")
+            with pytest.raises(NotEnoughCreditException):
+                journal.purchase(user.id, slot.id, slot.product.id)
+        finally:
+            journal.close()
+
+        assert ledger_balance(user) == credit(user) == Decimal("0.00")
+
+
+@pytest.mark.django_db
+class TestReconcileCredit:
+    def reconcile(self, *args) -> str:
+        out = StringIO()
+        call_command("reconcile_credit", "--batch-size=2", *args, stdout=out)
+        return out.getvalue()
+
+    def test_consistent_balances_are_left_alone(self, user):
+        UserFactory.create_batch(4)
+        top_up(user.id, Decimal("3.00"))
+
+        assert "Found 0 users" in self.reconcile()
+
+    def test_reports_balances_that_do_not_add_up(self, user):
+        drifted = UserFactory.create_batch(3)
+        User.objects.filter(id__in=[u.id for u in drifted[1:]]).update(credit=1)
+
+        output = self.reconcile()
+
+        assert "Found 2 users" in output
+        assert f"{drifted[1].id}: credit 1.00" in output
+        assert credit(drifted[1]) == Decimal("1.00")
+
+    def test_fix_re_derives_balances_from_the_ledger(self, user):
+        debit(user.id, Decimal("4.50"))
+        User.objects.update(credit=0)
+        UserFactory(credit=0)
+
+        assert "Re-derived the credit of 1 users" in self.reconcile("--fix")
+        assert credit(user) == Decimal("15.50")
+        assert "Found 0 users" in self.reconcile()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_credit_changes_are_never_lost():
+    user = UserFactory(credit=Decimal("250.00"))
+    slot = VendingMachineSlotFactory(quantity=20)
+
+    def top_up_many(_):
+        try:
+            for _ in range(10):
+                top_up(user.id, Decimal("1.10"))
+        finally:
+            connection.close()
+
+    def buy_many(_):
+        sold = 0
+        try:
+            for _ in range(5):
+                try:
+                    purchase(user.id, slot.id, slot.product.id)
+                    sold += 1
+                except (NotEnoughCreditException, ProductOutOfStockException):
+                    pass
+            debit(user.id, Decimal("0.35"))
+        finally:
+            connection.close()
+        return sold
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        top_ups = [pool.submit(top_up_many, worker) for worker in range(4)]
+        sold = sum(pool.map(buy_many, range(4)))
+        for future in top_ups:
+            future.result()
+
+    expected = (
+        Decimal("250.00")
+        + 40 * Decimal("1.10")
+        - sold * Decimal("10.40")
+        - 4 * Decimal("0.35")
+    )
+    assert sold == 20
+    assert credit(user) == expected
+    assert ledger_balance(user) == expected
@@ -0,0 +1,40 @@
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def file_connection(tmp_path):
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite specific")
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, "NAME": str(tmp_path / "db.sqlite3")},
+        alias="pragmas",
+    )
+    yield wrapper
+    wrapper.close()
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_production_pragmas_are_applied_to_new_connections(file_connection, settings):
+    settings.VENDING_SQLITE_PRAGMAS = settings.VENDING_SQLITE_PRODUCTION_PRAGMAS
+
+    assert pragma(file_connection, "journal_mode") == "wal"
+    # NORMAL
+    assert pragma(file_connection, "synchronous") == 1
+    assert pragma(file_connection, "busy_timeout") == 5000
+    assert pragma(file_connection, "mmap_size") == 256 * 1024 * 1024
+    assert pragma(file_connection, "cache_size") == -64 * 1024
+
+
+def test_default_profile_leaves_sqlite_defaults(file_connection):
+    assert settings.VENDING_SQLITE_PRAGMAS == {}
+    assert pragma(file_connection, "journal_mode") == "delete"
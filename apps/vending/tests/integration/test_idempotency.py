@@ -0,0 +1,186 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from rest_framework import status
+
+from apps.vending.idempotency import (
+    IN_PROGRESS,
+    CacheIdempotencyStore,
+    LocalIdempotencyStore,
+    get_idempotency_store,
+)
+from apps.vending.models import Order
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+
+@pytest.fixture
+def slot():
+    return VendingMachineSlotFactory(quantity=5)
+
+
+@pytest.fixture
+def user():
+    return UserFactory(credit=Decimal("20.00"))
+
+
+def order(client, user, slot, key, **data):
+    return client.post(
+        "/order/",
+        data={
+            "user_id": user.id,
+            "product_id": slot.product.id,
+            "slot_id": slot.id,
+            **data,
+        },
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+
+@pytest.mark.django_db
+class TestIdempotentOrders:
+    def test_retry_replays_the_response_without_queries(
+        self, client, user, slot, django_assert_num_queries
+    ):
+        first = order(client, user, slot, "kiosk-1")
+
+        with django_assert_num_queries(0):
+            retry = order(client, user, slot, "kiosk-1")
+
+        assert first.status_code == retry.status_code == status.HTTP_204_NO_CONTENT
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert Order.objects.count() == 1
+        slot.refresh_from_db()
+        assert slot.quantity == 4
+
+    def test_business_errors_are_replayed(self, client, user, slot):
+        order(client, user, slot, "kiosk-1")
+        first = order(client, user, slot, "kiosk-2")
+
+        user.credit = Decimal("100.00")
+        user.save()
+        retry = order(client, user, slot, "kiosk-2")
+
+        assert retry.status_code == status.HTTP_400_BAD_REQUEST
+        assert retry.json() == first.json()
+
+    def test_new_keys_place_new_orders(self, client, slot):
+        buyer = UserFactory()
+        order(client, buyer, slot, "kiosk-1")
+        order(client, buyer, slot, "kiosk-2")
+        order(client, UserFactory(), slot, "kiosk-1")
+
+        assert Order.objects.count() == 3
+
+    def test_key_reused_for_another_request_is_rejected(self, client, user, slot):
+        order(client, user, slot, "kiosk-1")
+
+        response = order(
+            client, user, slot, "kiosk-1", slot_id=VendingMachineSlotFactory().id
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert Order.objects.count() == 1
+
+    def test_key_in_progress_is_rejected(self, client, user, slot):
+        get_idempotency_store().reserve(f"/order/:{user.id}:kiosk-1")
+
+        response = order(client, user, slot, "kiosk-1")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not Order.objects.exists()
+
+    def test_server_errors_are_not_remembered(self, client, user, slot):
+        with patch("apps.vending.views.purchase", side_effect=RuntimeError):
+            first = order(client, user, slot, "kiosk-1")
+        retry = order(client, user, slot, "kiosk-1")
+
+        assert first.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert retry.status_code == status.HTTP_204_NO_CONTENT
+        assert Order.objects.count() == 1
+
+    def test_overlong_key_is_rejected(self, client, user, slot):
+        response = order(client, user, slot, "k" * 256)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_retry_returns_the_same_orders(self, client, user, slot):
+        def batch():
+            return client.post(
+                "/order/batch/",
+                data={
+                    "user_id": str(user.id),
+                    "lines": [
+                        {"product_id": str(slot.product.id), "slot_id": str(slot.id)}
+                    ],
+                },
+                content_type="application/json",
+                HTTP_IDEMPOTENCY_KEY="kiosk-1",
+            )
+
+        first = batch()
+        retry = batch()
+
+        assert retry.status_code == status.HTTP_201_CREATED
+        assert retry.json() == first.json()
+        assert Order.objects.count() == 1
+
+
+class TestLocalIdempotencyStore:
+    def test_counts_hits_and_misses(self):
+        store = LocalIdempotencyStore()
+
+        store.get("a")
+        store.save("a", {"status": 204})
+        store.get("a")
+
+        assert store.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    def test_evicts_least_recently_used_keys(self):
+        store = LocalIdempotencyStore(max_size=2)
+        store.save("a", 1)
+        store.save("b", 2)
+        store.get("a")
+
+        store.save("c", 3)
+
+        assert store.get("b") is None
+        assert store.get("a") == 1
+        assert store.stats()["evictions"] == 1
+
+    def test_expires_keys(self):
+        store = LocalIdempotencyStore(timeout=0)
+        store.save("a", 1)
+
+        assert store.get("a") is None
+        assert store.stats()["evictions"] == 1
+
+    def test_reserves_a_key_once(self):
+        store = LocalIdempotencyStore()
+
+        assert store.reserve("a")
+        assert not store.reserve("a")
+        assert store.get("a") == IN_PROGRESS
+        store.release("a")
+        assert store.reserve("a")
+
+    def test_reservations_expire_before_saved_responses(self):
+        store = LocalIdempotencyStore(reservation_timeout=0)
+
+        assert store.reserve("a")
+        assert store.reserve("a")
+        store.save("a", 1)
+        assert not store.reserve("a")
+        assert store.get("a") == 1
+
+
+class TestCacheIdempotencyStore:
+    def test_reservations_expire_before_saved_responses(self):
+        store = CacheIdempotencyStore(alias="default", reservation_timeout=0)
+
+        assert store.reserve("cache-a")
+        assert store.reserve("cache-a")
+        store.save("cache-a", 1)
+        assert not store.reserve("cache-a")
+        assert store.get("cache-a") == 1
+        store.release("cache-a")
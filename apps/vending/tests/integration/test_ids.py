@@ -0,0 +1,55 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from apps.vending.ids import new_id, uuid7, uuid7_int
+from apps.vending.purchases import purchase
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+
+class TestUuid7:
+    def test_has_version_7_and_the_rfc_variant(self):
+        id = uuid7()
+
+        assert id.version == 7
+        assert id.variant == "specified in RFC 4122"
+
+    def test_starts_with_the_time_in_milliseconds(self):
+        before = time.time_ns() // 1_000_000
+        id = uuid7()
+
+        assert before <= id.int >> 80 <= time.time_ns() // 1_000_000
+
+    def test_sorts_in_creation_order(self):
+        ids = [uuid7() for _ in range(10_000)]
+
+        assert sorted(ids) == ids
+        assert sorted(id.hex for id in ids) == [id.hex for id in ids]
+        assert len(set(ids)) == len(ids)
+
+    def test_random_bits_overflow_into_the_next_millisecond(self):
+        value = uuid7_int(1, (1 << 74) - 1)
+
+        assert value >> 80 == 1
+        assert uuid7_int(2, 0) > value
+
+
+@pytest.mark.django_db
+class TestNewId:
+    def test_is_random_by_default(self, settings):
+        settings.VENDING_TIME_ORDERED_IDS = False
+
+        assert new_id().version == 4
+
+    def test_is_time_ordered_when_enabled(self, settings):
+        settings.VENDING_TIME_ORDERED_IDS = True
+        user = UserFactory(credit=Decimal("30.00"))
+        slot = VendingMachineSlotFactory(quantity=2)
+
+        first = purchase(user.id, slot.id, slot.product.id)
+        second = purchase(user.id, slot.id, slot.product.id)
+
+        assert user.id.version == slot.id.version == 7
+        assert first.id.version == 7
+        assert first.id < second.id
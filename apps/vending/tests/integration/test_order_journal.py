@@ -0,0 +1,319 @@
+import json
+import runpy
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from rest_framework import status
+
+import apps.vending.journal as journal_module
+from apps.vending.expections import (
+    BatchOrderException,
+    NotEnoughCreditException,
+    OrderJournalLockedException,
+    ProductNotInSlotException,
+    ProductOutOfStockException,
+)
+from apps.vending.inventory import apply_restock
+from apps.vending.journal import OrderJournal
+from apps.vending.models import Order, SalesRollup, User, VendingMachineSlot
+from apps.vending.tests.factories import UserFactory, VendingMachineSlotFactory
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return tmp_path / "orders.journal"
+
+
+@pytest.fixture
+def journal(journal_path):
+    journal = OrderJournal(journal_path)
+    journal.open(background=False)
+    yield journal
+    journal.close()
+
+
+def journal_entries(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_bytes().splitlines()]
+
+
+@pytest.mark.django_db
+class TestOrderJournal:
+    def test_orders_are_journaled_then_committed(self, journal, journal_path):
+        user = UserFactory(credit=Decimal("20.00"))
+        slot = VendingMachineSlotFactory(quantity=2)
+
+        order = journal.purchase(user.id, slot.id, slot.product.id)
+
+        assert len(journal_entries(journal_path)) == 1
+        assert not Order.objects.exists()
+
+        assert journal.flush() == 1
+
+        slot.refresh_from_db()
+        user.refresh_from_db()
+        assert Order.objects.get().id == order.id
+        assert slot.quantity == 1
+        assert user.credit == Decimal("9.60")
+        assert SalesRollup.objects.get().units == 1
+        assert journal_path.read_bytes() == b""
+
+    def test_group_commit_writes_every_order(self, journal):
+        users = UserFactory.create_batch(3, credit=Decimal("50.00"))
+        slot = VendingMachineSlotFactory(quantity=10)
+
+        for user in users:
+            journal.purchase(user.id, slot.id, slot.product.id)
+            journal.purchase(user.id, slot.id, slot.product.id)
+        journal.flush()
+
+        slot.refresh_from_db()
+        assert slot.quantity == 4
+        assert Order.objects.count() == 6
+        for user in users:
+            user.refresh_from_db()
+            assert user.credit == Decimal("29.20")
+
+    def test_ledger_checks_stock_before_it_is_committed(self, journal):
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=1)
+
+        journal.purchase(user.id, slot.id, slot.product.id)
+        with pytest.raises(ProductOutOfStockException):
+            journal.purchase(user.id, slot.id, slot.product.id)
+
+    def test_ledger_checks_credit_before_it_is_committed(self, journal):
+        user = UserFactory(credit=Decimal("15.00"))
+        slot = VendingMachineSlotFactory(quantity=5)
+
+        journal.purchase(user.id, slot.id, slot.product.id)
+        with pytest.raises(NotEnoughCreditException):
+            journal.purchase(user.id, slot.id, slot.product.id)
+
+    def test_unknown_user_is_rejected(self, journal):
+        slot = VendingMachineSlotFactory()
+
+        with pytest.raises(User.DoesNotExist):
+            journal.purchase(UserFactory.build().id, slot.id, slot.product.id)
+
+    def test_ledger_checks_the_product_is_in_the_slot(self, journal, journal_path):
+        user = UserFactory()
+        slot, other = VendingMachineSlotFactory.create_batch(2, quantity=1)
+
+        with pytest.raises(ProductNotInSlotException):
+            journal.purchase(user.id, slot.id, other.product.id)
+        with pytest.raises(BatchOrderException) as e:
+            journal.purchase_many(
+                user.id, [{"slot_id": slot.id, "product_id": other.product.id}]
+            )
+
+        assert e.value.errors == [{"line": 0, "error": "Product is not in this slot. "}]
+        assert journal_path.read_bytes() == b""
+
+    def test_batch_is_journaled_all_or_nothing(self, journal, journal_path):
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=1)
+        line = {"slot_id": slot.id, "product_id": slot.product.id}
+
+        with pytest.raises(BatchOrderException) as e:
+            journal.purchase_many(user.id, [line, line])
+
+        assert e.value.errors == [
+            {"line": 1, "error": f"{slot.product.name} is out of stock. "}
+        ]
+        assert journal_path.read_bytes() == b""
+        assert len(journal.purchase_many(user.id, [line])) == 1
+
+    def test_reloaded_rows_account_for_pending_orders(self, journal):
+        user = UserFactory(credit=Decimal("20.00"))
+        slot = VendingMachineSlotFactory(quantity=1)
+        journal.purchase(user.id, slot.id, slot.product.id)
+
+        journal.ledger.forget(user_ids=[user.id], slot_ids=[slot.id])
+
+        with pytest.raises(NotEnoughCreditException):
+            journal.purchase(user.id, slot.id, slot.product.id)
+        assert journal.ledger.stock[slot.id] == 0
+
+    def test_fresh_rows_are_not_read_again(self, journal, django_assert_num_queries):
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=5)
+        journal.purchase(user.id, slot.id, slot.product.id)
+
+        with django_assert_num_queries(0):
+            journal.purchase(user.id, slot.id, slot.product.id)
+
+    def test_rows_changed_by_another_process_are_read_again(self, journal_path):
+        journal = OrderJournal(journal_path, ledger_max_age=0)
+        journal.open(background=False)
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=1)
+        journal.purchase(user.id, slot.id, slot.product.id)
+
+        # A restock that cannot reach this ledger to make it forget the slot.
+        VendingMachineSlot.objects.filter(id=slot.id).update(quantity=3)
+        journal.purchase(user.id, slot.id, slot.product.id)
+        journal.close()
+
+        assert journal.ledger.stock[slot.id] == 1
+        slot.refresh_from_db()
+        assert slot.quantity == 1
+
+    def test_restock_flushes_and_reloads_the_ledger(self, journal, monkeypatch):
+        monkeypatch.setattr(journal_module, "_journal", journal)
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=1)
+        journal.purchase(user.id, slot.id, slot.product.id)
+
+        apply_restock(
+            [
+                {
+                    "machine_id": slot.machine_id,
+                    "row": slot.row,
+                    "column": slot.column,
+                    "product_id": slot.product_id,
+                    "quantity": 5,
+                }
+            ]
+        )
+        journal.purchase(user.id, slot.id, slot.product.id)
+        journal.flush()
+
+        slot.refresh_from_db()
+        assert slot.quantity == 4
+        assert Order.objects.count() == 2
+
+    def test_admin_flushes_before_saving_a_slot(
+        self, journal, monkeypatch, admin_client
+    ):
+        monkeypatch.setattr(journal_module, "_journal", journal)
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(row=1, column=1, quantity=5)
+        for _ in range(3):
+            journal.purchase(user.id, slot.id, slot.product.id)
+
+        response = admin_client.post(
+            f"/admin/vending/vendingmachineslot/{slot.id}/change/",
+            {
+                "machine": slot.machine_id,
+                "product": slot.product_id,
+                "quantity": 10,
+                "row": slot.row,
+                "column": slot.column,
+                "low_stock_threshold": slot.low_stock_threshold,
+            },
+        )
+        journal.flush()
+
+        assert response.status_code == status.HTTP_302_FOUND
+        slot.refresh_from_db()
+        assert slot.quantity == 10
+        assert Order.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_a_second_journal_on_the_same_file_refuses_to_open(journal, journal_path):
+    with pytest.raises(OrderJournalLockedException):
+        OrderJournal(journal_path).open(background=False)
+
+    journal.close()
+    other = OrderJournal(journal_path)
+    other.open(background=False)
+    other.close()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("entrypoint", ["vending_machine.wsgi", "vending_machine.asgi"])
+def test_a_second_server_fails_to_start(
+    journal, journal_path, settings, monkeypatch, entrypoint
+):
+    settings.VENDING_ORDER_JOURNAL = str(journal_path)
+    monkeypatch.setattr(journal_module, "_journal", None)
+
+    with pytest.raises(OrderJournalLockedException):
+        runpy.run_module(entrypoint)
+
+
+@pytest.mark.django_db
+class TestJournalReplay:
+    def test_replays_orders_left_by_a_crash(self, journal_path):
+        user = UserFactory(credit=Decimal("20.00"))
+        slot = VendingMachineSlotFactory(quantity=2)
+        crashed = OrderJournal(journal_path)
+        crashed.open(background=False)
+        order = crashed.purchase(user.id, slot.id, slot.product.id)
+
+        restarted = OrderJournal(journal_path)
+        assert restarted.replay() == 1
+
+        slot.refresh_from_db()
+        user.refresh_from_db()
+        assert Order.objects.get().id == order.id
+        assert (slot.quantity, user.credit) == (1, Decimal("9.60"))
+        assert journal_path.read_bytes() == b""
+
+    def test_replay_skips_committed_orders_and_torn_writes(self, journal_path):
+        user = UserFactory(credit=Decimal("20.00"))
+        slot = VendingMachineSlotFactory(quantity=2)
+        journal = OrderJournal(journal_path)
+        journal.open(background=False)
+        journal.purchase(user.id, slot.id, slot.product.id)
+        entries = journal_path.read_bytes()
+        journal.flush()
+        journal_path.write_bytes(entries + b'{"user_id": "')
+
+        assert OrderJournal(journal_path).replay() == 0
+        assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_order_view_uses_the_journal(client, journal, settings, monkeypatch):
+    settings.VENDING_ORDER_JOURNAL = str(journal.path)
+    monkeypatch.setattr(journal_module, "_journal", journal)
+    user = UserFactory()
+    slot = VendingMachineSlotFactory(quantity=1)
+    data = {"user_id": user.id, "product_id": slot.product.id, "slot_id": slot.id}
+
+    assert client.post("/order/", data=data).status_code == 204
+    response = client.post("/order/", data=data)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Order.objects.exists()
+    journal.flush()
+    assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_journaled_orders_never_oversell(journal_path):
+    stock = 25
+    buyers = [UserFactory(credit=Decimal("31.20")) for _ in range(10)]
+    slot = VendingMachineSlotFactory(quantity=stock)
+    journal = OrderJournal(journal_path, batch_size=8, flush_interval=0.01)
+    journal.open()
+
+    def buy(user):
+        sold = 0
+        try:
+            for _ in range(5):
+                try:
+                    journal.purchase(user.id, slot.id, slot.product.id)
+                    sold += 1
+                except (NotEnoughCreditException, ProductOutOfStockException):
+                    pass
+        finally:
+            connection.close()
+        return sold
+
+    with ThreadPoolExecutor(max_workers=len(buyers)) as pool:
+        sold = sum(pool.map(buy, buyers))
+    journal.close()
+
+    slot.refresh_from_db()
+    assert sold == stock
+    assert slot.quantity == 0
+    assert Order.objects.count() == stock
+    for user in buyers:
+        user.refresh_from_db()
+        purchases = Order.objects.filter(user=user).count()
+        assert user.credit == Decimal("31.20") - purchases * Decimal("10.40")
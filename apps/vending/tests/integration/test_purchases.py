@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+
+from apps.vending.expections import (
+    NotEnoughCreditException,
+    ProductNotInSlotException,
+    ProductOutOfStockException,
+)
+from apps.vending.models import Order
+from apps.vending.purchases import purchase
+from apps.vending.tests.factories import (
+    ProductFactory,
+    UserFactory,
+    VendingMachineSlotFactory,
+)
+
+
+@pytest.mark.django_db
+class TestPurchase:
+    def test_purchase_decrements_stock_and_debits_credit(
+        self, django_assert_num_queries
+    ):
+        user = UserFactory(credit=Decimal("20.00"))
+        slot = VendingMachineSlotFactory(quantity=2)
+
+        # savepoint, slot update, user update, order insert, credit transaction
+        # insert, rollup insert and update, slot stock level, slot change,
+        # release
+        with django_assert_num_queries(10):
+            order = purchase(user.id, slot.id, slot.product.id)
+
+        slot.refresh_from_db()
+        user.refresh_from_db()
+        assert slot.quantity == 1
+        assert user.credit == Decimal("9.60")
+        assert order.slot_id == slot.id
+
+    def test_purchase_without_enough_credit_changes_nothing(self):
+        user = UserFactory(credit=Decimal("1.00"))
+        slot = VendingMachineSlotFactory(quantity=2)
+
+        with pytest.raises(NotEnoughCreditException):
+            purchase(user.id, slot.id, slot.product.id)
+
+        slot.refresh_from_db()
+        user.refresh_from_db()
+        assert slot.quantity == 2
+        assert user.credit == Decimal("1.00")
+        assert not Order.objects.exists()
+
+    def test_purchase_from_empty_slot_changes_nothing(self):
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=0)
+
+        with pytest.raises(ProductOutOfStockException):
+            purchase(user.id, slot.id, slot.product.id)
+
+        user.refresh_from_db()
+        assert user.credit == Decimal("100.00")
+        assert not Order.objects.exists()
+
+    def test_purchase_of_a_product_not_in_the_slot_changes_nothing(self):
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=2)
+        cheap = ProductFactory(price=Decimal("0.10"))
+
+        with pytest.raises(ProductNotInSlotException):
+            purchase(user.id, slot.id, cheap.id)
+
+        slot.refresh_from_db()
+        user.refresh_from_db()
+        assert slot.quantity == 2
+        assert user.credit == Decimal("100.00")
+        assert not Order.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_purchases_never_oversell_a_slot():
+    stock = 25
+    buyers = [UserFactory(credit=Decimal("31.20")) for _ in range(10)]
+    slot = VendingMachineSlotFactory(quantity=stock)
+
+    def buy(user):
+        sold = 0
+        try:
+            for _ in range(5):
+                try:
+                    purchase(user.id, slot.id, slot.product.id)
+                    sold += 1
+                except (NotEnoughCreditException, ProductOutOfStockException):
+                    pass
+        finally:
+            connection.close()
+        return sold
+
+    with ThreadPoolExecutor(max_workers=len(buyers)) as pool:
+        sold = sum(pool.map(buy, buyers))
+
+    slot.refresh_from_db()
+    assert sold == stock
+    assert slot.quantity == 0
+    assert Order.objects.count() == stock
+    for user in buyers:
+        user.refresh_from_db()
+        assert user.credit >= 0
+        purchases = Order.objects.filter(user=user).count()
+        assert user.credit == Decimal("31.20") - purchases * Decimal("10.40")
@@ -0,0 +1,148 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import ANY
+
+import pytest
+from rest_framework import status
+
+from apps.vending.models import Order, SalesRollup
+from apps.vending.purchases import purchase, purchase_many
+from apps.vending.tests.factories import (
+    ProductFactory,
+    UserFactory,
+    VendingMachineSlotFactory,
+)
+
+
+@pytest.fixture
+def slots():
+    return [
+        VendingMachineSlotFactory(
+            product=ProductFactory(name=f"Product {column}", price=Decimal(column)),
+            row=1,
+            column=column,
+            quantity=10,
+        )
+        for column in range(1, 3)
+    ]
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.mark.django_db
+class TestSalesRollups:
+    def test_purchases_are_rolled_up_per_hour_product_and_slot(self, slots, user):
+        purchase(user.id, slots[0].id, slots[0].product.id)
+        purchase(user.id, slots[0].id, slots[0].product.id)
+        purchase_many(
+            user.id,
+            [
+                {"slot_id": slots[0].id, "product_id": slots[0].product.id},
+                {"slot_id": slots[1].id, "product_id": slots[1].product.id},
+                {"slot_id": slots[1].id, "product_id": slots[1].product.id},
+            ],
+        )
+
+        rollups = {
+            rollup.slot_id: (rollup.units, rollup.revenue)
+            for rollup in SalesRollup.objects.all()
+        }
+        assert rollups == {
+            slots[0].id: (3, Decimal("3.00")),
+            slots[1].id: (2, Decimal("4.00")),
+        }
+
+    def test_failed_purchase_is_not_rolled_up(self, slots):
+        poor_user = UserFactory(credit=Decimal("0.00"))
+
+        with pytest.raises(Exception):
+            purchase(poor_user.id, slots[1].id, slots[1].product.id)
+
+        assert not SalesRollup.objects.exists()
+
+
+@pytest.mark.django_db
+class TestSalesReport:
+    def test_report_totals(self, client, slots, user):
+        for _ in range(3):
+            purchase(user.id, slots[1].id, slots[1].product.id)
+        purchase(user.id, slots[0].id, slots[0].product.id)
+
+        response = client.get("/reports/sales")
+
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert sorted(report["products"], key=lambda row: row["name"]) == [
+            {
+                "product_id": str(slots[0].product.id),
+                "name": "Product 1",
+                "units": 1,
+                "revenue": "1.00",
+            },
+            {
+                "product_id": str(slots[1].product.id),
+                "name": "Product 2",
+                "units": 3,
+                "revenue": "6.00",
+            },
+        ]
+        assert sorted(report["slots"], key=lambda row: row["coordinates"]) == [
+            {
+                "slot_id": str(slots[0].id),
+                "coordinates": [1, 1],
+                "units": 1,
+                "revenue": "1.00",
+            },
+            {
+                "slot_id": str(slots[1].id),
+                "coordinates": [2, 1],
+                "units": 3,
+                "revenue": "6.00",
+            },
+        ]
+        assert report["hours"] == [{"hour": ANY, "units": 4, "revenue": "7.00"}]
+
+    def test_report_time_window(self, client, slots, user):
+        purchase(user.id, slots[0].id, slots[0].product.id)
+
+        response = client.get("/reports/sales?until=2000-01-01T00:00:00Z")
+
+        assert response.json() == {"products": [], "slots": [], "hours": []}
+
+    def test_report_query_count_does_not_depend_on_orders(
+        self, client, slots, user, django_assert_num_queries
+    ):
+        for _ in range(5):
+            purchase(user.id, slots[0].id, slots[0].product.id)
+
+        with django_assert_num_queries(3):
+            client.get("/reports/sales")
+
+
+@pytest.mark.django_db
+class TestUserOrders:
+    def test_orders_are_listed_newest_first_across_pages(self, client, slots, user):
+        orders = [purchase(user.id, slots[0].id, slots[0].product.id) for _ in range(5)]
+        purchase(UserFactory().id, slots[0].id, slots[0].product.id)
+
+        first = client.get(f"/users/{user.id}/orders?limit=3").json()
+        second = client.get(
+            f"/users/{user.id}/orders?limit=3&cursor={first['next']}"
+        ).json()
+
+        listed = [order["id"] for order in first["results"] + second["results"]]
+        assert listed == [str(order.id) for order in reversed(orders)]
+        assert second["next"] is None
+        assert first["results"][0] == {
+            "id": str(orders[-1].id),
+            "created_at": ANY,
+            "product": {
+                "id": str(slots[0].product.id),
+                "name": "Product 1",
+                "price": "1.00",
+            },
+            "slot_id": str(slots[0].id),
+        }
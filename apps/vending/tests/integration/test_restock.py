@@ -0,0 +1,162 @@
+import json
+from uuid import uuid4
+
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework import status
+
+from apps.vending.models import VendingMachineSlot
+from apps.vending.tests.factories import (
+    ProductFactory,
+    VendingMachineFactory,
+    VendingMachineSlotFactory,
+)
+
+
+def manifest_line(machine, product, row, column, quantity=10):
+    return {
+        "machine_id": str(machine.id),
+        "row": row,
+        "column": column,
+        "product_id": str(product.id),
+        "quantity": quantity,
+    }
+
+
+def restock(client, lines):
+    return client.post(
+        "/slots/restock", data={"slots": lines}, content_type="application/json"
+    )
+
+
+@pytest.fixture
+def machine():
+    return VendingMachineFactory()
+
+
+@pytest.mark.django_db
+class TestRestock:
+    def test_restock_updates_existing_and_creates_missing_slots(self, client, machine):
+        existing = VendingMachineSlotFactory(
+            machine=machine, row=1, column=1, quantity=0
+        )
+        other_machine_slot = VendingMachineSlotFactory(row=1, column=2, quantity=0)
+        product = ProductFactory()
+
+        response = restock(
+            client,
+            [
+                manifest_line(machine, product, 1, 1, 7),
+                manifest_line(machine, product, 1, 2, 5),
+            ],
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"created": 1, "updated": 1}
+        existing.refresh_from_db()
+        assert (existing.product_id, existing.quantity) == (product.id, 7)
+        created = VendingMachineSlot.objects.get(machine=machine, row=1, column=2)
+        assert (created.product_id, created.quantity) == (product.id, 5)
+        other_machine_slot.refresh_from_db()
+        assert other_machine_slot.quantity == 0
+
+    def test_restock_invalidates_the_slot_listing(self, client, machine):
+        VendingMachineSlotFactory(machine=machine, row=1, column=1, quantity=0)
+        client.get("/slots/")
+
+        restock(client, [manifest_line(machine, ProductFactory(), 1, 1, 9)])
+
+        assert client.get("/slots/").json()[0]["quantity"] == 9
+
+    @pytest.mark.parametrize("slot_count", [10, 100])
+    def test_restock_query_count_is_bounded(
+        self, client, django_assert_max_num_queries, slot_count
+    ):
+        machines = VendingMachineFactory.create_batch(slot_count // 10)
+        product = ProductFactory()
+        lines = [
+            manifest_line(machines[i // 10], product, 1, i % 10 + 1)
+            for i in range(slot_count)
+        ]
+        for i, line in enumerate(lines[::2]):
+            VendingMachineSlotFactory(
+                machine=machines[i * 2 // 10], row=line["row"], column=line["column"]
+            )
+
+        with django_assert_max_num_queries(8):
+            response = restock(client, lines)
+
+        assert response.json() == {
+            "created": slot_count // 2,
+            "updated": slot_count // 2,
+        }
+
+    @pytest.mark.parametrize(
+        "field, value",
+        [("quantity", 101), ("quantity", -1), ("row", 0), ("column", 11)],
+    )
+    def test_restock_applies_slot_validators(self, client, machine, field, value):
+        line = manifest_line(machine, ProductFactory(), 1, 1)
+        line[field] = value
+
+        response = restock(client, [line])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert field in response.json()["slots"][0]
+
+    def test_restock_rejects_duplicate_coordinates(self, client, machine):
+        product = ProductFactory()
+
+        response = restock(
+            client,
+            [
+                manifest_line(machine, product, 1, 1),
+                manifest_line(machine, product, 1, 1),
+            ],
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"slots": ["Slot coordinates must be unique."]}
+
+    def test_restock_rejects_unknown_machines_and_products(self, client, machine):
+        product = ProductFactory()
+        ghost_product = ProductFactory.build(id=uuid4())
+        ghost_machine = VendingMachineFactory.build(id=uuid4())
+
+        response = restock(
+            client,
+            [
+                manifest_line(machine, product, 1, 1),
+                manifest_line(machine, ghost_product, 1, 2),
+                manifest_line(ghost_machine, product, 1, 3),
+            ],
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["lines"] == [
+            {"line": 1, "error": "Product does not exist."},
+            {"line": 2, "error": "Machine does not exist."},
+        ]
+        assert not VendingMachineSlot.objects.exists()
+
+
+@pytest.mark.django_db
+class TestRestockCommand:
+    def test_command_applies_manifest(self, tmp_path, machine):
+        product = ProductFactory()
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(json.dumps([manifest_line(machine, product, 2, 3, 4)]))
+
+        call_command("restock", str(manifest))
+
+        slot = VendingMachineSlot.objects.get(row=2, column=3)
+        assert slot.quantity == 4
+
+    def test_command_reports_invalid_manifest(self, tmp_path, machine):
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(
+            json.dumps([manifest_line(machine, ProductFactory(), 1, 1, 500)])
+        )
+
+        with pytest.raises(CommandError):
+            call_command("restock", str(manifest))
@@ -0,0 +1,100 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F, Sum
+from django.db.models.functions import Round
+
+from apps.vending.credit import credit_mismatches
+from apps.vending.models import (
+    CreditTransaction,
+    Order,
+    Product,
+    SalesRollup,
+    User,
+    VendingMachine,
+    VendingMachineSlot,
+)
+from apps.vending.seeding import SEEDED_MODELS, Seeder
+from apps.vending.tests.factories import ProductFactory
+
+SIZES = {"products": 20, "machines": 2, "users": 30, "orders": 200}
+
+
+def seed(**options):
+    out = StringIO()
+    call_command(
+        "seed", *[f"--{k}={v}" for k, v in {**SIZES, **options}.items()], stdout=out
+    )
+    return out.getvalue()
+
+
+def index_names() -> set:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        return {name for (name,) in cursor.fetchall()}
+
+
+@pytest.mark.django_db
+class TestSeedCommand:
+    def test_seeds_every_table(self):
+        output = seed()
+
+        assert Product.objects.count() == 20
+        assert VendingMachine.objects.count() == 2
+        assert VendingMachineSlot.objects.count() == 200
+        assert User.objects.count() == 30
+        assert Order.objects.count() == 200
+        assert "rows/sec" in output
+
+    def test_foreign_keys_are_consistent(self):
+        seed()
+
+        assert not Order.objects.exclude(product=F("slot__product")).exists()
+        positions = VendingMachineSlot.objects.values_list("machine", "row", "column")
+        assert len(set(positions)) == 200
+
+    def test_rollups_add_up_to_the_orders(self):
+        seed()
+
+        assert SalesRollup.objects.aggregate(units=Sum("units"))["units"] == 200
+        # SQLite sums decimals as floating point.
+        revenue = Order.objects.aggregate(revenue=Round(Sum("product__price"), 2))
+        assert (
+            SalesRollup.objects.aggregate(revenue=Round(Sum("revenue"), 2)) == revenue
+        )
+
+    def test_credit_adds_up_to_the_transactions(self):
+        seed()
+
+        assert CreditTransaction.objects.exists()
+        assert not list(credit_mismatches())
+
+    def test_same_seed_same_rows(self):
+        first = Seeder(seed=7).seed(**SIZES)
+        ids = sorted(Order.objects.values_list("id", "user", "slot"))
+        for model in reversed(SEEDED_MODELS):
+            model.objects.all().delete()
+
+        assert Seeder(seed=7).seed(**SIZES) == first
+        assert sorted(Order.objects.values_list("id", "user", "slot")) == ids
+
+    def test_restores_the_indexes(self):
+        if connection.vendor != "sqlite":
+            pytest.skip("SQLite specific")
+        indexes = index_names()
+
+        seed()
+
+        assert index_names() == indexes
+
+    def test_refuses_a_database_with_data(self):
+        ProductFactory()
+
+        with pytest.raises(CommandError):
+            seed()
+
+    def test_rejects_negative_sizes(self):
+        with pytest.raises(CommandError):
+            seed(orders=-1)
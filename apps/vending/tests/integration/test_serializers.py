@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+
+from apps.vending.models import User, VendingMachineSlot
+from apps.vending.serializers import (
+    FastUserSerializer,
+    FastVendingMachineSlotSerializer,
+    UserSerializer,
+    VendingMachineSlotSerializer,
+)
+from apps.vending.tests.factories import (
+    ProductFactory,
+    UserFactory,
+    VendingMachineSlotFactory,
+)
+
+
+@pytest.fixture
+def slots() -> list[VendingMachineSlot]:
+    prices = [Decimal("0.00"), Decimal("0.5"), Decimal("10.40"), Decimal("99.99")]
+    return [
+        VendingMachineSlotFactory(
+            product=ProductFactory(price=price), quantity=i, row=i + 1, column=i + 2
+        )
+        for i, price in enumerate(prices)
+    ]
+
+
+@pytest.mark.django_db
+class TestFastSerializerParity:
+    def test_slot_queryset_matches_drf_serializer(self, slots):
+        queryset = VendingMachineSlot.objects.select_related("product").order_by(
+            "row", "column"
+        )
+
+        fast = FastVendingMachineSlotSerializer(queryset, many=True).data
+        drf = VendingMachineSlotSerializer(queryset, many=True).data
+
+        assert fast == drf
+
+    def test_slot_instances_match_drf_serializer(self, slots):
+        fast = FastVendingMachineSlotSerializer(slots, many=True).data
+        drf = VendingMachineSlotSerializer(slots, many=True).data
+
+        assert fast == drf
+
+    def test_single_user_matches_drf_serializer(self):
+        user = UserFactory(credit=Decimal("7.5"))
+
+        assert FastUserSerializer(user).data == UserSerializer(user).data
+
+    def test_user_queryset_matches_drf_serializer(self):
+        UserFactory.create_batch(3)
+
+        fast = FastUserSerializer(User.objects.all(), many=True).data
+        drf = UserSerializer(User.objects.all(), many=True).data
+
+        assert fast == drf
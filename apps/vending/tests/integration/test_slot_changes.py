@@ -0,0 +1,178 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+
+from apps.vending.changes import prune_slot_changes
+from apps.vending.expections import SlotMovedException
+from apps.vending.models import SlotChange
+from apps.vending.tests.factories import (
+    UserFactory,
+    VendingMachineFactory,
+    VendingMachineSlotFactory,
+)
+
+
+def high_water_mark(client) -> int:
+    return client.get("/slots/changes").json()["next"]
+
+
+def changes(client, since, **params):
+    return client.get("/slots/changes", data={"since": since, **params})
+
+
+def order(client, slot):
+    return client.post(
+        "/order/",
+        data={
+            "user_id": UserFactory().id,
+            "product_id": slot.product_id,
+            "slot_id": slot.id,
+        },
+    )
+
+
+@pytest.fixture
+def slots():
+    machine = VendingMachineFactory()
+    return [
+        VendingMachineSlotFactory(machine=machine, row=1, column=column, quantity=5)
+        for column in range(1, 4)
+    ]
+
+
+@pytest.mark.django_db
+class TestSlotChanges:
+    def test_returns_only_the_changed_slots(self, client, slots):
+        since = high_water_mark(client)
+
+        order(client, slots[1])
+
+        response = changes(client, since)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [(slot["id"], slot["quantity"]) for slot in data["slots"]] == [
+            (str(slots[1].id), 4)
+        ]
+        assert data["deleted"] == []
+        assert data["next"] > since
+        assert changes(client, data["next"]).json()["slots"] == []
+
+    def test_has_the_listing_shape(self, client, slots):
+        (slot,) = changes(client, 0).json()["slots"][:1]
+
+        assert slot == client.get("/slots/").json()[0]
+
+    def test_reports_deleted_slots(self, client, slots):
+        since = high_water_mark(client)
+        slot_id = slots[0].id
+
+        slots[0].delete()
+
+        data = changes(client, since).json()
+        assert data["slots"] == []
+        assert data["deleted"] == [str(slot_id)]
+
+    def test_product_changes_list_every_slot_holding_it(self, client, slots):
+        since = high_water_mark(client)
+
+        slots[2].product.name = "Renamed"
+        slots[2].product.save()
+
+        data = changes(client, since).json()
+        assert [slot["product"]["name"] for slot in data["slots"]] == ["Renamed"]
+
+    def test_restock_and_batch_orders_are_logged(self, client, slots):
+        since = high_water_mark(client)
+        line = {
+            "machine_id": slots[0].machine_id,
+            "row": 1,
+            "column": 1,
+            "product_id": slots[0].product_id,
+            "quantity": 9,
+        }
+        client.post(
+            "/slots/restock", data={"slots": [line]}, content_type="application/json"
+        )
+        client.post(
+            "/order/batch/",
+            data={
+                "user_id": UserFactory().id,
+                "lines": [{"slot_id": slots[1].id, "product_id": slots[1].product_id}],
+            },
+            content_type="application/json",
+        )
+
+        data = changes(client, since).json()
+        assert {slot["id"]: slot["quantity"] for slot in data["slots"]} == {
+            str(slots[0].id): 9,
+            str(slots[1].id): 4,
+        }
+
+    def test_pages_through_changes(self, client, slots):
+        since = high_water_mark(client)
+        for slot in slots:
+            order(client, slot)
+
+        first = changes(client, since, limit=2).json()
+        second = changes(client, first["next"], limit=2).json()
+
+        assert first["more"] and not second["more"]
+        assert len(first["slots"]) == 2 and len(second["slots"]) == 1
+
+    def test_filters_by_machine(self, client, slots):
+        other = VendingMachineSlotFactory(row=1, column=1)
+        since = high_water_mark(client)
+        order(client, slots[0])
+        order(client, other)
+
+        data = changes(client, since, machine_id=other.machine_id).json()
+
+        assert [slot["id"] for slot in data["slots"]] == [str(other.id)]
+
+    def test_slots_never_leave_their_machine(self, client, slots):
+        since = high_water_mark(client)
+        slot = slots[0]
+        slot.machine = VendingMachineFactory()
+
+        with pytest.raises(SlotMovedException):
+            slot.save()
+
+        assert changes(client, since).json()["slots"] == []
+
+    def test_cost_does_not_grow_with_the_grid(
+        self, client, slots, django_assert_num_queries
+    ):
+        since = high_water_mark(client)
+        order(client, slots[0])
+
+        # bounds, changes, slots
+        with django_assert_num_queries(3):
+            changes(client, since)
+
+    def test_pruned_history_is_gone(self, client, slots):
+        since = high_water_mark(client)
+        order(client, slots[0])
+        order(client, slots[1])
+
+        prune_slot_changes(timezone.now() + timedelta(seconds=1))
+
+        assert changes(client, since).status_code == status.HTTP_410_GONE
+        assert SlotChange.objects.count() == 1
+        assert changes(client, high_water_mark(client)).status_code == 200
+
+    def test_unknown_high_water_mark_is_gone(self, client, slots):
+        response = changes(client, high_water_mark(client) + 1)
+
+        assert response.status_code == status.HTTP_410_GONE
+
+    def test_prune_command_keeps_recent_changes(self, slots):
+        out = StringIO()
+
+        call_command("prune_slot_changes", stdout=out)
+
+        assert SlotChange.objects.count() == len(slots)
+        assert "Pruned 0" in out.getvalue()
@@ -0,0 +1,155 @@
+from uuid import uuid4
+
+import pytest
+from rest_framework import status
+
+from apps.vending.models import VendingMachineSlot
+from apps.vending.tests.factories import (
+    UserFactory,
+    VendingMachineSlotFactory,
+)
+
+
+@pytest.fixture
+def slot() -> VendingMachineSlot:
+    return VendingMachineSlotFactory(row=2, column=3, quantity=5)
+
+
+def order(client, slot):
+    return client.post(
+        "/order/",
+        data={
+            "user_id": UserFactory().id,
+            "product_id": slot.product_id,
+            "slot_id": slot.id,
+        },
+    )
+
+
+@pytest.mark.django_db
+class TestSlotDetail:
+    def test_has_the_listing_shape(self, client, slot):
+        response = client.get(f"/slots/{slot.id}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == client.get("/slots/").json()[0]
+
+    def test_unknown_slot(self, client):
+        response = client.get(f"/slots/{uuid4()}")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_is_served_from_the_cache(self, client, slot, django_assert_num_queries):
+        client.get(f"/slots/{slot.id}")
+
+        with django_assert_num_queries(0):
+            client.get(f"/slots/{slot.id}")
+
+    def test_orders_refresh_the_slot(self, client, slot):
+        client.get(f"/slots/{slot.id}")
+
+        order(client, slot)
+
+        assert client.get(f"/slots/{slot.id}").json()["quantity"] == 4
+
+    def test_orders_leave_other_slots_cached(
+        self, client, slot, django_assert_num_queries
+    ):
+        other = VendingMachineSlotFactory(machine=slot.machine, row=1, column=1)
+        client.get(f"/slots/{other.id}")
+
+        order(client, slot)
+
+        with django_assert_num_queries(0):
+            client.get(f"/slots/{other.id}")
+
+    def test_product_changes_refresh_the_slot(self, client, slot):
+        client.get(f"/slots/{slot.id}")
+
+        slot.product.name = "Renamed"
+        slot.product.save()
+
+        assert client.get(f"/slots/{slot.id}").json()["product"]["name"] == "Renamed"
+
+    def test_restock_refreshes_the_slot(self, client, slot):
+        client.get(f"/slots/{slot.id}")
+
+        client.post(
+            "/slots/restock",
+            data={
+                "slots": [
+                    {
+                        "machine_id": slot.machine_id,
+                        "row": slot.row,
+                        "column": slot.column,
+                        "product_id": slot.product_id,
+                        "quantity": 9,
+                    }
+                ]
+            },
+            content_type="application/json",
+        )
+
+        assert client.get(f"/slots/{slot.id}").json()["quantity"] == 9
+
+
+@pytest.mark.django_db
+class TestSlotAt:
+    def test_finds_the_slot_at_a_position(self, client, slot):
+        response = client.get("/slots/at/3/2")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == client.get(f"/slots/{slot.id}").json()
+
+    def test_empty_position(self, client, slot):
+        response = client.get("/slots/at/2/3")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_is_served_from_the_cache(self, client, slot, django_assert_num_queries):
+        client.get("/slots/at/3/2")
+
+        with django_assert_num_queries(0):
+            client.get("/slots/at/3/2")
+
+    def test_position_held_by_several_machines(self, client, slot):
+        VendingMachineSlotFactory(row=2, column=3)
+
+        response = client.get("/slots/at/3/2")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_new_slot_makes_a_cached_position_ambiguous(self, client, slot):
+        client.get("/slots/at/3/2")
+
+        VendingMachineSlotFactory(row=2, column=3)
+
+        assert client.get("/slots/at/3/2").status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize("in_path", [True, False], ids=["path", "query"])
+    def test_picks_the_machine(self, client, slot, in_path):
+        VendingMachineSlotFactory(row=2, column=3)
+        if in_path:
+            response = client.get(f"/machines/{slot.machine_id}/slots/at/3/2")
+        else:
+            response = client.get("/slots/at/3/2", data={"machine_id": slot.machine_id})
+
+        assert response.json()["id"] == str(slot.id)
+
+    def test_moved_slot_is_not_served_at_its_old_position(self, client, slot):
+        url = f"/machines/{slot.machine_id}/slots/at/3/2"
+        client.get(url)
+
+        slot.row = 1
+        slot.save()
+
+        assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_deleted_slot_is_replaced(self, client, slot):
+        url = f"/machines/{slot.machine_id}/slots/at/3/2"
+        client.get(url)
+
+        slot.delete()
+        new = VendingMachineSlotFactory(machine=slot.machine, row=2, column=3)
+
+        assert client.get(url).json()["id"] == str(new.id)
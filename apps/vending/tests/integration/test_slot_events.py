@@ -0,0 +1,166 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.urls import path
+from django.utils import timezone
+
+from apps.vending.async_views import AsyncSlotEventsView
+from apps.vending.changes import prune_slot_changes, slot_changes
+from apps.vending.events import encode_event, get_slot_event_hub
+from apps.vending.models import VendingMachineSlot
+from apps.vending.tests.factories import VendingMachineSlotFactory
+
+urlpatterns = [
+    path("slots/events", AsyncSlotEventsView.as_view()),
+    path("machines/<uuid:machine_id>/slots/events", AsyncSlotEventsView.as_view()),
+]
+
+pytestmark = [pytest.mark.urls(__name__), pytest.mark.django_db]
+
+
+def run(coroutine_function):
+    """Runs a test body on an event loop, with the ORM on the test thread."""
+    async_to_sync(coroutine_function)()
+
+
+@pytest.fixture
+def slot() -> VendingMachineSlot:
+    return VendingMachineSlotFactory(row=1, column=1, quantity=5)
+
+
+@pytest.fixture
+def sell(django_capture_on_commit_callbacks):
+    """Sells one unit of a slot from another thread, as a request would."""
+
+    @sync_to_async
+    def sell(slot: VendingMachineSlot):
+        with django_capture_on_commit_callbacks(execute=True):
+            slot.quantity -= 1
+            slot.save()
+
+    return sell
+
+
+def parse(event: bytes) -> dict:
+    return dict(line.split(": ", 1) for line in event.decode().splitlines() if line)
+
+
+class TestSlotEventHub:
+    def test_delivers_changes_to_subscribers(self, slot, sell):
+        async def scenario():
+            subscription = get_slot_event_hub().subscribe()
+            await sell(slot)
+            change_id, event = await asyncio.wait_for(subscription.queue.get(), 1)
+            fields = parse(event)
+            assert fields["id"] == str(change_id)
+            assert fields["event"] == "slot"
+            assert '"quantity":4' in fields["data"]
+
+        run(scenario)
+
+    def test_filters_by_machine(self, slot, sell):
+        other = VendingMachineSlotFactory(row=1, column=1)
+
+        async def scenario():
+            subscription = get_slot_event_hub().subscribe(other.machine_id)
+            await sell(slot)
+            await sell(other)
+            _, event = await asyncio.wait_for(subscription.queue.get(), 1)
+            assert str(other.id) in parse(event)["data"]
+            assert subscription.queue.empty()
+
+        run(scenario)
+
+    def test_slow_subscriber_is_dropped(self, settings, slot, sell):
+        settings.VENDING_SLOT_EVENT_BUFFER_SIZE = 2
+        hub = get_slot_event_hub()
+
+        async def scenario():
+            subscription = hub.subscribe()
+            for _ in range(3):
+                await sell(slot)
+            await asyncio.sleep(0)
+            assert subscription.overflowed
+            assert hub.subscriber_count == 0
+            assert subscription.queue.qsize() == 2
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            assert subscription.done
+
+        run(scenario)
+
+    def test_no_subscribers_reads_nothing(self, slot, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            get_slot_event_hub().dispatch([(1, str(slot.id), str(slot.machine_id))])
+
+
+class TestSlotEventsView:
+    def test_streams_live_changes(self, async_client, slot, sell):
+        async def scenario():
+            response = await async_client.get("/slots/events")
+            assert response["Content-Type"] == "text/event-stream"
+            stream = aiter(response.streaming_content)
+            assert await anext(stream) == b": connected\n\n"
+            await sell(slot)
+            event = parse(await asyncio.wait_for(anext(stream), 1))
+            assert event["event"] == "slot"
+            await stream.aclose()
+
+        run(scenario)
+
+    def test_replays_changes_since_last_event_id(self, async_client, slot, sell):
+        since = slot_changes(None, 1)["next"]
+        other = VendingMachineSlotFactory(machine=slot.machine, row=1, column=2)
+
+        async def scenario():
+            await sell(slot)
+            response = await async_client.get(
+                f"/machines/{slot.machine_id}/slots/events",
+                headers={"Last-Event-ID": str(since)},
+            )
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            replayed = [parse(await anext(stream)) for _ in range(2)]
+            assert {event["event"] for event in replayed} == {"slot"}
+            assert {event["id"] for event in replayed} == {str(since + 2)}
+            assert str(other.id) in replayed[0]["data"] + replayed[1]["data"]
+            await sell(other)
+            live = parse(await asyncio.wait_for(anext(stream), 1))
+            assert int(live["id"]) == since + 3
+            await stream.aclose()
+
+        run(scenario)
+
+    def test_pruned_history_resets_the_client(self, async_client, slot, sell):
+        async def scenario():
+            await sell(slot)
+            await sell(slot)
+            await sync_to_async(prune_slot_changes)(timezone.now() + timedelta(1))
+            response = await async_client.get("/slots/events?last_event_id=0")
+            stream = aiter(response.streaming_content)
+            await anext(stream)
+            assert parse(await anext(stream))["event"] == "reset"
+            await stream.aclose()
+
+        run(scenario)
+
+    def test_closes_idle_streams(self, settings, async_client):
+        settings.VENDING_SLOT_EVENT_KEEPALIVE = 0.01
+        settings.VENDING_SLOT_EVENT_MAX_AGE = 0.05
+
+        async def scenario():
+            response = await async_client.get("/slots/events")
+            events = [event async for event in response.streaming_content]
+            assert events[0] == b": connected\n\n"
+            assert set(events[1:]) == {b": keepalive\n\n"}
+            assert get_slot_event_hub().subscriber_count == 0
+
+        run(scenario)
+
+
+def test_encode_event():
+    assert encode_event("deleted", {"id": "x"}, 7) == (
+        b'id: 7\nevent: deleted\ndata: {"id":"x"}\n\n'
+    )
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from rest_framework import status
+
+from apps.vending.views import VendingMachineSlotView
+from apps.vending.tests.factories import VendingMachineSlotFactory
+
+
+@pytest.fixture
+def slots():
+    return [
+        VendingMachineSlotFactory(row=row, column=column, quantity=column)
+        for row in range(1, 4)
+        for column in range(1, 5)
+    ]
+
+
+@pytest.mark.django_db
+class TestSlotPagination:
+    def test_pages_cover_the_full_listing_in_order(self, client, slots):
+        full_listing = client.get("/slots/").json()
+
+        pages, cursor = [], ""
+        while True:
+            response = client.get(f"/slots/?limit=5&cursor={cursor}")
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            pages.append(page["results"])
+            if not (cursor := page["next"]):
+                break
+
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert [slot for page in pages for slot in page] == full_listing
+
+    def test_pages_apply_the_quantity_filter(self, client, slots):
+        response = client.get("/slots/?quantity=2&limit=4")
+        page = response.json()
+        assert [slot["quantity"] for slot in page["results"]] == [1, 2, 1, 2]
+
+        response = client.get(f"/slots/?quantity=2&limit=4&cursor={page['next']}")
+        page = response.json()
+        assert [slot["quantity"] for slot in page["results"]] == [1, 2]
+        assert page["next"] is None
+
+    def test_page_query_count_does_not_depend_on_depth(
+        self, client, slots, django_assert_num_queries
+    ):
+        cursor = client.get("/slots/?limit=10").json()["next"]
+
+        with django_assert_num_queries(1):
+            client.get(f"/slots/?limit=10&cursor={cursor}")
+
+    def test_tampered_cursor_is_rejected(self, client, slots):
+        cursor = client.get("/slots/?limit=5").json()["next"]
+
+        response = client.get(f"/slots/?limit=5&cursor={cursor[:-2]}xx")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"cursor": ["Invalid cursor."]}
+
+
+@pytest.mark.django_db
+class TestSlotStreaming:
+    def test_stream_matches_full_listing(self, client, slots, monkeypatch):
+        monkeypatch.setattr(VendingMachineSlotView, "stream_chunk_size", 5)
+
+        response = client.get("/slots/?stream=true")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        body = b"".join(response.streaming_content)
+        assert json.loads(body) == client.get("/slots/").json()
+
+    def test_stream_of_empty_listing(self, client):
+        response = client.get("/slots/?stream=true")
+
+        assert b"".join(response.streaming_content) == b"[]"
@@ -0,0 +1,247 @@
+import json
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+
+import apps.vending.journal as journal_module
+from apps.vending.journal import OrderJournal
+from apps.vending.models import VendingMachineSlot
+from apps.vending.stock_alerts import (
+    FileAlertSink,
+    LowStockMonitor,
+    QueueAlertSink,
+    get_low_stock_monitor,
+    reset_low_stock_monitor,
+    stock_level,
+)
+from apps.vending.tests.factories import (
+    UserFactory,
+    VendingMachineFactory,
+    VendingMachineSlotFactory,
+)
+
+QUEUE_SINK = "apps.vending.stock_alerts.QueueAlertSink"
+
+
+@pytest.fixture
+def alerts(settings) -> QueueAlertSink:
+    settings.VENDING_STOCK_ALERT_SINKS = {QUEUE_SINK: {}}
+    reset_low_stock_monitor()
+    (sink,) = get_low_stock_monitor().sinks
+    return sink
+
+
+def order(client, user, slot):
+    return client.post(
+        "/order/",
+        data={"user_id": user.id, "product_id": slot.product.id, "slot_id": slot.id},
+    )
+
+
+def level(slot, quantity) -> dict:
+    return stock_level(
+        slot.id,
+        slot.machine_id,
+        slot.row,
+        slot.column,
+        quantity,
+        slot.low_stock_threshold,
+    )
+
+
+@pytest.mark.django_db
+class TestLowStockMonitor:
+    def test_alerts_only_when_a_slot_changes_status(self):
+        slot = VendingMachineSlotFactory(quantity=10, low_stock_threshold=2)
+        sink = QueueAlertSink()
+        monitor = LowStockMonitor([sink])
+
+        for quantity in [3, 2, 1, 0, 0, 5]:
+            monitor.observe([level(slot, quantity)])
+
+        events = [(alert["event"], alert["quantity"]) for alert in sink.drain()]
+        assert events == [("low", 2), ("empty", 0), ("restocked", 5)]
+
+    def test_is_seeded_from_the_database(self, django_assert_num_queries):
+        low = VendingMachineSlotFactory(quantity=1, low_stock_threshold=2)
+        VendingMachineSlotFactory(row=1, quantity=3, low_stock_threshold=2)
+        monitor = LowStockMonitor()
+
+        with django_assert_num_queries(1):
+            assert [slot["slot_id"] for slot in monitor.low_stock()] == [low.id]
+        with django_assert_num_queries(0):
+            monitor.low_stock()
+
+    def test_resync_picks_up_changes_made_elsewhere(self):
+        slot = VendingMachineSlotFactory(quantity=10)
+        sink = QueueAlertSink()
+        monitor = LowStockMonitor([sink], resync_interval=0)
+        assert monitor.low_stock() == []
+
+        VendingMachineSlot.objects.filter(id=slot.id).update(quantity=0)
+
+        assert [slot["status"] for slot in monitor.low_stock()] == ["empty"]
+        assert sink.drain() == []
+
+    def test_a_failing_sink_does_not_stop_the_others(self):
+        class BrokenSink:
+            def send(self, alerts):
+                raise ConnectionError()
+
+        slot = VendingMachineSlotFactory(quantity=10)
+        sink = QueueAlertSink()
+        monitor = LowStockMonitor([BrokenSink(), sink])
+
+        monitor.observe([level(slot, 0)])
+
+        assert len(sink.drain()) == 1
+
+    def test_file_sink_writes_json_lines(self, tmp_path):
+        slot = VendingMachineSlotFactory(quantity=10)
+        path = tmp_path / "alerts.jsonl"
+        monitor = LowStockMonitor([FileAlertSink(path)])
+
+        monitor.observe([level(slot, 1)])
+        monitor.observe([level(slot, 0)])
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["event"] for line in lines] == ["low", "empty"]
+        assert lines[0]["slot_id"] == str(slot.id)
+
+
+@pytest.mark.django_db
+class TestStockEvents:
+    def test_order_alerts_when_a_slot_runs_low(
+        self, client, alerts, django_capture_on_commit_callbacks
+    ):
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=3, low_stock_threshold=2)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            order(client, user, slot)
+            order(client, user, slot)
+
+        (alert,) = alerts.drain()
+        assert (alert["event"], alert["slot_id"], alert["quantity"]) == (
+            "low",
+            str(slot.id),
+            2,
+        )
+
+    def test_failed_order_reports_nothing(
+        self, client, alerts, django_capture_on_commit_callbacks
+    ):
+        user = UserFactory(credit=Decimal("0.00"))
+        slot = VendingMachineSlotFactory(quantity=1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert order(client, user, slot).status_code == 400
+
+        assert alerts.drain() == []
+
+    def test_batch_order_reports_every_slot(
+        self, client, alerts, django_capture_on_commit_callbacks
+    ):
+        user = UserFactory()
+        slots = [
+            VendingMachineSlotFactory(row=1, column=i + 1, quantity=1) for i in range(2)
+        ]
+        lines = [{"slot_id": s.id, "product_id": s.product_id} for s in slots]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                "/order/batch/",
+                data={"user_id": user.id, "lines": lines},
+                content_type="application/json",
+            )
+
+        assert {(a["event"], a["slot_id"]) for a in alerts.drain()} == {
+            ("empty", str(slot.id)) for slot in slots
+        }
+
+    def test_restock_clears_the_slot(
+        self, client, alerts, django_capture_on_commit_callbacks
+    ):
+        slot = VendingMachineSlotFactory(row=1, column=1, quantity=0)
+        line = {
+            "machine_id": slot.machine_id,
+            "row": 1,
+            "column": 1,
+            "product_id": slot.product_id,
+            "quantity": 8,
+        }
+        assert len(client.get("/slots/low-stock").json()) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                "/slots/restock",
+                data={"slots": [line]},
+                content_type="application/json",
+            )
+
+        assert [alert["event"] for alert in alerts.drain()] == ["restocked"]
+        assert client.get("/slots/low-stock").json() == []
+
+    def test_journaled_orders_are_reported(
+        self, alerts, tmp_path, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        journal = OrderJournal(tmp_path / "orders.journal")
+        journal.open(background=False)
+        monkeypatch.setattr(journal_module, "_journal", journal)
+        user = UserFactory()
+        slot = VendingMachineSlotFactory(quantity=1)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            journal.purchase(user.id, slot.id, slot.product.id)
+        journal.close()
+
+        assert [alert["event"] for alert in alerts.drain()] == ["empty"]
+
+
+@pytest.mark.django_db
+class TestLowStockView:
+    @pytest.fixture
+    def machines(self):
+        machines = VendingMachineFactory.create_batch(2)
+        for machine in machines:
+            for column, quantity in enumerate([0, 1, 5], start=1):
+                VendingMachineSlotFactory(
+                    machine=machine, row=1, column=column, quantity=quantity
+                )
+        return machines
+
+    def test_lists_low_and_empty_slots(self, client, machines):
+        response = client.get("/slots/low-stock")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(
+            (slot["machine_id"], slot["column"], slot["status"])
+            for slot in response.json()
+        ) == sorted(
+            (str(machine.id), column, slot_status)
+            for machine in machines
+            for column, slot_status in [(1, "empty"), (2, "low")]
+        )
+
+    def test_filters_by_machine_and_status(self, client, machines):
+        response = client.get(
+            "/slots/low-stock",
+            data={"machine_id": machines[0].id, "status": "empty"},
+        )
+
+        (slot,) = response.json()
+        assert (slot["machine_id"], slot["column"]) == (str(machines[0].id), 1)
+
+    def test_reads_no_rows_once_loaded(
+        self, client, machines, django_assert_num_queries
+    ):
+        client.get("/slots/low-stock")
+
+        with django_assert_num_queries(0):
+            client.get("/slots/low-stock")
+
+    def test_rejects_unknown_status(self, client):
+        response = client.get("/slots/low-stock", data={"status": "full"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
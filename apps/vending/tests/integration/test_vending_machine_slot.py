@@ -1,7 +1,11 @@
 from decimal import Decimal
 import pytest
 from apps.vending.models import VendingMachineSlot
-from apps.vending.tests.factories import ProductFactory, VendingMachineSlotFactory
+from apps.vending.tests.factories import (
+    ProductFactory,
+    VendingMachineFactory,
+    VendingMachineSlotFactory,
+)
 from uuid import uuid4
 from rest_framework import status
 from unittest.mock import ANY
@@ -30,3 +34,26 @@ def test_invalid_quantity_filter_returns_bad_request(client):
     assert response.json() == {
         "quantity": ["Ensure this value is greater than or equal to 0."]
     }
+
+
+@pytest.mark.django_db
+def test_admin_does_not_move_a_slot_to_another_machine(admin_client):
+    slot = VendingMachineSlotFactory(row=1, column=1, quantity=5)
+    other = VendingMachineFactory()
+
+    response = admin_client.post(
+        f"/admin/vending/vendingmachineslot/{slot.id}/change/",
+        {
+            "machine": other.id,
+            "product": slot.product_id,
+            "quantity": 4,
+            "row": slot.row,
+            "column": slot.column,
+            "low_stock_threshold": slot.low_stock_threshold,
+        },
+    )
+
+    assert response.status_code == status.HTTP_302_FOUND
+    stored_slot = VendingMachineSlot.objects.get(id=slot.id)
+    assert stored_slot.machine_id == slot.machine_id
+    assert stored_slot.quantity == 4
@@ -9,6 +9,7 @@ from apps.vending.models import Product, User, VendingMachineSlot
 from apps.vending.tests.factories import (
     ProductFactory,
     UserFactory,
+    VendingMachineFactory,
     VendingMachineSlotFactory,
 )
 from django.urls import reverse
@@ -137,6 +138,154 @@ class TestListVendingMachineSlots:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == expected_response
 
+    @pytest.mark.parametrize("grid_size", [1, 10, 50])
+    def test_list_slots_query_count_does_not_grow_with_rows(
+        self, client, django_assert_num_queries, grid_size
+    ):
+        for i in range(grid_size):
+            VendingMachineSlotFactory(row=i // 10 + 1, column=i % 10 + 1)
+
+        with django_assert_num_queries(1):
+            response = client.get("/slots/")
+
+        assert len(response.json()) == grid_size
+
+
+@pytest.mark.django_db
+class TestSlotsCache:
+    def test_unchanged_poll_returns_not_modified_without_queries(
+        self, client, slots_grid, django_assert_num_queries
+    ):
+        etag = client.get("/slots/").headers["ETag"]
+
+        with django_assert_num_queries(0):
+            response = client.get("/slots/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == etag
+
+    def test_repeated_poll_is_served_from_cache(
+        self, client, slots_grid, django_assert_num_queries
+    ):
+        first = client.get("/slots/?quantity=2")
+
+        with django_assert_num_queries(0):
+            second = client.get("/slots/?quantity=2")
+
+        assert second.json() == first.json()
+
+    def test_order_invalidates_listing(self, client, slots_grid, user):
+        etag = client.get("/slots/").headers["ETag"]
+
+        client.post(
+            "/order/",
+            data={
+                "user_id": user.id,
+                "product_id": slots_grid[3].product.id,
+                "slot_id": slots_grid[3].id,
+            },
+        )
+        response = client.get("/slots/", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+        assert response.json()[3]["quantity"] == 2
+
+    def test_product_save_invalidates_listing(self, client, slots_grid):
+        client.get("/slots/")
+
+        product = slots_grid[0].product
+        product.price = Decimal("1.25")
+        product.save()
+        response = client.get("/slots/")
+
+        assert response.json()[0]["product"]["price"] == "1.25"
+
+    def test_slot_save_invalidates_listing(self, client, slots_grid):
+        client.get("/slots/")
+
+        slots_grid[0].quantity = 9
+        slots_grid[0].save()
+        response = client.get("/slots/")
+
+        assert response.json()[0]["quantity"] == 9
+
+
+@pytest.fixture
+def machines_grid(products_list) -> dict:
+    """returns two machines with a row of 5 slots each"""
+    grid = {}
+    for machine in VendingMachineFactory.create_batch(2):
+        grid[machine] = [
+            VendingMachineSlotFactory(
+                machine=machine, product=products_list.pop(), row=1, column=column
+            )
+            for column in range(1, 6)
+        ]
+    return grid
+
+
+@pytest.mark.django_db
+class TestMachineSlots:
+    def test_lists_only_the_machine_slots(self, client, machines_grid):
+        machine, slots = next(iter(machines_grid.items()))
+
+        response = client.get(f"/machines/{machine.id}/slots/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [slot["id"] for slot in response.json()] == [
+            str(slot.id) for slot in slots
+        ]
+
+    def test_unknown_machine_lists_nothing(self, client, machines_grid):
+        response = client.get(f"/machines/{uuid4()}/slots/")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == []
+
+    def test_paginates_within_the_machine(self, client, machines_grid):
+        machine, slots = next(iter(machines_grid.items()))
+
+        response = client.get(f"/machines/{machine.id}/slots/?limit=3")
+        next_page = client.get(
+            f"/machines/{machine.id}/slots/?limit=3&cursor={response.json()['next']}"
+        )
+
+        listed = response.json()["results"] + next_page.json()["results"]
+        assert [slot["id"] for slot in listed] == [str(slot.id) for slot in slots]
+        assert next_page.json()["next"] is None
+
+    def test_order_only_invalidates_its_machine(self, client, machines_grid, user):
+        (busy, busy_slots), (quiet, _) = machines_grid.items()
+        busy_etag = client.get(f"/machines/{busy.id}/slots/").headers["ETag"]
+        quiet_etag = client.get(f"/machines/{quiet.id}/slots/").headers["ETag"]
+
+        client.post(
+            "/order/",
+            data={
+                "user_id": user.id,
+                "product_id": busy_slots[0].product.id,
+                "slot_id": busy_slots[0].id,
+            },
+        )
+
+        busy_response = client.get(
+            f"/machines/{busy.id}/slots/", HTTP_IF_NONE_MATCH=busy_etag
+        )
+        quiet_response = client.get(
+            f"/machines/{quiet.id}/slots/", HTTP_IF_NONE_MATCH=quiet_etag
+        )
+        assert busy_response.status_code == status.HTTP_200_OK
+        assert quiet_response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_same_coordinates_on_different_machines(self, client, machines_grid):
+        quiet = list(machines_grid)[1]
+        VendingMachineSlotFactory(machine=quiet, row=2, column=1)
+
+        response = client.get(f"/machines/{quiet.id}/slots/")
+
+        assert len(response.json()) == 6
+
 
 @pytest.fixture
 def user() -> User:
@@ -152,6 +301,7 @@ class TestLogin:
             "id": ANY,
             "username": "user1",
             "credit": "100.00",
+            "token": ANY,
         }
 
         assert response.status_code == status.HTTP_200_OK
@@ -249,6 +399,23 @@ class TestOrder:
         assert response.status_code == status.HTTP_400_BAD_REQUEST
         assert response.json() == expected_response
 
+    def test_create_order_product_not_in_slot_expected_response(
+        self, client, user, slots_grid
+    ):
+        response = client.post(
+            "/order/",
+            data={
+                "user_id": user.id,
+                "product_id": slots_grid[4].product.id,
+                "slot_id": slots_grid[3].id,
+            },
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {"error": "Product is not in this slot. "}
+        slots_grid[3].refresh_from_db()
+        assert slots_grid[3].quantity == 3
+
     def test_create_order_validation_error_expected_response(
         self, client, user, slots_grid
     ):
@@ -0,0 +1,9 @@
+from itertools import islice
+
+
+def batched(rows, size: int):
+    """Yields lists of up to `size` items of `rows`, like Python 3.12's
+    `itertools.batched`."""
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
@@ -1,9 +1,45 @@
 from rest_framework import serializers
 from decimal import Decimal
 
+from apps.vending.models import VendingMachineSlot
+
+
+def model_validators(model, field_name: str) -> list:
+    return list(model._meta.get_field(field_name).validators)
+
 
 class ListSlotsValidator(serializers.Serializer):
     quantity = serializers.IntegerField(required=False, min_value=0, default=None)
+    cursor = serializers.CharField(required=False, default=None)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=1000, default=None
+    )
+    stream = serializers.BooleanField(required=False, default=False)
+
+
+class SlotPositionValidator(serializers.Serializer):
+    machine_id = serializers.UUIDField(required=False, default=None)
+
+
+class SlotChangesValidator(serializers.Serializer):
+    since = serializers.IntegerField(required=False, min_value=0, default=None)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=1000, default=500
+    )
+    machine_id = serializers.UUIDField(required=False, default=None)
+
+
+class SlotEventsValidator(serializers.Serializer):
+    machine_id = serializers.UUIDField(required=False, default=None)
+    # For clients that cannot set the Last-Event-ID header.
+    last_event_id = serializers.IntegerField(required=False, min_value=0, default=None)
+
+
+class LowStockValidator(serializers.Serializer):
+    machine_id = serializers.UUIDField(required=False, default=None)
+    status = serializers.ChoiceField(
+        required=False, choices=["low", "empty"], default=None
+    )
 
 
 class AuthValidator(serializers.Serializer):
@@ -16,7 +52,62 @@ class UserValidator(serializers.Serializer):
     )
 
 
-class OrderValidator(serializers.Serializer):
-    user_id = serializers.UUIDField(required=True)
+class CreditAmountValidator(serializers.Serializer):
+    amount = serializers.DecimalField(
+        required=True, max_digits=6, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+
+class OrderLineValidator(serializers.Serializer):
     slot_id = serializers.UUIDField(required=True)
     product_id = serializers.UUIDField(required=True)
+
+
+class OrderValidator(OrderLineValidator):
+    user_id = serializers.UUIDField(required=True)
+
+
+class BatchOrderValidator(serializers.Serializer):
+    # Keeps the order INSERT within a single statement on every backend.
+    MAX_LINES = 100
+
+    user_id = serializers.UUIDField(required=True)
+    lines = OrderLineValidator(many=True, allow_empty=False, max_length=MAX_LINES)
+
+
+class PageValidator(serializers.Serializer):
+    cursor = serializers.CharField(required=False, default=None)
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=1000, default=100
+    )
+
+
+class SalesReportValidator(serializers.Serializer):
+    since = serializers.DateTimeField(required=False, default=None)
+    until = serializers.DateTimeField(required=False, default=None)
+
+
+class RestockLineValidator(serializers.Serializer):
+    machine_id = serializers.UUIDField()
+    row = serializers.IntegerField(
+        validators=model_validators(VendingMachineSlot, "row")
+    )
+    column = serializers.IntegerField(
+        validators=model_validators(VendingMachineSlot, "column")
+    )
+    product_id = serializers.UUIDField()
+    quantity = serializers.IntegerField(
+        validators=model_validators(VendingMachineSlot, "quantity")
+    )
+
+
+class RestockValidator(serializers.Serializer):
+    slots = RestockLineValidator(many=True, allow_empty=False)
+
+    def validate_slots(self, slots):
+        coordinates = [
+            (slot["machine_id"], slot["row"], slot["column"]) for slot in slots
+        ]
+        if len(set(coordinates)) != len(coordinates):
+            raise serializers.ValidationError("Slot coordinates must be unique.")
+        return slots
@@ -1,43 +1,229 @@
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.views import APIView
-from apps.vending.expections import NotEnoughCreditException, ProductOutOfStockException
+from apps.vending.auth import TokenAuthentication, issue_token
+from apps.vending.changes import slot_changes
+from apps.vending.cache import (
+    get_inventory_version,
+    get_slot,
+    get_slot_at,
+    get_slot_listing,
+    get_user_credit,
+    get_user_login,
+    set_slot_listing,
+    slot_listing_etag,
+)
+from apps.vending.credit import debit, set_credit, top_up
+from apps.vending.expections import (
+    AmbiguousSlotException,
+    BatchOrderException,
+    CreditLimitException,
+    InvalidManifestException,
+    NotEnoughCreditException,
+    ProductNotInSlotException,
+    ProductOutOfStockException,
+    SlotChangesPrunedException,
+    StockChangedException,
+)
 
-from apps.vending.models import Order, Product, User, VendingMachineSlot
-from apps.vending.serializers import VendingMachineSlotSerializer, UserSerializer
+from apps.vending.idempotency import idempotent
+from apps.vending.inventory import apply_restock
+from apps.vending.journal import get_order_journal
+from apps.vending.models import CreditTransaction, Order, User, VendingMachineSlot
+from apps.vending.purchases import purchase, purchase_many
+from apps.vending.reports import sales_report
+from apps.vending.stock_alerts import get_low_stock_monitor
+from apps.vending.pagination import KeysetPaginator
+from apps.vending.serializers import (
+    CreditSerializer,
+    CreditTransactionSerializer,
+    FastVendingMachineSlotSerializer,
+    VendingMachineSlotSerializer,
+    UserOrderSerializer,
+    UserSerializer,
+)
 from apps.vending.validators import (
     ListSlotsValidator,
+    SlotChangesValidator,
+    SlotPositionValidator,
     AuthValidator,
+    LowStockValidator,
+    BatchOrderValidator,
+    CreditAmountValidator,
     OrderValidator,
+    PageValidator,
+    RestockValidator,
+    SalesReportValidator,
     UserValidator,
 )
 from rest_framework import status
 
 
 class AuthView(APIView):
+    serializer_class = UserSerializer
+
     def post(self, request: Request) -> Response:
         validator = AuthValidator(data=request.data)
         validator.is_valid(raise_exception=True)
 
-        try:
-            user = User.objects.get(username=validator.validated_data["username"])
-            user_serializer = UserSerializer(user, many=False)
-            return Response(data=user_serializer.data)
-        except User.DoesNotExist:
+        username = validator.validated_data["username"]
+        login = get_user_login(username)
+        if login is None:
             return Response(status=status.HTTP_401_UNAUTHORIZED)
 
+        user_id, credit = login
+        user = User(id=user_id, username=username, credit=credit)
+        user_serializer = self.serializer_class(user, many=False)
+        return Response(
+            data={**user_serializer.data, "token": issue_token(user_id, username)}
+        )
+
+
+class MeView(APIView):
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserSerializer
 
-class VendingMachineSlotView(APIView):
     def get(self, request: Request) -> Response:
+        credit = get_user_credit(request.user.id)
+        if credit is None:
+            raise AuthenticationFailed("User does not exist.")
+
+        user = User(id=request.user.id, username=request.user.username, credit=credit)
+        user_serializer = self.serializer_class(user, many=False)
+        return Response(data=user_serializer.data)
+
+
+class VendingMachineSlotView(APIView):
+    serializer_class = VendingMachineSlotSerializer
+    paginator = KeysetPaginator(ordering=("row", "column", "id"))
+    page_size = 100
+    stream_chunk_size = 2000
+
+    def get(self, request: Request, machine_id=None) -> Response:
         validator = ListSlotsValidator(data=request.query_params)
         validator.is_valid(raise_exception=True)
+        quantity = validator.validated_data["quantity"] or None
+
+        if validator.validated_data["stream"]:
+            return self.stream_slots(quantity, machine_id)
+        if validator.validated_data["limit"] or validator.validated_data["cursor"]:
+            return self.paginate_slots(
+                quantity,
+                validator.validated_data["cursor"],
+                validator.validated_data["limit"] or self.page_size,
+                machine_id,
+            )
+
+        version = get_inventory_version(machine_id)
+        etag = slot_listing_etag(version, quantity)
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = get_slot_listing(version, quantity, machine_id)
+        if data is None:
+            data = self.list_slots(quantity, machine_id)
+            set_slot_listing(version, quantity, data, machine_id)
+        return Response(data=data, headers={"ETag": etag})
+
+    def get_queryset(self, quantity, machine_id=None):
         filters = {}
-        if quantity := validator.validated_data["quantity"]:
+        if machine_id:
+            # Served by slot_machine_listing_idx without touching the table.
+            filters["machine_id"] = machine_id
+        if quantity:
             filters["quantity__lte"] = quantity
 
-        slots = VendingMachineSlot.objects.filter(**filters)
-        slots_serializer = VendingMachineSlotSerializer(slots, many=True)
-        return Response(data=slots_serializer.data)
+        return VendingMachineSlot.objects.select_related("product").filter(**filters)
+
+    def list_slots(self, quantity, machine_id=None):
+        slots = self.get_queryset(quantity, machine_id).order_by("row", "column")
+        slots_serializer = self.serializer_class(slots, many=True)
+        return slots_serializer.data
+
+    def paginate_slots(self, quantity, cursor, limit, machine_id=None) -> Response:
+        slots, next_cursor = self.paginator.paginate(
+            self.get_queryset(quantity, machine_id), cursor, limit
+        )
+        slots_serializer = self.serializer_class(slots, many=True)
+        return Response(data={"results": slots_serializer.data, "next": next_cursor})
+
+    def stream_slots(self, quantity, machine_id=None) -> StreamingHttpResponse:
+        slots = self.get_queryset(quantity, machine_id).order_by(
+            *self.paginator.ordering
+        )
+        slots_serializer = FastVendingMachineSlotSerializer(slots, many=True)
+        return StreamingHttpResponse(
+            slots_serializer.stream(chunk_size=self.stream_chunk_size),
+            content_type="application/json",
+        )
+
+
+class VendingMachineSlotDetailView(APIView):
+    def get(self, request: Request, slot_id) -> Response:
+        entry = get_slot(slot_id)
+        if entry is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        _, slot = entry
+        return Response(data=slot)
+
+
+class VendingMachineSlotAtView(APIView):
+    def get(self, request: Request, column: int, row: int, machine_id=None) -> Response:
+        validator = SlotPositionValidator(data=request.query_params)
+        validator.is_valid(raise_exception=True)
+
+        try:
+            entry = get_slot_at(
+                column, row, machine_id or validator.validated_data["machine_id"]
+            )
+        except AmbiguousSlotException as e:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": str(e)})
+        if entry is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        _, slot = entry
+        return Response(data=slot)
+
+
+class SlotChangesView(APIView):
+    def get(self, request: Request) -> Response:
+        validator = SlotChangesValidator(data=request.query_params)
+        validator.is_valid(raise_exception=True)
+
+        try:
+            return Response(data=slot_changes(**validator.validated_data))
+        except SlotChangesPrunedException as e:
+            return Response(status=status.HTTP_410_GONE, data={"error": str(e)})
+
+
+class LowStockView(APIView):
+    def get(self, request: Request) -> Response:
+        validator = LowStockValidator(data=request.query_params)
+        validator.is_valid(raise_exception=True)
+
+        slots = get_low_stock_monitor().low_stock(
+            machine_id=validator.validated_data["machine_id"],
+            status=validator.validated_data["status"],
+        )
+        return Response(data=slots)
+
+
+class RestockView(APIView):
+    def post(self, request: Request) -> Response:
+        validator = RestockValidator(data=request.data)
+        validator.is_valid(raise_exception=True)
+
+        try:
+            result = apply_restock(validator.validated_data["slots"])
+            return Response(data=result)
+        except InvalidManifestException as e:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"error": str(e), "lines": e.errors},
+            )
 
 
 class UserView(APIView):
@@ -46,50 +232,143 @@ class UserView(APIView):
         validator.is_valid(raise_exception=True)
 
         try:
-            user = User.objects.get(id=user_id)
-            user.credit = validator.validated_data["credit"]
-            user.save()
+            set_credit(user_id, validator.validated_data["credit"])
             return Response(status=status.HTTP_204_NO_CONTENT)
         except:
             return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def hasUserEnoughCredit(user: User, product: Product):
-    if user.credit >= product.price:
-        return True
-    return False
+class CreditTopUpView(APIView):
+    change_credit = staticmethod(top_up)
 
-
-class OrderView(APIView):
-    def post(self, request: Request) -> Response:
-        validator = OrderValidator(data=request.data)
+    def post(self, request: Request, user_id) -> Response:
+        validator = CreditAmountValidator(data=request.data)
         validator.is_valid(raise_exception=True)
 
+        return idempotent(
+            request,
+            user_id,
+            validator.validated_data,
+            lambda: self.apply(user_id, validator.validated_data["amount"]),
+        )
+
+    def apply(self, user_id, amount) -> Response:
         try:
-            user = User.objects.get(id=validator.validated_data["user_id"])
-            product = Product.objects.get(id=validator.validated_data["product_id"])
+            credit = self.change_credit(user_id, amount)
+        except User.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        except (CreditLimitException, NotEnoughCreditException) as e:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": str(e)})
+        return Response(data=CreditSerializer({"credit": credit}).data)
 
-            if hasUserEnoughCredit(user, product) == False:
-                raise NotEnoughCreditException()
 
-            slot = VendingMachineSlot.objects.get(
-                id=validator.validated_data["slot_id"]
-            )
+class CreditDebitView(CreditTopUpView):
+    change_credit = staticmethod(debit)
 
-            if slot.quantity <= 0:
-                raise ProductOutOfStockException(product)
 
-            Order.objects.create(user=user, product=product, slot=slot)
-            slot.quantity -= 1
-            slot.save()
+class CreditTransactionsView(APIView):
+    paginator = KeysetPaginator(ordering=("-created_at", "-id"))
 
-            user.credit -= product.price
-            user.save()
+    def get(self, request: Request, user_id) -> Response:
+        validator = PageValidator(data=request.query_params)
+        validator.is_valid(raise_exception=True)
 
+        page, next_cursor = self.paginator.paginate(
+            CreditTransaction.objects.filter(user_id=user_id),
+            validator.validated_data["cursor"],
+            validator.validated_data["limit"],
+        )
+        transactions_serializer = CreditTransactionSerializer(page, many=True)
+        return Response(
+            data={"results": transactions_serializer.data, "next": next_cursor}
+        )
+
+
+class OrderView(APIView):
+    def post(self, request: Request) -> Response:
+        validator = OrderValidator(data=request.data)
+        validator.is_valid(raise_exception=True)
+
+        return idempotent(
+            request,
+            validator.validated_data["user_id"],
+            validator.validated_data,
+            lambda: self.place_order(**validator.validated_data),
+        )
+
+    def place_order(self, user_id, slot_id, product_id) -> Response:
+        journal = get_order_journal()
+        place_order = journal.purchase if journal else purchase
+        try:
+            place_order(user_id=user_id, slot_id=slot_id, product_id=product_id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except NotEnoughCreditException as e:
-            return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": e})
-        except ProductOutOfStockException as e:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": str(e)})
+        except (ProductNotInSlotException, ProductOutOfStockException) as e:
             return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": str(e)})
         except Exception as e:
             return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchOrderView(APIView):
+    def post(self, request: Request) -> Response:
+        validator = BatchOrderValidator(data=request.data)
+        validator.is_valid(raise_exception=True)
+
+        return idempotent(
+            request,
+            validator.validated_data["user_id"],
+            validator.validated_data,
+            lambda: self.place_orders(**validator.validated_data),
+        )
+
+    def place_orders(self, user_id, lines) -> Response:
+        journal = get_order_journal()
+        place_orders = journal.purchase_many if journal else purchase_many
+        try:
+            orders = place_orders(user_id=user_id, lines=lines)
+            return Response(
+                status=status.HTTP_201_CREATED,
+                data={"orders": [str(order.id) for order in orders]},
+            )
+        except User.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        except BatchOrderException as e:
+            return Response(
+                status=status.HTTP_400_BAD_REQUEST,
+                data={"error": str(e), "lines": e.errors},
+            )
+        except NotEnoughCreditException as e:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"error": str(e)})
+        except StockChangedException as e:
+            return Response(status=status.HTTP_409_CONFLICT, data={"error": str(e)})
+
+
+class UserOrdersView(APIView):
+    paginator = KeysetPaginator(ordering=("-created_at", "-id"))
+
+    def get(self, request: Request, user_id) -> Response:
+        validator = PageValidator(data=request.query_params)
+        validator.is_valid(raise_exception=True)
+
+        orders = Order.objects.select_related("product").filter(user_id=user_id)
+        page, next_cursor = self.paginator.paginate(
+            orders,
+            validator.validated_data["cursor"],
+            validator.validated_data["limit"],
+        )
+        orders_serializer = UserOrderSerializer(page, many=True)
+        return Response(data={"results": orders_serializer.data, "next": next_cursor})
+
+
+class SalesReportView(APIView):
+    def get(self, request: Request) -> Response:
+        validator = SalesReportValidator(data=request.query_params)
+        validator.is_valid(raise_exception=True)
+
+        return Response(
+            data=sales_report(
+                since=validator.validated_data["since"],
+                until=validator.validated_data["until"],
+            )
+        )
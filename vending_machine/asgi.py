@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vending_machine.settings')
 
 application = get_asgi_application()
+
+# Opened now rather than on the first order, so that a second process
+# finding it locked fails to start instead of failing every order.
+from apps.vending.journal import get_order_journal  # noqa: E402
+
+get_order_journal()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that it times the whole stack.
+    "apps.health.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -74,6 +77,27 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "vending_machine.wsgi.application"
 
+# Serve the hot read endpoints (/slots/, /login/, /healthcheck/) with native
+# async views. Only worth it when running under ASGI, e.g. uvicorn.
+VENDING_ASYNC_VIEWS = os.environ.get("VENDING_ASYNC_VIEWS") == "1"
+
+# Path of a local order journal. When set, single and batch orders are
+# checked against an in-memory ledger, journaled and committed to the
+# database in batches, see apps.vending.journal. The ledger is only
+# authoritative with a single worker process taking orders: the journal is
+# opened and locked by wsgi.py and asgi.py, so a second server process fails
+# to start. Management commands do not open it.
+VENDING_ORDER_JOURNAL = os.environ.get("VENDING_ORDER_JOURNAL")
+VENDING_ORDER_JOURNAL_BATCH_SIZE = 500
+VENDING_ORDER_JOURNAL_FLUSH_INTERVAL = 0.05
+# Seconds before the ledger reads a row again, which is how long a restock
+# or credit change made by another process can go unseen by it.
+VENDING_ORDER_JOURNAL_LEDGER_MAX_AGE = 1.0
+
+# New rows get time-ordered (version 7) UUIDs instead of random ones, which
+# keeps inserts at the end of the primary key indexes, see apps.vending.ids.
+VENDING_TIME_ORDERED_IDS = os.environ.get("VENDING_TIME_ORDERED_IDS") == "1"
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -85,6 +109,104 @@ DATABASES = {
     }
 }
 
+# Tuning applied to every new SQLite connection, see apps.vending.db.
+VENDING_SQLITE_PRODUCTION_PRAGMAS = {
+    # Readers no longer block the writer, nor the writer readers.
+    "journal_mode": "WAL",
+    # Safe with WAL: a power loss may only roll back the last commits.
+    "synchronous": "NORMAL",
+    # Milliseconds a writer waits for the lock before "database is locked".
+    "busy_timeout": 5000,
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative sizes are in KiB, 64 MiB of page cache per connection.
+    "cache_size": -64 * 1024,
+}
+
+# VENDING_DB_PROFILE=production tunes SQLite for concurrent workers and
+# keeps connections open between requests instead of reconnecting.
+if os.environ.get("VENDING_DB_PROFILE") == "production":
+    DATABASES["default"]["CONN_MAX_AGE"] = 600
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    VENDING_SQLITE_PRAGMAS = VENDING_SQLITE_PRODUCTION_PRAGMAS
+else:
+    VENDING_SQLITE_PRAGMAS = {}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Point REDIS_URL at a shared Redis so every worker sees the same inventory
+# version, otherwise each process caches on its own.
+if REDIS_URL := os.environ.get("REDIS_URL"):
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+
+VENDING_CACHE_ALIAS = "shared" if "shared" in CACHES else "default"
+VENDING_CATALOGUE_CACHE_TIMEOUT = 300
+VENDING_USERNAME_CACHE_TIMEOUT = 300
+# Credit is invalidated on every change, the timeout only bounds how long a
+# balance read while a purchase commits can be served.
+VENDING_CREDIT_CACHE_TIMEOUT = 30
+VENDING_AUTH_TOKEN_MAX_AGE = 60 * 60 * 24
+
+# Remembers order responses per Idempotency-Key so retries do not charge
+# twice. Shared between workers when a shared cache is configured.
+VENDING_IDEMPOTENCY_STORE = (
+    "apps.vending.idempotency.CacheIdempotencyStore"
+    if "shared" in CACHES
+    else "apps.vending.idempotency.LocalIdempotencyStore"
+)
+VENDING_IDEMPOTENCY_OPTIONS = {
+    "timeout": 60 * 60 * 24,
+    # How long a key stays claimed by a request that never finished.
+    "reservation_timeout": 30,
+    "max_size": 100_000,
+}
+
+# Low stock alerts go to every sink listed here, import paths mapped to
+# their options. VENDING_STOCK_ALERT_FILE adds a file of JSON lines.
+VENDING_STOCK_ALERT_SINKS = {"apps.vending.stock_alerts.LoggingAlertSink": {}}
+if STOCK_ALERT_FILE := os.environ.get("VENDING_STOCK_ALERT_FILE"):
+    VENDING_STOCK_ALERT_SINKS["apps.vending.stock_alerts.FileAlertSink"] = {
+        "path": STOCK_ALERT_FILE
+    }
+# Seconds after which each process reloads its set of low stock slots, to
+# see the sales other processes made.
+VENDING_LOW_STOCK_RESYNC_INTERVAL = 60
+# Seconds the slot change log is kept for by `manage.py prune_slot_changes`.
+# Kiosks offline for longer reload the full slot listing.
+VENDING_SLOT_CHANGES_RETENTION = 60 * 60 * 24 * 7
+# Slot changes are streamed to /slots/events subscribers through this
+# broker. The local one only reaches the subscribers of the process that
+# made the change, Redis reaches every worker.
+if REDIS_URL:
+    VENDING_SLOT_EVENT_BROKER = "apps.vending.events.RedisSlotEventBroker"
+    VENDING_SLOT_EVENT_BROKER_OPTIONS = {"url": REDIS_URL}
+else:
+    VENDING_SLOT_EVENT_BROKER = "apps.vending.events.LocalSlotEventBroker"
+    VENDING_SLOT_EVENT_BROKER_OPTIONS = {}
+# Events buffered per client before a slow one is disconnected to catch up
+# from the change log.
+VENDING_SLOT_EVENT_BUFFER_SIZE = 100
+# Seconds between keep-alive comments on idle streams, and after which a
+# stream is closed for the client to reconnect. Django 4.2 does not notice
+# disconnected clients, the lifetime bounds how long they are served.
+VENDING_SLOT_EVENT_KEEPALIVE = 15
+VENDING_SLOT_EVENT_MAX_AGE = 300
+
+
+# Seconds a readiness probe result is reused for, so that frequent probes
+# cost at most one database round trip per interval.
+HEALTH_READINESS_INTERVAL = int(os.environ.get("HEALTH_READINESS_INTERVAL", "5"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
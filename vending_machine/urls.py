@@ -14,28 +14,85 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from apps.health.views import healthcheck
+from apps.health.views import async_healthcheck, healthcheck, metrics, readiness
+import apps.vending.async_views as vending_async_views
 import apps.vending.views as vending_views
+from apps.vending.serializers import (
+    FastUserSerializer,
+    FastVendingMachineSlotSerializer,
+)
+
+if settings.VENDING_ASYNC_VIEWS:
+    healthcheck_view = async_healthcheck
+    slots_view = vending_async_views.AsyncVendingMachineSlotView.as_view()
+    login_view = vending_async_views.AsyncAuthView.as_view()
+else:
+    healthcheck_view = healthcheck
+    slots_view = vending_views.VendingMachineSlotView.as_view(
+        serializer_class=FastVendingMachineSlotSerializer
+    )
+    login_view = vending_views.AuthView.as_view(serializer_class=FastUserSerializer)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("healthcheck/", healthcheck),
+    path("healthcheck/", healthcheck_view),
+    path("healthcheck/live/", healthcheck_view),
+    path("healthcheck/ready/", readiness),
+    path("metrics", metrics),
     path(
         "slots/",
         include(
             [
-                # path("<uuid:id>", vending_views.MyDetailViewToBeDone.as_view()),
-                path("", vending_views.VendingMachineSlotView.as_view()),
+                path("", slots_view),
+                path(
+                    "<uuid:slot_id>",
+                    vending_views.VendingMachineSlotDetailView.as_view(),
+                ),
+                path(
+                    "at/<int:column>/<int:row>",
+                    vending_views.VendingMachineSlotAtView.as_view(),
+                ),
+                path("restock", vending_views.RestockView.as_view()),
+                path("low-stock", vending_views.LowStockView.as_view()),
+                path("changes", vending_views.SlotChangesView.as_view()),
             ]
         ),
     ),
-    path("login/", vending_views.AuthView.as_view()),
+    path(
+        "machines/<uuid:machine_id>/slots/",
+        slots_view,
+    ),
+    path(
+        "machines/<uuid:machine_id>/slots/at/<int:column>/<int:row>",
+        vending_views.VendingMachineSlotAtView.as_view(),
+    ),
+    path("login/", login_view),
+    path("me/", vending_views.MeView.as_view(serializer_class=FastUserSerializer)),
     path(
         "users/<uuid:user_id>/credit",
         vending_views.UserView.as_view(),
         name="credit_view",
     ),
+    path("users/<uuid:user_id>/credit/topup", vending_views.CreditTopUpView.as_view()),
+    path("users/<uuid:user_id>/credit/debit", vending_views.CreditDebitView.as_view()),
+    path(
+        "users/<uuid:user_id>/credit/transactions",
+        vending_views.CreditTransactionsView.as_view(),
+    ),
     path("order/", vending_views.OrderView.as_view()),
+    path("order/batch/", vending_views.BatchOrderView.as_view()),
+    path("users/<uuid:user_id>/orders", vending_views.UserOrdersView.as_view()),
+    path("reports/sales", vending_views.SalesReportView.as_view()),
 ]
+
+if settings.VENDING_ASYNC_VIEWS:
+    # Event streams hold their connection open, only ASGI serves them.
+    slot_events_view = vending_async_views.AsyncSlotEventsView.as_view()
+    urlpatterns += [
+        path("slots/events", slot_events_view),
+        path("machines/<uuid:machine_id>/slots/events", slot_events_view),
+    ]